@@ -60,6 +60,7 @@ import tkinter as tk
 
 # failure theory implementatio.
 from ME325Common.FailureTheories import *
+from ME325Common.RenderScheduler import RenderScheduler
 
 
 class BrittleMaterial_FailureTheory_01(Frame):
@@ -142,6 +143,9 @@ class BrittleMaterial_FailureTheory_01(Frame):
     def __init__(self):
         super().__init__()
 
+        # slider changes are merged into one update per frame
+        self.render_scheduler = RenderScheduler(self, self.apply_values)
+
 
         self.stress_ut_var = DoubleVar()
         self.stress_ut_var.set(0)
@@ -200,7 +204,7 @@ class BrittleMaterial_FailureTheory_01(Frame):
 
 
         self.initUI()
-        self.update_values(0.0)
+        self.apply_values(0.0)
         #self.plot()
 
 
@@ -341,11 +345,20 @@ class BrittleMaterial_FailureTheory_01(Frame):
 
     def update_values(self, val):
         """
-        Update function for all widgets. The function updates the
-        input values. Note that all slider widgets call this functions
+        Update function for all widgets. Note that all slider widgets call this functions.
+        The update is scheduled; all changes within one frame are applied together by apply_values().
         :param val: The value the widget passes
         :return: -
         """
+        self.render_scheduler.request()
+
+    def apply_values(self, val=0):
+        """
+        Updates the input values, the results and the plot.
+        Called by the render scheduler at most once per frame.
+        :param val: not used
+        :return: -
+        """
         self.stress_ut_var.set(round(self.stress_ut_slider.get() ,2))
         self.stress_ut_str.set(str(self.stress_ut_var.get()))
 
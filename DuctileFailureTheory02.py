@@ -69,6 +69,7 @@ from ME325Common.example_beam import *
 
 # import plot
 from ME325Common.PlotHelpers import *
+from ME325Common.RenderScheduler import RenderScheduler
 
 
 class DuctileMaterial_FailureTheory_02(Frame):
@@ -153,6 +154,9 @@ class DuctileMaterial_FailureTheory_02(Frame):
     def __init__(self):
         super().__init__()
 
+        # slider changes are merged into one update per frame
+        self.render_scheduler = RenderScheduler(self, self.apply_values)
+
 
         self.yieldstress_var = DoubleVar()
         self.yieldstress_var.set(0)
@@ -213,7 +217,7 @@ class DuctileMaterial_FailureTheory_02(Frame):
         self.initUI()
 
         # update ui
-        self.update_values(0.0)
+        self.apply_values(0.0)
 
     # ----------- Update the outputs ----------
 
@@ -238,7 +242,7 @@ class DuctileMaterial_FailureTheory_02(Frame):
 
         # Update the plot
         self.failure_theory_plts.update_plot(Sy, s1, s2)
-        self.canvas.draw_idle()
+        self.failure_theory_plts.draw(self.canvas)
 
     def update_output_display(self):
         """
@@ -283,11 +287,20 @@ class DuctileMaterial_FailureTheory_02(Frame):
 
     def update_values(self, val):
         """
-        Update function for all widgets. The function updates the
-        input values. Note that all slider widgets call this functions
+        Update function for all widgets. Note that all slider widgets call this functions.
+        The update is scheduled; all changes within one frame are applied together by apply_values().
         :param val: The value the widget passes
         :return: -
         """
+        self.render_scheduler.request()
+
+    def apply_values(self, val=0):
+        """
+        Updates the input values, the results and the plot.
+        Called by the render scheduler at most once per frame.
+        :param val: not used
+        :return: -
+        """
         self.yieldstress_var.set(round(self.yieldstress_slider.get() ,2))
         self.yieldstress_str.set(str(self.yieldstress_var.get()))
 
@@ -377,6 +390,7 @@ class DuctileMaterial_FailureTheory_02(Frame):
         """
         fig = self.failure_theory_plts.create_plots(9) # 9 -> figure size
         self.canvas = FigureCanvasTkAgg(fig, master=self)
+        self.failure_theory_plts.enable_blit(self.canvas)
         self.canvas.draw()
 
 
@@ -69,6 +69,8 @@ from ME325Common.ExampleBeamRound import *
 
 # import plot
 from ME325Common.PlotHelpers import *
+from ME325Common.RenderScheduler import RenderScheduler
+from ME325Common.ComputeGraph import ComputeGraph
 
 
 class DuctileMaterial_FailureTheory_03(Frame):
@@ -149,6 +151,9 @@ class DuctileMaterial_FailureTheory_03(Frame):
     def __init__(self):
         super().__init__()
 
+        # slider changes are merged into one update per frame
+        self.render_scheduler = RenderScheduler(self, self.apply_values)
+
 
         self.yieldstress_var = DoubleVar()
         self.yieldstress_var.set(0)
@@ -201,35 +206,23 @@ class DuctileMaterial_FailureTheory_03(Frame):
         # the plot
         self.failure_theory_plts = DuctileFailureTheoriesPlot()
 
+        # inputs and results; results are only recomputed when their inputs change
+        self.graph = self.__create_graph()
+
         # init ui
         self.initUI()
 
         # update ui
-        self.update_values(0.0)
+        self.apply_values(0.0)
 
     # ----------- Update the outputs ----------
 
     def update_plot(self):
         """
-        Update the plot area
+        Update the plot area. Redraws only if Sy, the stresses or the visible theories changed.
         :return:
         """
-
-        Sy = self.yieldstress_var.get()
-        F = self.Load_var.get()
-        T = self.Torsion_var.get()
-        a = self.Angle_var.get()
-        d = self.diameter_var.get()
-        l = self.length_var.get()
-
-        # Calculate streses
-        Ixx, Iyy = self.example.calcI(d)
-        s1, s2, sx, sy = self.example.calcPrincipalStress(F, T, l, a)
-
-
-        # Update the plot
-        self.failure_theory_plts.update_plot(Sy, s1, s2)
-        self.canvas.draw_idle()
+        self.graph.get("plot")
 
     def update_output_display(self):
         """
@@ -237,19 +230,7 @@ class DuctileMaterial_FailureTheory_03(Frame):
         panel shows.
         :return:
         """
-
-        Sy = self.yieldstress_var.get()
-        F = self.Load_var.get()
-        T = self.Torsion_var.get()
-        a = self.Angle_var.get()
-        d = self.diameter_var.get()
-        l = self.length_var.get()
-
-        # Calculate streses
-        Ixx, Iyy = self.example.calcI(d)
-        s1, s2, sx, sy = self.example.calcPrincipalStress(F, T, l, a)
-
-        vonMisesEq, FoS_vonMisesEq = CalcVonMiesesFoS(s1, s2, Sy)
+        vonMisesEq, FoS_vonMisesEq = self.graph.get("vonmises")
 
         # Update the plot
         self.vonMises_str.set(str(round(vonMisesEq,2)))
@@ -259,7 +240,7 @@ class DuctileMaterial_FailureTheory_03(Frame):
             self.vonMisesFoS_str.set("Inf")
 
 
-        TrescaEqStress, FoS_TrescaEqStress = CalcTrescaFoS(s1,s2, Sy)
+        TrescaEqStress, FoS_TrescaEqStress = self.graph.get("tresca")
 
         # Update the plot
         self.Tresca_str.set(str(round(TrescaEqStress, 2)))
@@ -268,16 +249,57 @@ class DuctileMaterial_FailureTheory_03(Frame):
         else:
             self.Tresca_FoS_str.set("Inf")
 
+    def __create_graph(self):
+        """
+        Create the computation graph of this app.
+        Inputs: Sy, F, T, angle, d, l and the visible theories.
+        Nodes: section (second moments), stresses (principal and component stresses), vonmises, tresca
+        and plot, which updates the failure theory plot.
+        :return: ComputeGraph
+        """
+        graph = ComputeGraph()
+        for name in ("Sy", "F", "T", "angle", "d", "l"):
+            graph.input(name, 0.0)
+        graph.input("show_mises", 1)
+        graph.input("show_tresca", 1)
+
+        graph.node("section", lambda d: self.example.calcI(d), ["d"])
+        graph.node("stresses", lambda section, F, T, l, a: self.example.calcPrincipalStress(F, T, l, a),
+                   ["section", "F", "T", "l", "angle"])
+        graph.node("vonmises", lambda stresses, Sy: CalcVonMiesesFoS(stresses[0], stresses[1], Sy),
+                   ["stresses", "Sy"])
+        graph.node("tresca", lambda stresses, Sy: CalcTrescaFoS(stresses[0], stresses[1], Sy),
+                   ["stresses", "Sy"])
+        graph.node("plot", self.__draw_plot, ["Sy", "stresses", "show_mises", "show_tresca"])
+
+        return graph
+
+    def __draw_plot(self, Sy, stresses, show_mises, show_tresca):
+        self.failure_theory_plts.showVonMisesPlt(show_mises)
+        self.failure_theory_plts.showTrescaPlt(show_tresca)
+        self.failure_theory_plts.update_plot(Sy, stresses[0], stresses[1])
+        self.failure_theory_plts.draw(self.canvas)
+        return [Sy, stresses[0], stresses[1], show_mises, show_tresca]
+
 
     # ---------Widget callbacks ---------------
 
     def update_values(self, val):
         """
-        Update function for all widgets. The function updates the
-        input values. Note that all slider widgets call this functions
+        Update function for all widgets. Note that all slider widgets call this functions.
+        The update is scheduled; all changes within one frame are applied together by apply_values().
         :param val: The value the widget passes
         :return: -
         """
+        self.render_scheduler.request()
+
+    def apply_values(self, val=0):
+        """
+        Updates the input values, the results and the plot.
+        Called by the render scheduler at most once per frame.
+        :param val: not used
+        :return: -
+        """
         self.yieldstress_var.set(round(self.yieldstress_slider.get() ,2))
         self.yieldstress_str.set(str(self.yieldstress_var.get()))
 
@@ -296,6 +318,13 @@ class DuctileMaterial_FailureTheory_03(Frame):
         self.length_var.set(round(self.length_slider.get(), 2))
         self.length_str.set(str(self.length_var.get()))
 
+        self.graph.set("Sy", self.yieldstress_var.get())
+        self.graph.set("F", self.Load_var.get())
+        self.graph.set("T", self.Torsion_var.get())
+        self.graph.set("angle", self.Angle_var.get())
+        self.graph.set("d", self.diameter_var.get())
+        self.graph.set("l", self.length_var.get())
+
         self.update_plot()
         self.update_output_display()
 
@@ -305,8 +334,8 @@ class DuctileMaterial_FailureTheory_03(Frame):
         Checkboxes do not pass any arguments to the function
         :return:
         """
-        self.failure_theory_plts.showVonMisesPlt(int(self.cb_mises.get()))
-        self.failure_theory_plts.showTrescaPlt(int(self.cb_tresca.get()))
+        self.graph.set("show_mises", int(self.cb_mises.get()))
+        self.graph.set("show_tresca", int(self.cb_tresca.get()))
         self.update_values(0)
 
     def key_callback(self, event):
@@ -319,6 +348,9 @@ class DuctileMaterial_FailureTheory_03(Frame):
             self.create_subwindow()
         elif event.char == 'd':
             self.example.createDetailsWindow(self.master)
+            # the details and the load plot are filled by the stresses node; recompute it for the new window
+            self.graph.invalidate("stresses")
+            self.render_scheduler.request()
 
     def manual_entry_callback(self):
         """
@@ -363,6 +395,7 @@ class DuctileMaterial_FailureTheory_03(Frame):
         """
         fig = self.failure_theory_plts.create_plots(9) # 9 -> figure size
         self.canvas = FigureCanvasTkAgg(fig, master=self)
+        self.failure_theory_plts.enable_blit(self.canvas)
         self.canvas.draw()
 
 
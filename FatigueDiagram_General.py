@@ -65,6 +65,8 @@ from ME325Common.UnitConversion import *
 from ME325Common.METypes import *
 from ME325Common.DynamicLoadTheories import *
 from ME325Common.InputHelpers import  *
+from ME325Common.RenderScheduler import RenderScheduler
+from ME325Common.LatencyProfiler import LatencyProfiler, ParseProfilerArguments
 
 class FatigueDiagram_General(Frame):
     """
@@ -119,9 +121,16 @@ class FatigueDiagram_General(Frame):
     entry_items = ["Sut", "Sy", "Se", "Sa", "Sm"]
 
 
-    def __init__(self):
+    def __init__(self, profiler=None):
+        """
+        :param profiler: LatencyProfiler to measure the updates, None for no profiling
+        """
         super().__init__()
 
+        # slider changes are merged into one update per frame
+        self.render_scheduler = RenderScheduler(self, self.apply_values)
+        self.profiler = profiler if profiler is not None else LatencyProfiler(enabled=False)
+
         self.__mat = DMaterialData(110, 95, 35)
 
         # the plot
@@ -132,9 +141,10 @@ class FatigueDiagram_General(Frame):
 
         # menu
         self.menu = DataEntryMenu(self.master, self.manual_entry_callback)
+        self.profiler.show_overlay(self)
 
         # update ui
-        self.update_values(0.0)
+        self.apply_values(0.0)
 
 
 
@@ -155,7 +165,9 @@ class FatigueDiagram_General(Frame):
 
         # Update the plot
         self.__the_plot.update_plot(Sa, Sm, self.__mat)
-        self.__canvas.draw_idle()
+        self.profiler.mark("artists")
+        self.__the_plot.draw(self.__canvas)
+        self.profiler.mark("draw")
 
 
         #self.menu.update_plot(s1, s2, a1)
@@ -181,15 +193,27 @@ class FatigueDiagram_General(Frame):
 
     def update_values(self, val):
         """
-        Update function for all widgets. The function updates the
-        input values. Note that all slider widgets call this functions
+        Update function for all widgets. Note that all slider widgets call this functions.
+        The update is scheduled; all changes within one frame are applied together by apply_values().
         :param val: The value the widget passes
         :return: -
         """
+        self.profiler.event()
+        self.render_scheduler.request()
+
+    def apply_values(self, val=0):
+        """
+        Updates the input values, the results and the plot.
+        Called by the render scheduler at most once per frame.
+        :param val: not used
+        :return: -
+        """
         # stops recursion when updating the slider at a different location
         if self.__rec == False:
             return
 
+        self.profiler.begin_frame()
+
         self.__update_slider("Sut", 2)
         self.__update_slider("Sy", 2)
         self.__update_slider("Se", 2)
@@ -213,12 +237,14 @@ class FatigueDiagram_General(Frame):
         self.__results["n_Goodman"] = FatigueDiagram.calc_mod_Goodman_FoS(Sa, Sm, Se, Sut )
         self.__results["n_Sonderberg"] = FatigueDiagram.calc_Sonderberg_FoS(Sa, Sm, Se, Sy)
         self.__results["n_Gerber"] = FatigueDiagram.calc_Gerber_FoS(Sa, Sm, Se, Sut)
-
+        self.profiler.mark("compute")
 
 
 
         self.update_plot()
         self.update_output_display()
+        self.profiler.mark("artists")
+        self.profiler.end_frame()
 
     def cb_update(self):
         """
@@ -412,6 +438,7 @@ class FatigueDiagram_General(Frame):
         """
         fig = self.__the_plot.create_plot(8) # 9 -> figure size
         self.__canvas = FigureCanvasTkAgg(fig, master=self)
+        self.__the_plot.enable_blit(self.__canvas)
         self.__canvas.draw()
 
 
@@ -552,9 +579,12 @@ class FatigueDiagram_General(Frame):
 
 
 def main():
+    args = ParseProfilerArguments("Fatigue diagram with the Goodman, Soderberg and Gerber lines")
+    profiler = LatencyProfiler(enabled=args.profile)
+
     root = Tk()
     root.geometry("900x720+300+300")
-    app = FatigueDiagram_General()
+    app = FatigueDiagram_General(profiler)
 
     # To jump the window to the front
     root.attributes("-topmost", True)
@@ -563,6 +593,11 @@ def main():
     # run
     root.mainloop()
 
+    if args.profile:
+        print(profiler.summary())
+    if args.profile_output is not None:
+        profiler.dump(args.profile_output)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Background jobs for the Tk apps.
+
+Heavy analyses (sweeps, Monte Carlo, contour maps) must not run in a Tk callback, or the
+UI freezes until they finish. BackgroundExecutor runs them on a worker thread or process.
+The workers never touch Tk: results and progress reports go into queues, and the Tk main
+loop polls these queues with after() and calls the result and progress callbacks there.
+
+Jobs are submitted under a key, e.g. "sweep". A new job for a key makes the older jobs
+of that key stale: they are asked to cancel, and their results are dropped, so the
+UI only shows the result of the newest input.
+
+A job function takes the JobContext as its first argument. Long jobs call job.progress()
+to report and job.check() (or test job.cancelled) to stop early after a cancel:
+
+    def run_sweep(job, grids):
+        sweep = DesignSweep("round", **grids)
+        results = []
+        for i, chunk in enumerate(sweep.chunks(["d", "vonmises_FoS"])):
+            job.check()
+            results.append(chunk)
+            job.progress((i + 1) * sweep.chunk_size / sweep.size)
+        return results
+
+    executor = BackgroundExecutor(root)
+    executor.submit(run_sweep, grids, key="sweep", on_result=self.show_sweep, on_progress=self.show_progress)
+
+With executor="process", the job function and its arguments have to be picklable
+(module level functions), and the results are pickled back.
+"""
+import concurrent.futures
+import itertools
+import multiprocessing
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    """
+    Raised by JobContext.check() in a job that was cancelled.
+    """
+    pass
+
+
+class JobContext():
+    """
+    Passed to the job function: cancellation flag and progress reports.
+    """
+
+    def __init__(self, job_id, cancel_event, progress_queue):
+        self.job_id = job_id
+        self.__cancel_event = cancel_event
+        self.__progress_queue = progress_queue
+
+    @property
+    def cancelled(self):
+        return self.__cancel_event.is_set()
+
+    def check(self):
+        """
+        Raise JobCancelled if the job was cancelled.
+        """
+        if self.__cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, fraction, message=None):
+        """
+        Report the progress; the on_progress callback receives it in the Tk main loop.
+        :param fraction: progress from 0 to 1
+        :param message: optional text
+        """
+        self.__progress_queue.put((self.job_id, fraction, message))
+
+
+class Job():
+    """
+    Handle of a submitted job.
+    """
+
+    def __init__(self, job_id, key, generation, cancel_event, future, on_result, on_error, on_progress):
+        self.job_id = job_id
+        self.key = key
+        self.generation = generation
+        self.future = future
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.__cancel_event = cancel_event
+
+    def cancel(self):
+        """
+        Ask the job to stop; its result will be dropped. A job that did not start yet does not run.
+        """
+        self.__cancel_event.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self.__cancel_event.is_set()
+
+    @property
+    def done(self):
+        return self.future.done()
+
+
+class BackgroundExecutor():
+    """
+    Runs jobs on worker threads or processes and passes their results to the Tk main loop.
+    """
+
+    def __init__(self, widget, executor="thread", workers=1, poll_interval=20):
+        """
+        :param widget: any Tk widget, for after()
+        :param executor: "thread" or "process". Threads only run in parallel with the UI where the
+                    job releases the GIL (most NumPy functions, the numba kernels); processes always do.
+        :param workers: number of worker threads or processes
+        :param poll_interval: time between two polls of the result queue in ms, while jobs are running
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError("Unknown executor " + str(executor))
+
+        self.widget = widget
+        self.executor = executor
+        self.workers = workers
+        self.poll_interval = poll_interval
+
+        self.submitted = 0      # number of submitted jobs
+        self.delivered = 0      # number of results passed to on_result or on_error
+        self.dropped = 0        # number of stale or cancelled results
+
+        self.__pool = None
+        self.__manager = None
+        self.__results = queue.Queue()
+        self.__progress = None
+        self.__jobs = {}            # job id -> Job, until the result is handled
+        self.__generations = {}     # key -> generation of the newest job
+        self.__ids = itertools.count()
+        self.__polling = None
+
+    def submit(self, func, *args, key="default", on_result=None, on_error=None, on_progress=None, **kwargs):
+        """
+        Run func(job_context, *args, **kwargs) in the background.
+        Older jobs with the same key are cancelled, and their results are dropped.
+        :param func: the job function
+        :param key: jobs with the same key replace each other
+        :param on_result: function on_result(result), called in the Tk main loop
+        :param on_error: function on_error(exception), called in the Tk main loop; None prints the error
+        :param on_progress: function on_progress(fraction, message), called in the Tk main loop
+        :return: Job
+        """
+        self.cancel(key)
+        self.__start()
+
+        job_id = next(self.__ids)
+        generation = self.__generations.get(key, 0) + 1
+        self.__generations[key] = generation
+
+        if self.executor == "thread":
+            cancel_event = threading.Event()
+        else:
+            cancel_event = self.__manager.Event()
+        context = JobContext(job_id, cancel_event, self.__progress)
+
+        future = self.__pool.submit(func, context, *args, **kwargs)
+        job = Job(job_id, key, generation, cancel_event, future, on_result, on_error, on_progress)
+        self.__jobs[job_id] = job
+        self.submitted += 1
+
+        future.add_done_callback(lambda f, job_id=job_id: self.__results.put((job_id, f)))
+        self.__schedule_poll()
+        return job
+
+    def cancel(self, key=None):
+        """
+        Cancel the running jobs.
+        :param key: cancel the jobs with this key, None for all jobs
+        """
+        for job in list(self.__jobs.values()):
+            if key is None or job.key == key:
+                job.cancel()
+
+    @property
+    def busy(self):
+        """
+        :return: True while jobs are running or their results are not handled yet
+        """
+        return len(self.__jobs) > 0
+
+    def shutdown(self):
+        """
+        Cancel all jobs and stop the workers, e.g. before the app closes.
+        """
+        self.cancel()
+        if self.__polling is not None:
+            self.widget.after_cancel(self.__polling)
+            self.__polling = None
+        if self.__pool is not None:
+            self.__pool.shutdown(wait=False, cancel_futures=True)
+            self.__pool = None
+        if self.__manager is not None:
+            self.__manager.shutdown()
+            self.__manager = None
+        self.__jobs = {}
+
+    def poll(self):
+        """
+        Handle the progress reports and finished jobs. Runs with after() while jobs are running;
+        call it directly to handle them right away.
+        """
+        self.__polling = None
+
+        while self.__progress is not None:
+            try:
+                job_id, fraction, message = self.__progress.get_nowait()
+            except queue.Empty:
+                break
+            job = self.__jobs.get(job_id)
+            if job is not None and self.__current(job) and job.on_progress is not None:
+                job.on_progress(fraction, message)
+
+        while True:
+            try:
+                job_id, future = self.__results.get_nowait()
+            except queue.Empty:
+                break
+            job = self.__jobs.pop(job_id, None)
+            if job is None:
+                continue
+            self.__deliver(job, future)
+
+        self.__schedule_poll()
+
+    def __deliver(self, job, future):
+        if not self.__current(job) or future.cancelled():
+            self.dropped += 1
+            return
+
+        error = future.exception()
+        if isinstance(error, JobCancelled):
+            self.dropped += 1
+            return
+
+        self.delivered += 1
+        if error is not None:
+            if job.on_error is not None:
+                job.on_error(error)
+            else:
+                print("Background job failed: " + repr(error))
+        elif job.on_result is not None:
+            job.on_result(future.result())
+
+    def __current(self, job):
+        """
+        :return: True if the job is the newest of its key and not cancelled
+        """
+        return not job.cancelled and self.__generations.get(job.key) == job.generation
+
+    def __start(self):
+        if self.__pool is not None:
+            return
+
+        if self.executor == "thread":
+            self.__pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+            self.__progress = queue.Queue()
+        else:
+            self.__manager = multiprocessing.Manager()
+            self.__pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            self.__progress = self.__manager.Queue()
+
+    def __schedule_poll(self):
+        if self.__polling is None and len(self.__jobs) > 0:
+            self.__polling = self.widget.after(self.poll_interval, self.poll)
@@ -0,0 +1,173 @@
+"""
+Compute core of the beam examples (ExampleBeam, ExampleBeamRound), without Tk or matplotlib.
+
+A cantilever beam of length l carries the load F at its free end, at the angle alpha
+from the x axis, and the torque T. At the clamped end the core calculates the bending
+stresses of both axes, the torsional shear stress and the principal stresses of the
+critical point.
+
+The cores work on scalars as the GUI uses them, and on arrays to evaluate many designs
+or load cases at once (batch and server use). Results are returned as BeamStressResult
+and passed to all subscribers, e.g. the GUI classes that update their detail windows and plots:
+
+    core = RoundBeamCore()
+    core.subscribe(lambda result: print(result.s1))
+    core.calcI(20.0)
+    s1, s3, s_xx, s_yy = core.calcPrincipalStress(1000.0, 5.0, 500.0, 30.0)
+
+Units as in the examples: forces in N, lengths in mm, torques in Nm, stresses in N/mm^2.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from ME325Common.ContinuumMechanics import calcPrincipalStress, calcPrincipalStressBatch
+from ME325Common.CrossSection import Rectangle, Circle, RectangleVertices, PolygonPropertiesBatch
+
+
+class BeamStressResult(NamedTuple):
+    """
+    Result of BeamCore.calcStresses(). Scalars, or arrays of the broadcast input shape.
+    """
+    s1: object          # larger principal stress
+    s3: object          # smaller principal stress
+    s_xx: object        # bending stress of the moment about the x axis (load component Fy)
+    s_yy: object        # bending stress of the moment about the y axis (load component Fx)
+    sigma_max: object   # s_xx + s_yy, the bending stress at the critical corner
+    t_xy: object        # torsional shear stress
+    I_xx: object        # second moment of area about x
+    I_yy: object        # second moment of area about y
+    J: object           # polar moment of area
+    F: object           # load
+    T: object           # torque
+    length: object      # beam length
+    alpha: object       # load angle in degree
+
+
+class BeamCore():
+    """
+    Base class of the beam compute cores. Subclasses set the section properties in calcI().
+    """
+
+    def __init__(self):
+        self.I_xx = 0.0
+        self.I_yy = 0.0
+        self.J = 0.0
+        # distances of the critical point from the y and the x axis, and from the center
+        self.c_x = 0.0
+        self.c_y = 0.0
+        self.radius = 0.0
+        self.result = None
+        self.__subscribers = []
+
+    def subscribe(self, callback):
+        """
+        :param callback: function callback(result) called with the BeamStressResult of each calcPrincipalStress()
+        """
+        self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.__subscribers.remove(callback)
+
+    def calcStresses(self, F, T, l, angle):
+        """
+        Calculate the stresses for the current section, without notifying the subscribers.
+        :param F: load (N)
+        :param T: torque (Nm)
+        :param l: beam length (mm)
+        :param angle: load angle (deg)
+        :return: BeamStressResult
+        """
+        Fx = F * np.cos(np.deg2rad(angle))
+        Fy = F * np.sin(np.deg2rad(angle))
+
+        # the two stress components in z-direction
+        s_yy = (Fx * l * self.c_x) / self.I_yy
+        s_xx = (Fy * l * self.c_y) / self.I_xx
+        sigma_max = s_xx + s_yy
+
+        # shear stress
+        t_xy = (T * 1000 * self.radius) / self.J  # T * 1000-> Nm to Nmm
+
+        # principal stresses
+        if np.ndim(sigma_max) == 0 and np.ndim(t_xy) == 0:
+            s1, s3 = calcPrincipalStress(sigma_max, 0.0, t_xy)
+        else:
+            s1, s3 = calcPrincipalStressBatch(sigma_max, 0.0, t_xy)
+
+        return BeamStressResult(s1, s3, s_xx, s_yy, sigma_max, t_xy, self.I_xx, self.I_yy, self.J,
+                                F, T, l, angle)
+
+    def calcPrincipalStress(self, F, T, l, angle):
+        """
+        Calculate the stresses and pass the result to all subscribers.
+        :return: [s1, s3, s_xx, s_yy]
+        """
+        self.result = self.calcStresses(F, T, l, angle)
+        for callback in self.__subscribers:
+            callback(self.result)
+
+        return [self.result.s1, self.result.s3, self.result.s_xx, self.result.s_yy]
+
+
+class RectangularBeamCore(BeamCore):
+    """
+    Beam with a rectangular section b x h, the critical point is the corner (b/2, h/2).
+    """
+
+    def __init__(self):
+        BeamCore.__init__(self)
+        self.width = 0.1
+        self.height = 0.1
+
+    def calcI(self, b, h):
+        """
+        :param b: width (mm), scalar or array
+        :param h: height (mm), scalar or array
+        :return: [I_xx, I_yy]
+        """
+        self.width = b
+        self.height = h
+
+        if np.ndim(b) == 0 and np.ndim(h) == 0:
+            section = Rectangle.cached(b, h)
+            self.I_xx, self.I_yy, self.J = section.Ixx, section.Iyy, section.J
+        else:
+            properties = PolygonPropertiesBatch(*RectangleVertices(b, h))
+            self.I_xx, self.I_yy, self.J = properties["Ixx"], properties["Iyy"], properties["J"]
+
+        self.c_x = b / 2
+        self.c_y = h / 2
+        self.radius = np.sqrt((b / 2) ** 2 + (h / 2) ** 2)
+
+        return [self.I_xx, self.I_yy]
+
+
+class RoundBeamCore(BeamCore):
+    """
+    Beam with a solid round section of diameter d.
+    """
+
+    def __init__(self):
+        BeamCore.__init__(self)
+        self.diameter = 1.0
+
+    def calcI(self, d):
+        """
+        :param d: diameter (mm), scalar or array
+        :return: [I_xx, I_yy]
+        """
+        self.diameter = d
+
+        if np.ndim(d) == 0:
+            section = Circle.cached(d / 2)
+            self.I_xx, self.I_yy, self.J = section.Ixx, section.Iyy, section.J
+        else:
+            I = np.pi * (np.asarray(d, dtype=np.float64) / 2) ** 4 / 4
+            self.I_xx, self.I_yy, self.J = I, I, 2 * I
+
+        self.c_x = d / 2
+        self.c_y = d / 2
+        self.radius = d / 2
+
+        return [self.I_xx, self.I_yy]
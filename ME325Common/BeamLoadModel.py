@@ -0,0 +1,310 @@
+"""
+Statically determinate beams and shafts: reactions, shear force, bending moment and torque.
+
+Loads act in two bending planes, xy (forces in y) and xz (forces in z), plus torques about x.
+Supported loads are point forces, linearly varying distributed loads, concentrated moments
+and torques. The beam is either simply supported (pin at x_A, roller at x_B) or a cantilever
+fixed at x_A.
+
+Sign convention, with all quantities evaluated from the left end:
+- forces and distributed loads are positive in +y / +z
+- V(x) = sum of the forces left of x
+- M(x) = sum of F_i * (x - x_i) of the forces left of x, plus the concentrated moments left of x
+- T(x) = sum of the torques left of x
+A downward force F on a simply supported beam thus gives the usual positive (sagging) moment.
+
+compile() turns the loads into piecewise cubic polynomials between the load positions:
+V is at most quadratic and M at most cubic on each segment, so four samples per segment
+determine them exactly. evaluate() finds the segment of each station with np.searchsorted
+and evaluates the polynomials with Horner's scheme. At a load position the value right of
+the load is returned.
+
+All load magnitudes may be arrays of the same length, one element per load case. All load
+cases share the load positions and are solved and evaluated together; the results then
+have the shape (cases, stations).
+
+Example:
+    beam = BeamLoadModel(16.5, "simple", 0.0, 16.5)
+    beam.add_point_load(4.0, F_y=-300)
+    beam.add_point_load(12.0, F_z=[-200, -250, -400])     # three load cases
+    beam.add_torque(4.0, 1200)
+    beam.add_torque(12.0, -1200)
+    results = beam.evaluate(np.linspace(0, 16.5, 100000))
+    M = results["M"]        # resultant bending moment, shape (3, 100000)
+"""
+import numpy as np
+
+
+# sample positions within a segment, relative to its length; they avoid the load positions at the ends
+g_segment_samples = np.array([0.1, 0.4, 0.6, 0.9])
+
+
+class BeamLoadModel():
+    """
+    Loads, supports and the compiled shear, moment and torque diagrams of one beam.
+    """
+
+    length = 1.0
+    support = "simple"
+
+    def __init__(self, length, support="simple", x_A=0.0, x_B=None):
+        """
+        :param length: beam length
+        :param support: "simple" (pin at x_A, roller at x_B) or "cantilever" (fixed at x_A)
+        :param x_A: position of the first support
+        :param x_B: position of the second support (simple supports), None for the beam end
+        """
+        if support not in ("simple", "cantilever"):
+            raise ValueError("Unknown support " + str(support))
+
+        self.length = length
+        self.support = support
+        self.x_A = x_A
+        self.x_B = length if x_B is None else x_B
+
+        if support == "simple" and self.x_B == self.x_A:
+            raise ValueError("The supports need different positions")
+
+        self.__point_loads = []         # (x, F_y, F_z)
+        self.__distributed_loads = []   # (x1, x2, w_y1, w_y2, w_z1, w_z2)
+        self.__moments = []             # (x, M_xy, M_xz)
+        self.__torques = []             # (x, T)
+        self.__compiled = None
+        self.__reactions = None
+
+    def add_point_load(self, x, F_y=0.0, F_z=0.0):
+        """
+        :param x: position
+        :param F_y: force in y (bending in the xy plane), scalar or array with one value per load case
+        :param F_z: force in z (bending in the xz plane)
+        """
+        self.__check_position(x)
+        self.__point_loads.append((x, F_y, F_z))
+        self.__changed()
+
+    def add_distributed_load(self, x1, x2, w_y1=0.0, w_y2=None, w_z1=0.0, w_z2=None):
+        """
+        Distributed load that varies linearly from x1 to x2.
+        :param x1: start
+        :param x2: end
+        :param w_y1: load per length in y at x1
+        :param w_y2: load per length in y at x2, None for a uniform load
+        :param w_z1: load per length in z at x1
+        :param w_z2: load per length in z at x2, None for a uniform load
+        """
+        self.__check_position(x1)
+        self.__check_position(x2)
+        if x2 <= x1:
+            raise ValueError("A distributed load needs x2 > x1")
+
+        self.__distributed_loads.append((x1, x2, w_y1, w_y1 if w_y2 is None else w_y2,
+                                         w_z1, w_z1 if w_z2 is None else w_z2))
+        self.__changed()
+
+    def add_moment(self, x, M_xy=0.0, M_xz=0.0):
+        """
+        Concentrated bending moment, positive in the sense of the moment diagram.
+        :param x: position
+        :param M_xy: moment in the xy plane
+        :param M_xz: moment in the xz plane
+        """
+        self.__check_position(x)
+        self.__moments.append((x, M_xy, M_xz))
+        self.__changed()
+
+    def add_torque(self, x, T):
+        """
+        :param x: position
+        :param T: torque about the x axis
+        """
+        self.__check_position(x)
+        self.__torques.append((x, T))
+        self.__changed()
+
+    def solve(self):
+        """
+        Calculate the support reactions.
+        Simple supports do not take torques, so the applied torques have to balance.
+        :return: dict with the forces "A_y", "A_z" (and "B_y", "B_z" for simple supports),
+                 for a cantilever also the moments "MA_xy", "MA_xz" and the torque "TA"
+        """
+        if self.__reactions is not None:
+            return self.__reactions
+
+        reactions = dict()
+        for plane, force, moment in (("xy", "y", 1), ("xz", "z", 2)):
+            # sum of the forces, and sum of F_i * x_i minus the concentrated moments
+            F = 0.0
+            Fx = 0.0
+            for p in self.__point_loads:
+                F = F + self.__value(p[moment])
+                Fx = Fx + self.__value(p[moment]) * p[0]
+            for d in self.__distributed_loads:
+                W, Wx = BeamLoadModel.__distributed_resultant(d[0], d[1], self.__value(d[2 * moment]),
+                                                              self.__value(d[2 * moment + 1]))
+                F = F + W
+                Fx = Fx + Wx
+            C = 0.0
+            for c in self.__moments:
+                C = C + self.__value(c[moment])
+
+            # equilibrium: sum F = 0 and sum F_i x_i = sum C  (M = 0 right of the beam)
+            if self.support == "simple":
+                B = (C - (Fx - F * self.x_A)) / (self.x_B - self.x_A)
+                A = -F - B
+                reactions["A_" + force] = A
+                reactions["B_" + force] = B
+            else:
+                A = -F
+                reactions["A_" + force] = A
+                reactions["MA_" + plane] = Fx + A * self.x_A - C
+
+        T = 0.0
+        for t in self.__torques:
+            T = T + self.__value(t[1])
+        if self.support == "cantilever":
+            reactions["TA"] = -T
+        elif np.any(np.abs(T) > 1e-9 * (1.0 + max([np.max(np.abs(self.__value(t[1]))) for t in self.__torques] + [0.0]))):
+            raise ValueError("Simple supports do not take torques; the applied torques have to balance")
+
+        self.__reactions = reactions
+        return reactions
+
+    def compile(self):
+        """
+        Compile the loads into piecewise polynomials.
+        :return: segment starts (segments,), segment lengths (segments,) and a dict with the
+                 coefficients of V_xy, M_xy, V_xz, M_xz and T, each of shape (cases, segments, 4),
+                 in t = (x - start) / length, lowest order first
+        """
+        if self.__compiled is not None:
+            return self.__compiled
+
+        breaks = np.unique(np.array([0.0, self.length] + self.__positions(), dtype=np.float64))
+        starts = breaks[:-1]
+        lengths = np.diff(breaks)
+
+        t = g_segment_samples
+        X = starts[:, None] + lengths[:, None] * t[None, :]
+        values = self.__direct(X)
+
+        # exact fit of the cubics through the four samples of each segment
+        inverse = np.linalg.inv(np.vander(t, 4, increasing=True))
+        coefficients = {key: np.einsum("ij,csj->csi", inverse, v) for key, v in values.items()}
+
+        self.__compiled = (starts, lengths, coefficients)
+        return self.__compiled
+
+    def evaluate(self, x):
+        """
+        Shear forces, bending moments and torque at the stations x.
+        :param x: array with the stations, 0 <= x <= length
+        :return: dict with V_xy, M_xy, V_xz, M_xz, T and the resultant bending moment M,
+                 arrays of shape (stations,) or (cases, stations) for several load cases
+        """
+        starts, lengths, coefficients = self.compile()
+        x = np.asarray(x, dtype=np.float64)
+
+        segment = np.clip(np.searchsorted(starts, x, side='right') - 1, 0, starts.shape[0] - 1)
+        t = (x - starts[segment]) / lengths[segment]
+
+        results = dict()
+        for key, c in coefficients.items():
+            c = c[:, segment]
+            results[key] = ((c[..., 3] * t + c[..., 2]) * t + c[..., 1]) * t + c[..., 0]
+
+        results["M"] = np.hypot(results["M_xy"], results["M_xz"])
+
+        if self.__cases() == 1:
+            results = {key: value[0] for key, value in results.items()}
+        return results
+
+    def __direct(self, X):
+        """
+        V, M and T at the positions X from the singularity functions of all loads and reactions.
+        X must not hit a load position.
+        :return: dict of arrays (cases, *X.shape)
+        """
+        reactions = self.solve()
+        shape = (self.__cases(),) + X.shape
+
+        point_loads = list(self.__point_loads) + [(self.x_A, reactions["A_y"], reactions["A_z"])]
+        moments = list(self.__moments)
+        torques = list(self.__torques)
+        if self.support == "simple":
+            point_loads.append((self.x_B, reactions["B_y"], reactions["B_z"]))
+        else:
+            moments.append((self.x_A, reactions["MA_xy"], reactions["MA_xz"]))
+            torques.append((self.x_A, reactions["TA"]))
+
+        values = {key: np.zeros(shape) for key in ("V_xy", "M_xy", "V_xz", "M_xz", "T")}
+
+        for plane, i in (("xy", 1), ("xz", 2)):
+            V = values["V_" + plane]
+            M = values["M_" + plane]
+
+            for p in point_loads:
+                F = self.__column(p[i], X.ndim)
+                left = X > p[0]
+                V += F * left
+                M += F * (X - p[0]) * left
+
+            for c in moments:
+                M += self.__column(c[i], X.ndim) * (X > c[0])
+
+            for d in self.__distributed_loads:
+                w1 = self.__column(d[2 * i], X.ndim)
+                w2 = self.__column(d[2 * i + 1], X.ndim)
+                k = (w2 - w1) / (d[1] - d[0])
+                u = np.clip(X, d[0], d[1]) - d[0]
+                V += w1 * u + k * u * u / 2
+                M += (X - d[0]) * (w1 * u + k * u * u / 2) - (w1 * u * u / 2 + k * u * u * u / 3)
+
+        for t in torques:
+            values["T"] += self.__column(t[1], X.ndim) * (X > t[0])
+
+        return values
+
+    def __positions(self):
+        positions = [self.x_A] + ([self.x_B] if self.support == "simple" else [])
+        positions += [p[0] for p in self.__point_loads]
+        positions += [d[0] for d in self.__distributed_loads] + [d[1] for d in self.__distributed_loads]
+        positions += [c[0] for c in self.__moments]
+        positions += [t[0] for t in self.__torques]
+        return positions
+
+    def __cases(self):
+        sizes = [np.size(v) for p in self.__point_loads for v in p[1:]]
+        sizes += [np.size(v) for d in self.__distributed_loads for v in d[2:]]
+        sizes += [np.size(v) for c in self.__moments for v in c[1:]]
+        sizes += [np.size(t[1]) for t in self.__torques]
+        cases = max(sizes + [1])
+        for s in sizes:
+            if s != 1 and s != cases:
+                raise ValueError("All load cases need the same number of values")
+        return cases
+
+    def __value(self, v):
+        return np.broadcast_to(np.asarray(v, dtype=np.float64).ravel(), (self.__cases(),))
+
+    def __column(self, v, ndim):
+        return self.__value(v).reshape((-1,) + (1,) * ndim)
+
+    def __check_position(self, x):
+        if x < 0.0 or x > self.length:
+            raise ValueError("Position " + str(x) + " is not on the beam")
+
+    def __changed(self):
+        self.__compiled = None
+        self.__reactions = None
+
+    @staticmethod
+    def __distributed_resultant(x1, x2, w1, w2):
+        """
+        :return: resultant force and its first moment about x = 0 of a linear load from x1 to x2
+        """
+        L = x2 - x1
+        W = (w1 + w2) / 2 * L
+        # int w(x) x dx with w linear: L / 6 * (w1 (2 x1 + x2) + w2 (x1 + 2 x2))
+        Wx = L / 6 * (w1 * (2 * x1 + x2) + w2 * (x1 + 2 * x2))
+        return W, Wx
@@ -0,0 +1,460 @@
+"""
+Compute backends for the batch functions.
+
+The batch functions in FailureTheories, ContinuumMechanics and DynamicLoadTheories are
+written with NumPy. Each of them takes a backend argument and asks this registry for a
+kernel with the same results:
+
+- numpy   - the NumPy code of the function itself (always available)
+- numexpr - fused expressions, no temporary array per sub-expression
+- numba   - compiled loops (@njit), suits the branch-heavy Tresca and brittle cases
+            and the sequential rainflow counting
+
+The backend is selected per call (backend="numba") or globally with SetBackend("numba").
+A backend whose package is not installed falls back to NumPy. A backend without a kernel
+for a function falls back to NumPy as well.
+
+Example:
+    from ME325Common.ComputeBackends import SetBackend
+    SetBackend("numba")
+    vonMisesEq, FoS = CalcVonMiesesFoSBatch(s1, s3, Sy)
+
+Kernels return the same values as the NumPy code, element by element.
+"""
+import warnings
+
+import numpy as np
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class ComputeBackend():
+    """
+    A named set of kernels. Kernels are callables that take the same arguments as
+    the NumPy batch function they replace and return the same list of arrays.
+    """
+
+    name = "numpy"
+    available = True
+
+    def __init__(self, name, available=True):
+        self.name = name
+        self.available = available
+        self.__kernels = dict()
+
+    def register(self, kernel_name, kernel):
+        self.__kernels[kernel_name] = kernel
+
+    def get(self, kernel_name):
+        """
+        Return the kernel or None if this backend does not have one.
+        """
+        return self.__kernels.get(kernel_name, None)
+
+    def kernels(self):
+        return list(self.__kernels.keys())
+
+
+g_backends = dict()
+g_current_backend = "numpy"
+g_fallback_reported = set()
+
+
+def RegisterBackend(backend):
+    """
+    Add a backend to the registry. An existing backend with the same name is replaced.
+    :param backend: a ComputeBackend
+    :return:
+    """
+    g_backends[backend.name] = backend
+
+
+def AvailableBackends():
+    """
+    :return: the names of all backends that can run on this machine
+    """
+    return [name for name, backend in g_backends.items() if backend.available]
+
+
+def SetBackend(name):
+    """
+    Select the backend all batch functions use when no backend is passed.
+    :param name: "numpy", "numexpr", "numba", or the name of a registered backend
+    :return: the name of the backend that will be used; "numpy" if the requested one is not available
+    """
+    global g_current_backend
+    if name not in g_backends:
+        raise ValueError("Unknown compute backend " + str(name))
+    g_current_backend = name
+    return __resolve(name).name
+
+
+def GetBackend():
+    """
+    :return: the name of the globally selected backend
+    """
+    return g_current_backend
+
+
+def GetKernel(kernel_name, backend=None):
+    """
+    Look up a kernel.
+    :param kernel_name: the kernel, e.g. "von_mises_fos"
+    :param backend: backend name for this call, None for the global selection
+    :return: the kernel, or None if the NumPy code should run
+    """
+    if backend is None:
+        backend = g_current_backend
+    elif backend not in g_backends:
+        raise ValueError("Unknown compute backend " + str(backend))
+
+    return __resolve(backend).get(kernel_name)
+
+
+def __resolve(name):
+    backend = g_backends[name]
+    if not backend.available:
+        if name not in g_fallback_reported:
+            g_fallback_reported.add(name)
+            warnings.warn("Compute backend " + name + " is not installed - using numpy")
+        return g_backends["numpy"]
+    return backend
+
+
+def BroadcastFlat(*arrays):
+    """
+    Broadcast the arrays and flatten them for the compiled loops. Inputs that are already
+    of the broadcast shape are flattened without a copy where possible. Inputs with a single
+    element stay a single element and get a step of 0, so that scalars such as Sy are
+    not expanded into full arrays.
+    :return: the broadcast shape, the list of flat arrays, the list of steps (0 or 1)
+    """
+    arrays = [np.asarray(a, dtype=np.float64) for a in arrays]
+    shape = np.broadcast_shapes(*[a.shape for a in arrays])
+
+    flat = []
+    steps = []
+    for a in arrays:
+        if a.size == 1:
+            flat.append(a.reshape(1))
+            steps.append(0)
+        else:
+            flat.append(np.broadcast_to(a, shape).ravel())
+            steps.append(1)
+
+    return shape, flat, steps
+
+
+##---------------------------------------------------------
+## numexpr kernels
+##---------------------------------------------------------
+
+def __create_numexpr_backend():
+    backend = ComputeBackend("numexpr", numexpr is not None)
+    if numexpr is None:
+        return backend
+
+    def von_mises_fos(sigma_A, sigma_B, Sy, zero_stress):
+        a, b, S = np.broadcast_arrays(np.asarray(sigma_A, dtype=np.float64),
+                                      np.asarray(sigma_B, dtype=np.float64),
+                                      np.asarray(Sy, dtype=np.float64))
+        eq = numexpr.evaluate("sqrt(a * a - a * b + b * b)")
+        FoS = numexpr.evaluate("where(eq == 0.0, S / zero_stress, S / eq)")
+        eq = numexpr.evaluate("where(eq == 0.0, zero_stress, eq)")
+        return [eq, FoS]
+
+    def principal_stress_2d(s_xx, s_yy, t_xy):
+        sxx, syy, txy = np.broadcast_arrays(np.asarray(s_xx, dtype=np.float64),
+                                            np.asarray(s_yy, dtype=np.float64),
+                                            np.asarray(t_xy, dtype=np.float64))
+        h = numexpr.evaluate("sqrt(((sxx - syy) / 2.0)**2 + txy**2)")
+        a = numexpr.evaluate("(sxx + syy) / 2")
+        return [numexpr.evaluate("a + h"), numexpr.evaluate("a - h")]
+
+    def mod_goodman_fos(Sa, Sm, Se, Sut):
+        f = 0.00000001
+        return numexpr.evaluate("1 / (Sa / (Se + f) + Sm / (Sut + f) + f)")
+
+    def soderberg_fos(Sa, Sm, Se, Sy):
+        f = 0.00000001
+        return numexpr.evaluate("1 / (Sa / (Se + f) + Sm / (Sy + f) + f)")
+
+    def gerber_fos(Sa, Sm, Se, Sut):
+        f = 0.000000001
+        return numexpr.evaluate("- ((Sa / (Se + f)) / ((Sm / (Sut + f))**2 + f) / 2.0)"
+                                " + sqrt(((Sa / (Se + f)) / ((Sm / (Sut + f))**2 + f) / 2.0)**2"
+                                " - (-1.0 / ((Sm / (Sut + f))**2 + f)))")
+
+    def von_mises_3d(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm):
+        numexpr.evaluate("sqrt(((s_xx - s_yy)**2 + (s_yy - s_zz)**2 + (s_zz - s_xx)**2) * 0.5"
+                         " + (t_yz**2 + t_xz**2 + t_xy**2) * 3.0)", out=vm)
+
+    def equivalent_stresses_3d(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm, tau_oct, p):
+        von_mises_3d(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm)
+        c = np.sqrt(2.0) / 3.0
+        numexpr.evaluate("vm * c", out=tau_oct)
+        # numexpr turns the division into a multiplication with 1/3, which rounds differently
+        np.add(s_xx, s_yy, out=p)
+        np.add(p, s_zz, out=p)
+        np.divide(p, -3.0, out=p)
+
+    backend.register("von_mises_fos", von_mises_fos)
+    backend.register("von_mises_3d", von_mises_3d)
+    backend.register("equivalent_stresses_3d", equivalent_stresses_3d)
+    backend.register("principal_stress_2d", principal_stress_2d)
+    backend.register("mod_goodman_fos", mod_goodman_fos)
+    backend.register("soderberg_fos", soderberg_fos)
+    backend.register("gerber_fos", gerber_fos)
+    return backend
+
+
+##---------------------------------------------------------
+## Numba kernels
+##---------------------------------------------------------
+
+def __create_numba_backend():
+    backend = ComputeBackend("numba", numba is not None)
+    if numba is None:
+        return backend
+
+    # error_model='numpy' lets divisions by zero return inf/nan as in NumPy
+    njit = numba.njit(cache=False, error_model='numpy', nogil=True)
+
+    @njit
+    def von_mises_loop(a, da, b, db, S, dS, zero_stress, eq, FoS):
+        for i in range(eq.shape[0]):
+            sa = a[i * da]
+            sb = b[i * db]
+            s = np.sqrt(sa * sa - sa * sb + sb * sb)
+            if s == 0.0:
+                eq[i] = zero_stress
+                FoS[i] = S[i * dS] / zero_stress
+            else:
+                eq[i] = s
+                FoS[i] = S[i * dS] / s
+
+    @njit
+    def tresca_loop(a, da, b, db, S, dS, zero_stress, stress, FoS):
+        for i in range(stress.shape[0]):
+            s1 = a[i * da]
+            s2 = b[i * db]
+            if s2 > s1:
+                s1, s2 = s2, s1
+            Sy = S[i * dS]
+
+            t = (s1 - s2) / 2
+            if s2 >= 0:
+                FoS[i] = Sy / s1 if s1 != 0.0 else Sy / zero_stress
+            elif s1 >= 0:
+                FoS[i] = Sy / 2 / t
+            else:
+                FoS[i] = -Sy / s2
+            stress[i] = t if t != 0.0 else zero_stress
+
+    @njit
+    def brittle_loop(a, da, b, db, T, dT, C, dC, theory, stress, FoS, case):
+        for i in range(stress.shape[0]):
+            s1 = a[i * da]
+            s3 = b[i * db]
+            Sut = T[i * dT]
+            Suc = C[i * dC]
+
+            if theory != 0 and s1 < s3:
+                s1, s3 = s3, s1
+
+            if s1 < 0.000001 and s1 > -0.000001:
+                s1 = 0.0001
+            if s3 < 0.000001 and s3 > -0.000001:
+                s3 = 0.0001
+
+            c = 0
+            s = 0.0
+            n = 0.0
+            if theory == 0:  # MNST
+                if s1 >= 0 and s3 >= 0 and s1 >= s3:
+                    c = 1; n = Sut / s1; s = s1
+                elif s1 >= 0 and s3 >= 0 and s3 > s1:
+                    c = 2; n = Sut / s3; s = s3
+                elif s1 < 0 and s3 >= 0 and -Sut / Suc > s3 / s1:
+                    c = 3; n = Sut / s3; s = s3
+                elif s1 < 0 and s3 >= 0 and -Sut / Suc <= s3 / s1:
+                    c = 4; n = Suc / s1; s = s1
+                elif s1 < 0 and s3 < 0 and -Suc / -Suc >= s3 / s1:
+                    c = 5; n = Suc / s1; s = s1
+                elif s1 < 0 and s3 < 0 and -Suc / -Suc < s3 / s1:
+                    c = 6; n = Suc / s3; s = s3
+                elif s1 >= 0 and s3 < 0 and -Suc / Sut > s3 / s1:
+                    c = 7; n = Suc / s3; s = s3
+                elif s1 >= 0 and s3 < 0 and -Suc / Sut < s3 / s1:
+                    c = 8; n = Sut / s1; s = s1
+            elif theory == 1:  # MM
+                if s1 >= s3 and s3 >= 0:
+                    c = 1; n = Sut / s1; s = s1
+                elif s1 >= 0 and s3 < 0 and abs(s3 / s1) <= 1.0:
+                    c = 2; n = Sut / s1; s = s1
+                elif s1 >= 0 and s3 < 0 and abs(s3 / s1) > 1.0:
+                    c = 3; n = 1 / (((Suc - Sut) * s1) / (Suc * Sut) - s3 / Suc); s = np.sqrt(s1 * s1 + s3 * s3)
+                elif s1 <= 0 and s3 < s1:
+                    c = 4; n = -Suc / s3; s = s3
+            else:  # BCM
+                if s1 >= s3 and s3 >= 0:
+                    c = 1; n = Sut / s1; s = s1
+                elif s1 >= 0 and s3 <= 0:
+                    c = 2; n = 1 / (s1 / Sut - s3 / Suc); s = np.sqrt(s1 * s1 + s3 * s3)
+                elif s1 <= 0 and s3 <= 0:
+                    c = 3; n = -Suc / s3; s = s3
+
+            stress[i] = s
+            FoS[i] = abs(n)
+            case[i] = c
+
+    @njit
+    def principal_stress_loop(x, dx, y, dy, t, dt, s1, s3):
+        for i in range(s1.shape[0]):
+            sxx = x[i * dx]
+            syy = y[i * dy]
+            txy = t[i * dt]
+            d = (sxx - syy) / 2.0
+            h = np.sqrt(d * d + txy * txy)
+            a = (sxx + syy) / 2
+            s1[i] = a + h
+            s3[i] = a - h
+
+    @njit
+    def equivalent_stresses_loop(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm, tau_oct, p, all_outputs):
+        c = np.sqrt(2.0) / 3.0
+        for i in range(vm.shape[0]):
+            a = s_xx[i] - s_yy[i]
+            b = s_yy[i] - s_zz[i]
+            d = s_zz[i] - s_xx[i]
+            t = t_yz[i] * t_yz[i] + t_xz[i] * t_xz[i] + t_xy[i] * t_xy[i]
+            vm[i] = np.sqrt((a * a + b * b + d * d) * 0.5 + t * 3.0)
+            if all_outputs:
+                tau_oct[i] = vm[i] * c
+                p[i] = (s_xx[i] + s_yy[i] + s_zz[i]) / -3.0
+
+    @njit
+    def rainflow_loop(points, stack, size, ranges, means):
+        n = 0
+        for i in range(points.shape[0]):
+            stack[size] = points[i]
+            size += 1
+            while size >= 4:
+                inner = abs(stack[size - 2] - stack[size - 3])
+                if inner <= abs(stack[size - 3] - stack[size - 4]) and inner <= abs(stack[size - 1] - stack[size - 2]):
+                    ranges[n] = inner
+                    means[n] = (stack[size - 2] + stack[size - 3]) / 2
+                    n += 1
+                    stack[size - 3] = stack[size - 1]
+                    size -= 2
+                else:
+                    break
+        return size, n
+
+    @njit
+    def fatigue_all_loop(SA, dA, SM, dM, SE, dE, UT, dU, SY, dY, FoS, governing, minimum):
+        for i in range(minimum.shape[0]):
+            Sa = abs(SA[i * dA])
+            Sm = SM[i * dM]
+            Sy = SY[i * dY]
+
+            a = Sa / SE[i * dE]
+            tension = max(Sm, 0.0)
+            m = tension / UT[i * dU]
+            y = tension / Sy
+
+            FoS[0, i] = 1.0 / (a + m)
+            FoS[1, i] = 1.0 / (a + y)
+            FoS[2, i] = 2.0 / (a + np.sqrt(a * a + 4.0 * (m * m)))
+            FoS[3, i] = 1.0 / np.sqrt(a * a + y * y)
+            FoS[4, i] = Sy / (Sa + abs(Sm))
+
+            k = 0
+            for j in range(1, 5):
+                if FoS[j, i] < FoS[k, i]:
+                    k = j
+            governing[i] = k
+            minimum[i] = FoS[k, i]
+
+    def von_mises_3d(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm):
+        equivalent_stresses_loop(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm, vm, vm, False)
+
+    def equivalent_stresses_3d(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm, tau_oct, p):
+        equivalent_stresses_loop(s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, vm, tau_oct, p, True)
+
+    def von_mises_fos(sigma_A, sigma_B, Sy, zero_stress):
+        shape, (a, b, S), (da, db, dS) = BroadcastFlat(sigma_A, sigma_B, Sy)
+        n = int(np.prod(shape))
+        eq = np.empty(n)
+        FoS = np.empty(n)
+        von_mises_loop(a, da, b, db, S, dS, zero_stress, eq, FoS)
+        return [eq.reshape(shape), FoS.reshape(shape)]
+
+    def tresca_fos(sigma_A, sigma_B, Sy, zero_stress):
+        shape, (a, b, S), (da, db, dS) = BroadcastFlat(sigma_A, sigma_B, Sy)
+        n = int(np.prod(shape))
+        stress = np.empty(n)
+        FoS = np.empty(n)
+        tresca_loop(a, da, b, db, S, dS, zero_stress, stress, FoS)
+        return [stress.reshape(shape), FoS.reshape(shape)]
+
+    def brittle_fos(s1, s3, Sut, Suc, theory):
+        theories = {"MNST": 0, "MM": 1, "BCM": 2}
+        if theory not in theories:
+            raise ValueError("Unknown brittle failure theory " + str(theory))
+        shape, (a, b, T, C), (da, db, dT, dC) = BroadcastFlat(s1, s3, Sut, Suc)
+        n = int(np.prod(shape))
+        stress = np.empty(n)
+        FoS = np.empty(n)
+        case = np.empty(n, dtype=np.int8)
+        brittle_loop(a, da, b, db, T, dT, C, dC, theories[theory], stress, FoS, case)
+        return [stress.reshape(shape), FoS.reshape(shape), case.reshape(shape)]
+
+    def principal_stress_2d(s_xx, s_yy, t_xy):
+        shape, (x, y, t), (dx, dy, dt) = BroadcastFlat(s_xx, s_yy, t_xy)
+        n = int(np.prod(shape))
+        s1 = np.empty(n)
+        s3 = np.empty(n)
+        principal_stress_loop(x, dx, y, dy, t, dt, s1, s3)
+        return [s1.reshape(shape), s3.reshape(shape)]
+
+    def rainflow_four_point(points, stack):
+        size = stack.shape[0]
+        buffer = np.empty(size + points.shape[0])
+        buffer[:size] = stack
+        ranges = np.empty(buffer.shape[0] // 2 + 1)
+        means = np.empty(buffer.shape[0] // 2 + 1)
+        size, n = rainflow_loop(np.asarray(points, dtype=np.float64), buffer, size, ranges, means)
+        return [buffer[:size].copy(), ranges[:n].copy(), means[:n].copy()]
+
+    def fatigue_all_fos(Sa, Sm, Se, Sut, Sy):
+        shape, (A, M, E, U, Y), (dA, dM, dE, dU, dY) = BroadcastFlat(Sa, Sm, Se, Sut, Sy)
+        n = int(np.prod(shape))
+        FoS = np.empty((5, n))
+        governing = np.empty(n, dtype=np.int8)
+        minimum = np.empty(n)
+        fatigue_all_loop(A, dA, M, dM, E, dE, U, dU, Y, dY, FoS, governing, minimum)
+        return [FoS[j].reshape(shape) for j in range(5)] + [governing.reshape(shape), minimum.reshape(shape)]
+
+    backend.register("von_mises_fos", von_mises_fos)
+    backend.register("von_mises_3d", von_mises_3d)
+    backend.register("equivalent_stresses_3d", equivalent_stresses_3d)
+    backend.register("tresca_fos", tresca_fos)
+    backend.register("rainflow_four_point", rainflow_four_point)
+    backend.register("fatigue_all_fos", fatigue_all_fos)
+    backend.register("brittle_fos", brittle_fos)
+    backend.register("principal_stress_2d", principal_stress_2d)
+    return backend
+
+
+RegisterBackend(ComputeBackend("numpy"))
+RegisterBackend(__create_numexpr_backend())
+RegisterBackend(__create_numba_backend())
@@ -0,0 +1,137 @@
+"""
+Small dependency-tracked computation graph for the apps.
+
+Inputs hold values, e.g. the slider values. Nodes are functions of inputs and other
+nodes; their results are memoized. get() evaluates a node on demand: it first brings
+the upstream nodes up to date, and recomputes the node only if the version of an upstream
+node changed since its last evaluation (a miss), otherwise it returns the memoized value
+(a hit). Setting an input to its current value, or a recompute that gives the same value
+as before, does not change the version, so the downstream nodes are not recomputed.
+
+Example:
+    graph = ComputeGraph()
+    graph.input("d", 20.0)
+    graph.input("Sy", 250.0)
+    graph.node("I", lambda d: np.pi * d ** 4 / 64, ["d"])
+    graph.node("FoS", lambda I, Sy: ..., ["I", "Sy"])
+    graph.get("FoS")
+    graph.set("Sy", 300.0)      # the next get("FoS") recomputes FoS, but not I
+    print(graph.statistics())
+"""
+import numpy as np
+
+
+class ComputeGraph():
+    """
+    Inputs and memoized nodes with hit/miss counters.
+    """
+
+    def __init__(self):
+        self.__inputs = {}      # name -> [value, version]
+        self.__nodes = {}       # name -> dict with func, inputs, value, version, seen, hits, misses
+
+    def input(self, name, value=None):
+        """
+        Add an input.
+        :param name: unique name
+        :param value: initial value
+        """
+        self.__check_name(name)
+        self.__inputs[name] = [value, 0]
+
+    def node(self, name, func, inputs):
+        """
+        Add a memoized node.
+        :param name: unique name
+        :param func: function that takes the values of the inputs, in order
+        :param inputs: list with the names of the inputs and nodes func depends on; they must exist
+        """
+        self.__check_name(name)
+        for i in inputs:
+            if i not in self.__inputs and i not in self.__nodes:
+                raise ValueError("Unknown input " + str(i) + " of node " + str(name))
+
+        self.__nodes[name] = {"func": func, "inputs": list(inputs), "value": None, "version": 0,
+                              "seen": None, "hits": 0, "misses": 0}
+
+    def set(self, name, value):
+        """
+        Set an input. The dependent nodes are recomputed on their next get() if the value changed.
+        :return: True if the value changed
+        """
+        if name not in self.__inputs:
+            raise ValueError("Unknown input " + str(name))
+
+        entry = self.__inputs[name]
+        if _same(entry[0], value):
+            return False
+        entry[0] = value
+        entry[1] += 1
+        return True
+
+    def get(self, name):
+        """
+        :return: the value of an input, or the up-to-date value of a node
+        """
+        if name in self.__inputs:
+            return self.__inputs[name][0]
+        if name not in self.__nodes:
+            raise ValueError("Unknown node " + str(name))
+
+        node = self.__nodes[name]
+        values = [self.get(i) for i in node["inputs"]]
+        seen = tuple(self.__version(i) for i in node["inputs"])
+
+        if seen == node["seen"]:
+            node["hits"] += 1
+            return node["value"]
+
+        node["misses"] += 1
+        value = node["func"](*values)
+        if node["version"] == 0 or not _same(node["value"], value):
+            node["value"] = value
+            node["version"] += 1
+        node["seen"] = seen
+        return node["value"]
+
+    def invalidate(self, name):
+        """
+        Force a recompute of a node on its next get(), e.g. after a side effect was lost.
+        """
+        self.__nodes[name]["seen"] = None
+
+    def statistics(self):
+        """
+        :return: dict node name -> {"hits": ..., "misses": ...}
+        """
+        return {name: {"hits": node["hits"], "misses": node["misses"]} for name, node in self.__nodes.items()}
+
+    def reset_statistics(self):
+        for node in self.__nodes.values():
+            node["hits"] = 0
+            node["misses"] = 0
+
+    def __version(self, name):
+        if name in self.__inputs:
+            return self.__inputs[name][1]
+        return self.__nodes[name]["version"]
+
+    def __check_name(self, name):
+        if name in self.__inputs or name in self.__nodes:
+            raise ValueError("The name " + str(name) + " is already used")
+
+
+def _same(a, b):
+    """
+    :return: True if a and b are equal values, element by element for arrays and lists
+    """
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.shape(a) == np.shape(b) and bool(np.array_equal(a, b))
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return type(a) == type(b) and len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    try:
+        return type(a) == type(b) and bool(a == b)
+    except (ValueError, TypeError):
+        return False
@@ -1,5 +1,7 @@
 import numpy as np
 
+from ME325Common.ComputeBackends import GetKernel
+
 
 
 def calcPrincipalStress(s_xx, s_yy, t_xy):
@@ -26,6 +28,30 @@ def calcPrincipalStress(s_xx, s_yy, t_xy):
     return [s1, s3]
 
 
+def calcPrincipalStressBatch(s_xx, s_yy, t_xy, backend=None):
+    """
+    Batch version of calcPrincipalStress for arrays of plane stress states.
+    Unlike calcPrincipalStress, the results are not rounded to 6 digits.
+    :param s_xx: array with the stress components around the xx axis
+    :param s_yy: array with the stress components around the yy axis
+    :param t_xy: array with the shear stresses in the xy-plane
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: arrays [s1, s3] with s1 >= s3
+    """
+    kernel = GetKernel("principal_stress_2d", backend)
+    if kernel is not None:
+        return kernel(s_xx, s_yy, t_xy)
+
+    s_xx = np.asarray(s_xx, dtype=np.float64)
+    s_yy = np.asarray(s_yy, dtype=np.float64)
+    t_xy = np.asarray(t_xy, dtype=np.float64)
+
+    h = np.sqrt(((s_xx - s_yy) / 2.0)**2 + t_xy**2)
+    a = (s_xx + s_yy) / 2
+
+    return [a + h, a - h]
+
+
 def calcPrincipalAngles(s_xx, s_yy, t_xy):
 
     tau21 = np.arctan(2*t_xy/(s_xx-s_yy+0.000001))
@@ -40,3 +66,118 @@ def calcMaxShearStress(s_xx, s_yy, t_xy):
     s = round(np.sqrt(((s_xx - s_yy) / 2.0) ** 2 + t_xy ** 2), 6)
 
     return s, -s
+
+
+
+def getStressComponents(stress):
+    """
+    Split 3D Cauchy stress tensors into their six components.
+    :param stress: array of shape (..., 6) in Voigt order [s_xx, s_yy, s_zz, t_yz, t_xz, t_xy],
+                    or array of shape (..., 3, 3) with the full tensors
+    :return: the arrays s_xx, s_yy, s_zz, t_yz, t_xz, t_xy, each of shape (...)
+    """
+    stress = np.asarray(stress, dtype=np.float64)
+
+    if stress.shape[-2:] == (3, 3):
+        return [stress[..., 0, 0], stress[..., 1, 1], stress[..., 2, 2],
+                stress[..., 1, 2], stress[..., 0, 2], stress[..., 0, 1]]
+    elif stress.shape[-1] == 6:
+        return [stress[..., 0], stress[..., 1], stress[..., 2],
+                stress[..., 3], stress[..., 4], stress[..., 5]]
+
+    raise ValueError("Expected stresses of shape (N,6) or (N,3,3), got " + str(stress.shape))
+
+
+def calcPrincipalStress3D(stress, directions=False):
+    """
+    Calculate the principal stresses of 3D stress states with the closed-form
+    (trigonometric) solution of the characteristic cubic equation. All tensors
+    are solved at once; no eigenvalue solver is called unless directions are requested
+    for tensors with (nearly) repeated principal stresses.
+    Note that the arccos loses accuracy close to repeated principal stresses; there the
+    values are exact to about 1e-8 relative to the largest stress.
+    :param stress: array of shape (N, 6) in Voigt order [s_xx, s_yy, s_zz, t_yz, t_xz, t_xy],
+                    or array of shape (N, 3, 3) with the full tensors
+    :param directions: if True, also return the principal directions
+    :return: arrays [s1, s2, s3] with s1 >= s2 >= s3, and if directions is True an
+            additional array of shape (N, 3, 3) whose columns are the unit vectors for s1, s2, s3
+    """
+    s_xx, s_yy, s_zz, t_yz, t_xz, t_xy = getStressComponents(stress)
+
+    # hydrostatic part and deviator
+    p = (s_xx + s_yy + s_zz) / 3.0
+    d_xx = s_xx - p
+    d_yy = s_yy - p
+    d_zz = s_zz - p
+
+    # invariants of the deviator
+    shear2 = t_yz * t_yz + t_xz * t_xz + t_xy * t_xy
+    J2 = (d_xx * d_xx + d_yy * d_yy + d_zz * d_zz) / 2.0 + shear2
+    J3 = d_xx * d_yy * d_zz + 2.0 * t_xy * t_yz * t_xz \
+        - d_xx * t_yz * t_yz - d_yy * t_xz * t_xz - d_zz * t_xy * t_xy
+
+    # Lode angle, 0 <= theta <= pi/3
+    r = np.sqrt(J2 / 3.0)
+    r3 = r * r * r
+    cos3theta = np.divide(J3, 2.0 * r3, out=np.zeros_like(r3), where=r3 > 0.0)
+    theta = np.arccos(np.clip(cos3theta, -1.0, 1.0)) / 3.0
+
+    s1 = p + 2.0 * r * np.cos(theta)
+    s2 = p + 2.0 * r * np.cos(theta - 2.0 * np.pi / 3.0)
+    s3 = p + 2.0 * r * np.cos(theta + 2.0 * np.pi / 3.0)
+
+    if not directions:
+        return [s1, s2, s3]
+
+    return [s1, s2, s3, calcPrincipalDirections3D(stress, s1, s2, s3)]
+
+
+def calcPrincipalDirections3D(stress, s1, s2, s3):
+    """
+    Calculate the principal directions for known principal stresses.
+    The directions of s1 and s3 are the cross product of two rows of (sigma - s * I),
+    the direction of s2 completes the right-handed system. Tensors with (nearly) repeated
+    principal stresses have no unique directions; they are handed to np.linalg.eigh.
+    :param stress: array of shape (N, 6) in Voigt order or (N, 3, 3)
+    :param s1: array with the largest principal stresses
+    :param s2: array with the middle principal stresses
+    :param s3: array with the smallest principal stresses
+    :return: array of shape (N, 3, 3), columns are the unit vectors for s1, s2, s3
+    """
+    s_xx, s_yy, s_zz, t_yz, t_xz, t_xy = getStressComponents(stress)
+
+    tensor = np.empty(s_xx.shape + (3, 3))
+    tensor[..., 0, 0] = s_xx
+    tensor[..., 1, 1] = s_yy
+    tensor[..., 2, 2] = s_zz
+    tensor[..., 1, 2] = tensor[..., 2, 1] = t_yz
+    tensor[..., 0, 2] = tensor[..., 2, 0] = t_xz
+    tensor[..., 0, 1] = tensor[..., 1, 0] = t_xy
+
+    def null_vector(s):
+        # the largest cross product of two rows of (sigma - s * I) is normal to all rows
+        rows = tensor - s[..., None, None] * np.eye(3)
+        candidates = np.stack([np.cross(rows[..., 0, :], rows[..., 1, :]),
+                               np.cross(rows[..., 0, :], rows[..., 2, :]),
+                               np.cross(rows[..., 1, :], rows[..., 2, :])], axis=-2)
+        norms = np.linalg.norm(candidates, axis=-1)
+        best = np.argmax(norms, axis=-1)
+        v = np.take_along_axis(candidates, best[..., None, None], axis=-2)[..., 0, :]
+        n = np.take_along_axis(norms, best[..., None], axis=-1)
+        return v / np.where(n > 0.0, n, 1.0)
+
+    v1 = null_vector(s1)
+    v3 = null_vector(s3)
+    v2 = np.cross(v3, v1)
+
+    result = np.stack([v1, v2, v3], axis=-1)
+
+    # repeated principal stresses
+    scale = np.maximum(np.abs(s1), np.abs(s3))
+    gap = np.minimum(s1 - s2, s2 - s3)
+    repeated = gap <= 1e-6 * scale
+    if np.any(repeated):
+        w, v = np.linalg.eigh(tensor[repeated])
+        result[repeated] = v[..., ::-1]
+
+    return result
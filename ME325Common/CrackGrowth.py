@@ -0,0 +1,236 @@
+"""
+Fatigue crack growth: number of cycles to grow a crack from a0 to ac.
+
+Growth laws (region 2 of the da/dN diagram, see CrackPropagationDiagramPlot), with
+dK = Y * dS * sqrt(pi * a):
+- "Paris":  da/dN = C * dK^m
+- "Walker": da/dN = C * (dK / (1 - R)^(1 - gamma))^m
+- "Forman": da/dN = C * dK^m / ((1 - R) * Kc - dK)   (region 3: unstable growth as Kmax -> Kc)
+
+All functions work on arrays, one element per crack scenario. For a constant geometry
+factor Y the life integral has a closed form for all three laws. A geometry factor that
+depends on the crack length, Y(a), is integrated with adaptive Gauss-Legendre quadrature
+that refines all cracks at once.
+
+Units have to be consistent, e.g. a in m, dS in MPa, K in MPa*sqrt(m) and C for da/dN in m/cycle.
+"""
+import numpy as np
+
+
+# Gauss-Legendre nodes per panel of the adaptive quadrature
+g_quadrature_nodes = 8
+
+
+def CalcStressIntensityRange(a, dS, Y=1.0):
+    """
+    :param a: crack lengths
+    :param dS: stress ranges
+    :param Y: geometry factors
+    :return: the stress intensity factor ranges dK = Y * dS * sqrt(pi * a)
+    """
+    return Y * dS * np.sqrt(np.pi * np.asarray(a, dtype=np.float64))
+
+
+def CalcCrackGrowthRate(dK, C, m, law="Paris", R=0.0, gamma=0.5, Kc=None):
+    """
+    Calculate the crack growth rate da/dN.
+    :param dK: array with the stress intensity factor ranges
+    :param C: growth coefficient
+    :param m: growth exponent
+    :param law: "Paris", "Walker" or "Forman"
+    :param R: stress ratio Smin / Smax (Walker, Forman)
+    :param gamma: Walker exponent
+    :param Kc: fracture toughness (Forman)
+    :return: array with da/dN; inf where the Forman law predicts unstable growth.
+             A float for scalar arguments, e.g. in the cycle by cycle simulation of CrackGrowthSimulation.
+    """
+    scalar = isinstance(dK, float) and isinstance(R, float)
+    if not scalar:
+        dK = np.asarray(dK, dtype=np.float64)
+
+    if law == "Paris":
+        return C * dK ** m
+    elif law == "Walker":
+        return C * (dK / (1.0 - R) ** (1.0 - gamma)) ** m
+    elif law == "Forman":
+        if Kc is None:
+            raise ValueError("The Forman law needs Kc")
+        margin = (1.0 - R) * Kc - dK
+        if scalar:
+            return C * dK ** m / margin if margin > 0.0 else np.inf
+        with np.errstate(divide='ignore'):
+            return np.where(margin > 0.0, C * dK ** m / np.where(margin > 0.0, margin, 1.0), np.inf)
+    else:
+        raise ValueError("Unknown crack growth law " + str(law))
+
+
+def CalcCriticalCrackLength(Kc, S_max, Y=1.0):
+    """
+    Crack length at which Kmax reaches the fracture toughness, for a constant geometry factor.
+    :param Kc: fracture toughness
+    :param S_max: maximum stress of the cycle
+    :param Y: geometry factor
+    :return: the critical crack lengths ac = (Kc / (Y * S_max))^2 / pi
+    """
+    return (Kc / (Y * np.asarray(S_max, dtype=np.float64))) ** 2 / np.pi
+
+
+def CalcCrackGrowthLife(a0, ac, dS, C, m, Y=1.0, law="Paris", R=0.0, gamma=0.5, Kc=None,
+                        rtol=1e-8, max_depth=30):
+    """
+    Calculate the number of cycles to grow cracks from a0 to ac, N = integral of da / (da/dN).
+    All array arguments broadcast against each other.
+    :param a0: initial crack lengths
+    :param ac: final (critical) crack lengths
+    :param dS: stress ranges
+    :param C: growth coefficients
+    :param m: growth exponents
+    :param Y: geometry factors, or a function Y(a, i) that returns the geometry factors of
+              the crack lengths a of the cracks with the (flat) indices i; a and i have the same shape.
+              A constant Y uses the closed form integrals, a function the adaptive quadrature.
+    :param law: "Paris", "Walker" or "Forman"
+    :param R: stress ratios (Walker, Forman)
+    :param gamma: Walker exponents
+    :param Kc: fracture toughness (Forman). Cycles beyond (1 - R) Kc do not count (unstable growth).
+    :param rtol: relative tolerance of the quadrature per panel
+    :param max_depth: maximum number of panel bisections of the quadrature
+    :return: array with the number of cycles, 0 where ac <= a0
+    """
+    if law == "Forman" and Kc is None:
+        raise ValueError("The Forman law needs Kc")
+    if law not in ("Paris", "Walker", "Forman"):
+        raise ValueError("Unknown crack growth law " + str(law))
+
+    geometry = Y if callable(Y) else None
+    Y = 1.0 if callable(Y) else Y
+    Kc = np.nan if Kc is None else Kc
+
+    a0, ac, dS, C, m, Y, R, gamma, Kc = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in (a0, ac, dS, C, m, Y, R, gamma, Kc)])
+    shape = a0.shape
+    a0, ac, dS, C, m, Y, R, gamma, Kc = [x.ravel() for x in (a0, ac, dS, C, m, Y, R, gamma, Kc)]
+
+    N = np.zeros(a0.shape[0])
+    grows = ac > a0
+
+    if geometry is None:
+        N[grows] = __closed_form(a0, ac, dS, C, m, Y, law, R, gamma, Kc, grows)
+        return N.reshape(shape)
+
+    def integrand(a, i):
+        dK = geometry(a, i) * dS[i] * np.sqrt(np.pi * a)
+        rate = CalcCrackGrowthRate(dK, C[i], m[i], law, R[i], gamma[i], Kc[i])
+        return 1.0 / rate
+
+    if law == "Forman":
+        # end at the onset of unstable growth; integrating through the kink of 1 / rate misses rtol
+        index = np.flatnonzero(grows)
+        ac = ac.copy()
+        ac[index] = __unstable_crack_length(geometry, index, dS[index], (1.0 - R[index]) * Kc[index],
+                                            a0[index], ac[index])
+        grows = ac > a0
+
+    N[grows] = __integrate(integrand, np.flatnonzero(grows), a0[grows], ac[grows], rtol, max_depth)
+    return N.reshape(shape)
+
+
+def __closed_form(a0, ac, dS, C, m, Y, law, R, gamma, Kc, grows):
+    a0, ac, dS, C, m, Y, R, gamma, Kc = [x[grows] for x in (a0, ac, dS, C, m, Y, R, gamma, Kc)]
+
+    # dK = B * sqrt(a)
+    B = Y * dS * np.sqrt(np.pi)
+
+    if law == "Paris":
+        return __power_integral(a0, ac, -m / 2) / (C * B ** m)
+
+    if law == "Walker":
+        B = B / (1.0 - R) ** (1.0 - gamma)
+        return __power_integral(a0, ac, -m / 2) / (C * B ** m)
+
+    # Forman: dN = ((1 - R) Kc - dK) / (C dK^m) da, up to the crack length of unstable growth
+    K_limit = (1.0 - R) * Kc
+    ac = np.minimum(ac, (K_limit / B) ** 2)
+    N = K_limit / (C * B ** m) * __power_integral(a0, ac, -m / 2) \
+        - 1.0 / (C * B ** (m - 1)) * __power_integral(a0, ac, (1.0 - m) / 2)
+    return np.where(ac > a0, N, 0.0)
+
+
+def __unstable_crack_length(geometry, index, dS, K_limit, a0, ac):
+    """
+    Crack length at which dK = Y(a) dS sqrt(pi a) reaches K_limit = (1 - R) Kc, by bisection in ln(a)
+    for all cracks at once; dK has to grow with a.
+    :return: array with the crack lengths, ac where dK stays below K_limit, a0 where it starts above
+    """
+    def excess(a):
+        return geometry(a, index) * dS * np.sqrt(np.pi * a) - K_limit
+
+    lo = np.log(a0)
+    hi = np.log(ac)
+    unstable = excess(ac) > 0.0
+    # 64 bisections shrink any interval of ln(a) below the float resolution
+    for i in range(64):
+        mid = (lo + hi) / 2
+        above = excess(np.exp(mid)) > 0.0
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+
+    a = np.where(excess(a0) >= 0.0, a0, np.exp(lo))
+    return np.where(unstable, a, ac)
+
+
+def __power_integral(a0, ac, p):
+    """
+    Integral of a^p from a0 to ac, (ac^q - a0^q) / q with q = p + 1, and ln(ac / a0) for q = 0.
+    Written with expm1 so that it does not cancel for q close to 0.
+    """
+    q = p + 1.0
+    L = np.log(ac / a0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        I = np.exp(q * np.log(a0)) * np.expm1(q * L) / q
+    return np.where(q == 0.0, L, I)
+
+
+def __gauss_panels(integrand, index, lo, hi, x, w):
+    """
+    Gauss-Legendre rule on the panels [lo, hi] in u = ln(a), da = a du.
+    """
+    half = (hi - lo) / 2
+    u = half[:, None] * x[None, :] + ((hi + lo) / 2)[:, None]
+    a = np.exp(u)
+    values = integrand(a, np.broadcast_to(index[:, None], a.shape)) * a
+    return half * (values @ w)
+
+
+def __integrate(integrand, index, a0, ac, rtol, max_depth):
+    """
+    Adaptive quadrature for all cracks at once. Each panel is compared with the sum of its
+    two halves; panels that agree within rtol are accepted, the others are bisected.
+    """
+    x, w = np.polynomial.legendre.leggauss(g_quadrature_nodes)
+
+    crack = np.arange(index.shape[0])
+    lo = np.log(a0)
+    hi = np.log(ac)
+    whole = __gauss_panels(integrand, index[crack], lo, hi, x, w)
+    total = np.zeros(index.shape[0])
+
+    for depth in range(max_depth + 1):
+        mid = (lo + hi) / 2
+        left = __gauss_panels(integrand, index[crack], lo, mid, x, w)
+        right = __gauss_panels(integrand, index[crack], mid, hi, x, w)
+        halves = left + right
+
+        done = np.abs(halves - whole) <= rtol * np.abs(halves)
+        if depth == max_depth:
+            done[:] = True
+
+        total += np.bincount(crack[done], halves[done], minlength=total.shape[0])
+
+        split = ~done
+        if not np.any(split):
+            break
+        crack = np.concatenate((crack[split], crack[split]))
+        lo, hi = np.concatenate((lo[split], mid[split])), np.concatenate((mid[split], hi[split]))
+        whole = np.concatenate((left[split], right[split]))
+
+    return total
@@ -0,0 +1,300 @@
+"""
+Crack growth under repeated blocks of variable amplitude loading.
+
+A load block is a sequence of cycles (S_max, S_min) that repeats until the crack reaches
+its critical length. Simulating every cycle of a 10^8 cycle life is slow, but the growth
+per block changes only slowly with the crack length. BlockLoadingSimulator.run() therefore
+simulates single blocks cycle by cycle and jumps over many identical blocks with a Heun
+(trapezoidal) step on da/dB, the growth per block:
+
+    k1 = da/dB(a),  k2 = da/dB(a + h k1),  a_new = a + h (k1 + k2) / 2 - (k2 - k1) / 2
+
+The last term makes the step the sum of the growth of the h discrete blocks (with k varying
+linearly from block to block) instead of the integral of a continuous da/dB; without it the
+result drifts by about one block per crack length doubling. The difference of the Euler and
+the Heun step, h |k2 - k1| / 2, is the error estimate that controls the jump size h. Close
+to the critical length the jumps shrink to single blocks, and the last block is simulated
+cycle by cycle.
+
+run_reference() simulates every cycle; compare() runs both and reports the speedup.
+
+The growth rate per cycle uses CrackGrowth.CalcCrackGrowthRate (Paris, Walker, Forman) with a
+threshold dK_th (region 1 of the da/dN diagram, see CrackPropagationDiagramPlot).
+Optionally, the Wheeler model retards the growth after overloads:
+
+    phi = (r_y / (a_ol + r_ol - a))^p   while a + r_y < a_ol + r_ol,   r_y = (Kmax / Sy)^2 / (alpha pi)
+
+where a_ol + r_ol is the boundary of the largest plastic zone created so far. With
+retardation, the growth of a block also depends on the boundary it starts with. A jump
+therefore simulates one block that ends at a + h k1 to settle the boundary, and takes k2
+from the next block; otherwise the guessed boundary biases every jump and the errors add up.
+"""
+import math
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from ME325Common.CrackGrowth import CalcCrackGrowthRate
+
+
+class CrackGrowthHistory(NamedTuple):
+    """
+    Result of BlockLoadingSimulator.run() and run_reference().
+    """
+    cycles: float               # cycles to failure, inf if the crack does not grow
+    blocks: float               # blocks to failure
+    crack_length: float         # crack length at the end of the simulation
+    block_history: np.ndarray   # block count of each accepted step
+    crack_history: np.ndarray   # crack length after each accepted step
+    block_evaluations: int      # number of blocks simulated cycle by cycle
+    seconds: float              # wall time of the simulation
+
+
+class BlockLoadingSimulator():
+    """
+    Growth of one crack under a repeated load block.
+    """
+
+    def __init__(self, S_max, S_min, C, m, Y=1.0, law="Paris", gamma=0.5, Kc=None, dK_th=0.0,
+                 retardation=None, Sy=None, wheeler_exponent=1.5, plastic_zone_factor=2.0):
+        """
+        :param S_max: array with the maximum stress of each cycle of the block
+        :param S_min: array with the minimum stress of each cycle of the block
+        :param C: growth coefficient
+        :param m: growth exponent
+        :param Y: geometry factor, constant or function Y(a)
+        :param law: "Paris", "Walker" or "Forman", see CrackGrowth
+        :param gamma: Walker exponent
+        :param Kc: fracture toughness; the crack fails when Kmax reaches Kc. Needed for Forman.
+        :param dK_th: threshold, no growth for dK < dK_th
+        :param retardation: None or "Wheeler"
+        :param Sy: yield strength for the plastic zone size (Wheeler)
+        :param wheeler_exponent: shaping exponent p of the Wheeler model
+        :param plastic_zone_factor: alpha of the plastic zone size, 2 for plane stress, 6 for plane strain
+        """
+        if law not in ("Paris", "Walker", "Forman"):
+            raise ValueError("Unknown crack growth law " + str(law))
+        if law == "Forman" and Kc is None:
+            raise ValueError("The Forman law needs Kc")
+        if retardation not in (None, "Wheeler"):
+            raise ValueError("Unknown retardation model " + str(retardation))
+        if retardation == "Wheeler" and Sy is None:
+            raise ValueError("The Wheeler model needs Sy")
+
+        self.S_max = [float(s) for s in np.ravel(S_max)]
+        self.S_min = [float(s) for s in np.ravel(S_min)]
+        if len(self.S_max) != len(self.S_min) or len(self.S_max) == 0:
+            raise ValueError("S_max and S_min need the same, non-zero number of cycles")
+
+        self.C = C
+        self.m = m
+        self.Y = Y
+        self.law = law
+        self.gamma = gamma
+        self.Kc = Kc
+        self.dK_th = dK_th
+        self.retardation = retardation
+        self.Sy = Sy
+        self.wheeler_exponent = wheeler_exponent
+        self.plastic_zone_factor = plastic_zone_factor
+
+        # stress ratio of each cycle
+        self.R = [S_min / S_max if S_max != 0.0 else 0.0 for S_max, S_min in zip(self.S_max, self.S_min)]
+
+    @property
+    def cycles_per_block(self):
+        return len(self.S_max)
+
+    def run(self, a0, ac, tol=1e-4, max_blocks=1e12):
+        """
+        Simulate with cycle jumping.
+        :param a0: initial crack length
+        :param ac: critical crack length
+        :param tol: error tolerance of a jump, relative to the crack length
+        :param max_blocks: stop after this number of blocks
+        :return: CrackGrowthHistory
+        """
+        start = time.perf_counter()
+        L = self.cycles_per_block
+
+        a = float(a0)
+        boundary = -math.inf
+        blocks = 0.0
+        cycles = 0.0
+        h = 1.0
+        evaluations = 0
+        block_history = [0.0]
+        crack_history = [a]
+        cached = None
+        wheeler = self.retardation == "Wheeler"
+
+        while blocks < max_blocks:
+            if cached is not None and cached[0] == a:
+                a1, b1, n1, failed = cached[1]
+            else:
+                a1, b1, n1, failed = self.__block(a, boundary, ac)
+                evaluations += 1
+                cached = (a, (a1, b1, n1, failed))
+
+            if failed:
+                blocks += n1 / L
+                cycles += n1
+                a = a1
+                break
+
+            k1 = a1 - a
+            if k1 <= 0.0:
+                # below the threshold, the crack does not grow
+                cycles = math.inf
+                blocks = math.inf
+                break
+
+            # do not jump closer to ac than half of the remaining growth
+            h = min(h, 0.5 * (ac - a) / k1, max_blocks - blocks)
+
+            if h <= 1.0:
+                a, boundary = a1, b1
+                blocks += 1
+                cycles += L
+                # try a jump next
+                h = 2.0
+                block_history.append(blocks)
+                crack_history.append(a)
+                continue
+
+            a_pred = a + h * k1
+            if wheeler:
+                # the retardation depends on the plastic zone boundary the block starts with. The boundary
+                # carried over from a is only a guess at a_pred, so one block, from a_pred - k1, settles
+                # the boundary, and the next block measures k2 from where that block ended
+                a_settled, b_settled, n2, failed = self.__block(a_pred - k1, a_pred - k1 + (b1 - a1), ac)
+                evaluations += 1
+                if not failed:
+                    a2, b2, n2, failed = self.__block(a_settled, b_settled, ac)
+                    evaluations += 1
+            else:
+                a_settled, b_settled = a_pred, a_pred + (b1 - a1)
+                a2, b2, n2, failed = self.__block(a_settled, b_settled, ac)
+                evaluations += 1
+            if failed:
+                h /= 2
+                continue
+
+            # the growth per block at a_pred, interpolated linearly if the block started elsewhere
+            k2 = a2 - a_settled
+            k2 -= (k2 - k1) * (a_settled - a_pred) / (a_settled - a)
+            error = h * abs(k2 - k1) / 2
+            if error <= tol * a:
+                a_new = a + h * (k1 + k2) / 2 - (k2 - k1) / 2
+                # the plastic zone offset of a block that ends at about a_pred
+                boundary = a_new + (b_settled - a_settled)
+                a = a_new
+                blocks += h
+                cycles += h * L
+                block_history.append(blocks)
+                crack_history.append(a)
+                h *= 4.0 if error == 0.0 else min(4.0, 0.9 * math.sqrt(tol * a / error))
+            else:
+                h *= max(0.25, 0.9 * math.sqrt(tol * a / error))
+
+        return CrackGrowthHistory(cycles, blocks, a, np.array(block_history), np.array(crack_history),
+                                  evaluations, time.perf_counter() - start)
+
+    def run_reference(self, a0, ac, max_blocks=1e12):
+        """
+        Simulate every cycle.
+        :param a0: initial crack length
+        :param ac: critical crack length
+        :param max_blocks: stop after this number of blocks
+        :return: CrackGrowthHistory
+        """
+        start = time.perf_counter()
+        L = self.cycles_per_block
+
+        a = float(a0)
+        boundary = -math.inf
+        blocks = 0
+        cycles = 0
+        block_history = [0.0]
+        crack_history = [a]
+
+        while blocks < max_blocks:
+            a1, boundary, n, failed = self.__block(a, boundary, ac)
+            if failed:
+                cycles += n
+                a = a1
+                break
+            if a1 <= a:
+                cycles = math.inf
+                break
+
+            a = a1
+            blocks += 1
+            cycles += L
+            block_history.append(blocks)
+            crack_history.append(a)
+
+        return CrackGrowthHistory(cycles, cycles / L, a, np.array(block_history), np.array(crack_history),
+                                  blocks + 1, time.perf_counter() - start)
+
+    def compare(self, a0, ac, tol=1e-4):
+        """
+        Run the simulation with cycle jumping and the cycle by cycle reference.
+        :return: dict with the cycles to failure of both, the relative error, the wall times and the speedup
+        """
+        jumping = self.run(a0, ac, tol)
+        reference = self.run_reference(a0, ac)
+
+        return {"cycles": jumping.cycles,
+                "reference_cycles": reference.cycles,
+                "relative_error": abs(jumping.cycles - reference.cycles) / reference.cycles,
+                "seconds": jumping.seconds,
+                "reference_seconds": reference.seconds,
+                "speedup": reference.seconds / jumping.seconds,
+                "block_evaluations": jumping.block_evaluations,
+                "reference_block_evaluations": reference.block_evaluations}
+
+    def __block(self, a, boundary, ac):
+        """
+        Simulate one block cycle by cycle.
+        :return: crack length, plastic zone boundary, cycles done, True if the crack failed
+        """
+        law = self.law
+        wheeler = self.retardation == "Wheeler"
+        if wheeler:
+            zone = 1.0 / (self.plastic_zone_factor * math.pi * self.Sy * self.Sy)
+        constant_Y = not callable(self.Y)
+        Y = self.Y if constant_Y else 0.0
+
+        for n in range(len(self.S_max)):
+            S_max = self.S_max[n]
+            S_min = self.S_min[n]
+
+            if not constant_Y:
+                Y = self.Y(a)
+            root = Y * math.sqrt(math.pi * a)
+            K_max = S_max * root
+            dK = (S_max - S_min) * root
+
+            if a >= ac or (self.Kc is not None and K_max >= self.Kc):
+                return a, boundary, n, True
+
+            if dK < self.dK_th or dK <= 0.0:
+                continue
+
+            rate = CalcCrackGrowthRate(dK, self.C, self.m, law, self.R[n], self.gamma, self.Kc)
+            if rate == math.inf:
+                # Forman: unstable growth, dK reached (1 - R) Kc
+                return a, boundary, n, True
+
+            if wheeler:
+                r_y = K_max * K_max * zone
+                if a + r_y < boundary:
+                    rate *= (r_y / (boundary - a)) ** self.wheeler_exponent
+                else:
+                    boundary = a + r_y
+
+            a += rate
+
+        return a, boundary, len(self.S_max), a >= ac
@@ -0,0 +1,350 @@
+"""
+Section properties of arbitrary cross sections.
+
+Every section is described by six area integrals about the origin of its coordinate system:
+
+    A = int dA,  Qx = int y dA,  Qy = int x dA,  Ixx_o = int y^2 dA,  Iyy_o = int x^2 dA,  Ixy_o = int x y dA
+
+Polygons get them from the shoelace formulas, circles analytically. Composite sections add
+(or, for holes, subtract) the integrals of their parts. All properties - centroid, second
+moments about the centroid, principal axes and polar moment - follow from the six integrals.
+
+Sections are immutable. Their properties are calculated on first access and cached.
+Section.cached(...) reuses section objects for repeated parameters, e.g. slider positions.
+
+For sizing sweeps, PolygonPropertiesBatch evaluates thousands of polygons in one call,
+and RectangleVertices, HollowRectangleVertices, ISectionVertices, CSectionVertices and
+TSectionVertices create the vertex arrays of parametric shapes for it.
+
+Polygons are given counterclockwise; holes as rings in clockwise order, or as Composite.
+"""
+import functools
+
+import numpy as np
+
+
+class Section():
+    """
+    Base class of all cross sections: stores the area integrals and derives the properties.
+    """
+
+    def __init__(self, integrals):
+        """
+        :param integrals: [A, Qx, Qy, Ixx_o, Iyy_o, Ixy_o] about the origin
+        """
+        object.__setattr__(self, "_Section__integrals", tuple(float(i) for i in integrals))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Sections are immutable")
+
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def cached(cls, *params):
+        """
+        Return a section of this class for the parameters, reusing the object for repeated parameters.
+        """
+        return cls(*params)
+
+    @property
+    def integrals(self):
+        return self.__integrals
+
+    @functools.cached_property
+    def properties(self):
+        """
+        :return: dict with area, cx, cy, Ixx, Iyy, Ixy (centroidal), I1, I2, theta (principal axes,
+                 theta in rad from x to the axis of I1) and J (polar moment Ixx + Iyy)
+        """
+        return {key: float(value) for key, value in CalcSectionProperties(*self.__integrals).items()}
+
+    @property
+    def area(self):
+        return self.properties["area"]
+
+    @property
+    def centroid(self):
+        return [self.properties["cx"], self.properties["cy"]]
+
+    @property
+    def Ixx(self):
+        return self.properties["Ixx"]
+
+    @property
+    def Iyy(self):
+        return self.properties["Iyy"]
+
+    @property
+    def Ixy(self):
+        return self.properties["Ixy"]
+
+    @property
+    def principal(self):
+        """
+        :return: [I1, I2, theta]
+        """
+        return [self.properties["I1"], self.properties["I2"], self.properties["theta"]]
+
+    @property
+    def J(self):
+        return self.properties["J"]
+
+    def translated(self, dx, dy):
+        """
+        :return: a new section moved by (dx, dy)
+        """
+        A, Qx, Qy, Ixx, Iyy, Ixy = self.__integrals
+        return Section([A,
+                        Qx + A * dy,
+                        Qy + A * dx,
+                        Ixx + 2 * dy * Qx + A * dy * dy,
+                        Iyy + 2 * dx * Qy + A * dx * dx,
+                        Ixy + dx * Qx + dy * Qy + A * dx * dy])
+
+    def __add__(self, other):
+        return Composite([self, other])
+
+    def __sub__(self, other):
+        return Composite([self], [other])
+
+
+class Polygon(Section):
+    """
+    Simple polygon with optional polygonal holes.
+    """
+
+    def __init__(self, points, holes=()):
+        """
+        :param points: list of [x, y] vertices
+        :param holes: list of vertex lists, one per hole; the orientation of the holes does not matter
+        """
+        points = np.array(points, dtype=np.float64)
+        integrals = Polygon.__oriented(PolygonIntegralsBatch(points[:, 0], points[:, 1]), 1.0)
+        for hole in holes:
+            hole = np.array(hole, dtype=np.float64)
+            integrals = integrals + Polygon.__oriented(PolygonIntegralsBatch(hole[:, 0], hole[:, 1]), -1.0)
+
+        Section.__init__(self, integrals)
+        points.flags.writeable = False
+        object.__setattr__(self, "points", points)
+
+    @staticmethod
+    def __oriented(integrals, sign):
+        """
+        Integrals of a ring with the sign of its area set to sign, independent of the vertex order.
+        """
+        if integrals[0] == 0.0:
+            return integrals
+        return np.sign(integrals[0]) * sign * integrals
+
+
+class Rectangle(Section):
+    """
+    Rectangle b x h, centered at the origin (b along x, h along y).
+    """
+
+    def __init__(self, b, h):
+        Section.__init__(self, [b * h, 0.0, 0.0, (b * h ** 3) / 12, (b ** 3 * h) / 12, 0.0])
+
+
+class Circle(Section):
+    """
+    Solid circle with radius r, centered at the origin.
+    """
+
+    def __init__(self, r):
+        I = (np.pi * r ** 4) / 4
+        Section.__init__(self, [np.pi * r ** 2, 0.0, 0.0, I, I, 0.0])
+
+
+class HollowCircle(Section):
+    """
+    Tube with outer radius r_o and inner radius r_i, centered at the origin.
+    """
+
+    def __init__(self, r_o, r_i):
+        I = (np.pi * (r_o ** 4 - r_i ** 4)) / 4
+        Section.__init__(self, [np.pi * (r_o ** 2 - r_i ** 2), 0.0, 0.0, I, I, 0.0])
+
+
+class HollowRectangle(Polygon):
+    """
+    Rectangular tube b x h with wall thickness t, centered at the origin.
+    """
+
+    def __init__(self, b, h, t):
+        x, y = HollowRectangleVertices(b, h, t)
+        Polygon.__init__(self, np.column_stack((x[0], y[0])), [np.column_stack((x[1], y[1]))])
+
+
+class ISection(Polygon):
+    """
+    I-beam with flange width b, height h, flange thickness tf and web thickness tw, centered at the origin.
+    """
+
+    def __init__(self, b, h, tf, tw):
+        x, y = ISectionVertices(b, h, tf, tw)
+        Polygon.__init__(self, np.column_stack((x, y)))
+
+
+class CSection(Polygon):
+    """
+    Channel with flange width b, height h, flange thickness tf and web thickness tw.
+    The back of the web is on the y axis, the flanges point to +x.
+    """
+
+    def __init__(self, b, h, tf, tw):
+        x, y = CSectionVertices(b, h, tf, tw)
+        Polygon.__init__(self, np.column_stack((x, y)))
+
+
+class TSection(Polygon):
+    """
+    T-beam with flange width b, height h, flange thickness tf and web thickness tw.
+    The bottom of the web is at y = 0, the flange on top.
+    """
+
+    def __init__(self, b, h, tf, tw):
+        x, y = TSectionVertices(b, h, tf, tw)
+        Polygon.__init__(self, np.column_stack((x, y)))
+
+
+class Composite(Section):
+    """
+    Union of sections that do not overlap, minus holes that lie inside them.
+    """
+
+    def __init__(self, parts, holes=()):
+        """
+        :param parts: list of sections, e.g. translated() plates of a built-up beam
+        :param holes: list of sections to remove
+        """
+        integrals = np.zeros(6)
+        for part in parts:
+            integrals += np.array(part.integrals)
+        for hole in holes:
+            integrals -= np.array(hole.integrals)
+
+        Section.__init__(self, integrals)
+        object.__setattr__(self, "parts", tuple(parts))
+        object.__setattr__(self, "holes", tuple(holes))
+
+
+def PolygonIntegralsBatch(x, y):
+    """
+    Area integrals of polygons with the shoelace formulas, vectorized over all leading axes.
+    The sign follows the vertex order: counterclockwise rings are positive, clockwise rings negative.
+    Rings of different length can be padded by repeating their last vertex.
+    :param x: array (..., n) with the x coordinates of the vertices
+    :param y: array (..., n) with the y coordinates of the vertices
+    :return: array (6, ...) with [A, Qx, Qy, Ixx_o, Iyy_o, Ixy_o] about the origin
+    """
+    x0 = np.asarray(x, dtype=np.float64)
+    y0 = np.asarray(y, dtype=np.float64)
+    x1 = np.roll(x0, -1, axis=-1)
+    y1 = np.roll(y0, -1, axis=-1)
+
+    cross = x0 * y1 - x1 * y0
+
+    A = np.sum(cross, axis=-1) / 2
+    Qx = np.sum((y0 + y1) * cross, axis=-1) / 6
+    Qy = np.sum((x0 + x1) * cross, axis=-1) / 6
+    Ixx = np.sum((y0 * y0 + y0 * y1 + y1 * y1) * cross, axis=-1) / 12
+    Iyy = np.sum((x0 * x0 + x0 * x1 + x1 * x1) * cross, axis=-1) / 12
+    Ixy = np.sum((x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * cross, axis=-1) / 24
+
+    return np.array([A, Qx, Qy, Ixx, Iyy, Ixy])
+
+
+def CalcSectionProperties(A, Qx, Qy, Ixx_o, Iyy_o, Ixy_o):
+    """
+    Section properties from the area integrals about the origin, element by element.
+    :return: dict with arrays area, cx, cy, Ixx, Iyy, Ixy, I1, I2, theta, J (see Section.properties)
+    """
+    cx = Qy / A
+    cy = Qx / A
+
+    Ixx = Ixx_o - A * cy * cy
+    Iyy = Iyy_o - A * cx * cx
+    Ixy = Ixy_o - A * cx * cy
+
+    mean = (Ixx + Iyy) / 2
+    radius = np.hypot((Ixx - Iyy) / 2, Ixy)
+
+    return {"area": A, "cx": cx, "cy": cy,
+            "Ixx": Ixx, "Iyy": Iyy, "Ixy": Ixy,
+            "I1": mean + radius, "I2": mean - radius,
+            "theta": 0.5 * np.arctan2(-2 * Ixy, Ixx - Iyy),
+            "J": Ixx + Iyy}
+
+
+def PolygonPropertiesBatch(x, y):
+    """
+    Section properties of many polygons in one call.
+    :param x: array (batch, n) with one ring per polygon, or (batch, rings, n) for polygons with holes
+              (outer ring counterclockwise, holes clockwise, see HollowRectangleVertices)
+    :param y: array with the y coordinates, same shape as x
+    :return: dict with arrays of shape (batch,), see CalcSectionProperties
+    """
+    integrals = PolygonIntegralsBatch(x, y)
+    if np.ndim(x) == 3:
+        integrals = np.sum(integrals, axis=-1)
+    return CalcSectionProperties(*integrals)
+
+
+def RectangleVertices(b, h):
+    """
+    :param b: array with the widths
+    :param h: array with the heights
+    :return: x, y arrays (batch, 4), counterclockwise, centered at the origin
+    """
+    b, h = np.broadcast_arrays(np.asarray(b, dtype=np.float64) / 2, np.asarray(h, dtype=np.float64) / 2)
+    x = np.stack((-b, b, b, -b), axis=-1)
+    y = np.stack((-h, -h, h, h), axis=-1)
+    return x, y
+
+
+def HollowRectangleVertices(b, h, t):
+    """
+    :param b: array with the outer widths
+    :param h: array with the outer heights
+    :param t: array with the wall thicknesses
+    :return: x, y arrays (batch, 2, 4): the outer ring counterclockwise, the inner ring clockwise
+    """
+    b, h, t = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in (b, h, t)])
+    xo, yo = RectangleVertices(b, h)
+    xi, yi = RectangleVertices(b - 2 * t, h - 2 * t)
+    return np.stack((xo, xi[..., ::-1]), axis=-2), np.stack((yo, yi[..., ::-1]), axis=-2)
+
+
+def ISectionVertices(b, h, tf, tw):
+    """
+    :return: x, y arrays (batch, 12) of I-sections, counterclockwise, centered at the origin
+    """
+    b, h, tf, tw = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) / 2 for v in (b, h, tf, tw)])
+    f = h - 2 * tf  # y of the inner flange faces
+    x = np.stack((-b, b, b, tw, tw, b, b, -b, -b, -tw, -tw, -b), axis=-1)
+    y = np.stack((-h, -h, -f, -f, f, f, h, h, f, f, -f, -f), axis=-1)
+    return x, y
+
+
+def CSectionVertices(b, h, tf, tw):
+    """
+    :return: x, y arrays (batch, 8) of channels, counterclockwise, web back on the y axis
+    """
+    b, h, tf, tw = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in (b, h, tf, tw)])
+    z = np.zeros_like(b)
+    f = h / 2 - tf
+    x = np.stack((z, b, b, tw, tw, b, b, z), axis=-1)
+    y = np.stack((-h / 2, -h / 2, -f, -f, f, f, h / 2, h / 2), axis=-1)
+    return x, y
+
+
+def TSectionVertices(b, h, tf, tw):
+    """
+    :return: x, y arrays (batch, 8) of T-sections, counterclockwise, web bottom at y = 0
+    """
+    b, h, tf, tw = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in (b, h, tf, tw)])
+    z = np.zeros_like(b)
+    x = np.stack((-tw / 2, tw / 2, tw / 2, b / 2, b / 2, -b / 2, -b / 2, -tw / 2), axis=-1)
+    y = np.stack((z, z, h - tf, h - tf, h, h, h - tf, h - tf), axis=-1)
+    return x, y
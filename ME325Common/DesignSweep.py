@@ -0,0 +1,161 @@
+"""
+Full-factorial design-space sweeps of the beam examples (see BeamCore).
+
+Every input of the rectangular beam (Sy, F, T, angle, l, b, h) or the round beam
+(Sy, F, T, angle, l, d) takes a scalar or a 1D grid of values, e.g. np.linspace(...).
+DesignSweep evaluates all combinations, the Cartesian product of the grids, in chunks of
+flat indices: np.unravel_index turns the indices of a chunk into grid indices, the
+input columns are gathered from the grids, and the BeamCore array path and the batch
+failure theories evaluate the whole chunk at once. Memory thus depends on the chunk
+size and the requested columns only, not on the number of combinations.
+
+Results are columnar: a dict with one array per column (see g_sweep_columns), one row
+per combination in C order of the grids, i.e. the last grid varies fastest.
+
+Example:
+    sweep = DesignSweep("round", Sy=250, F=np.linspace(0, 5000, 100), T=np.linspace(0, 15, 100),
+                        angle=np.linspace(0, 90, 10), l=np.linspace(100, 1000, 100), d=np.linspace(5, 50, 100))
+    table = sweep.run(columns=["d", "l", "vonmises_FoS", "mass"],
+                      where=lambda t: t["vonmises_FoS"] >= 2.0)
+"""
+import numpy as np
+
+from ME325Common.BeamCore import RectangularBeamCore, RoundBeamCore
+from ME325Common.FailureTheories import CalcVonMiesesFoSBatch, CalcTrescaFoSBatch
+
+
+# inputs of the beam examples
+g_sweep_inputs = {"rectangular": ("Sy", "F", "T", "angle", "l", "b", "h"),
+                  "round": ("Sy", "F", "T", "angle", "l", "d")}
+
+# calculated columns, after the inputs
+g_sweep_columns = ("index", "I_xx", "I_yy", "J", "s_xx", "s_yy", "sigma_max", "t_xy", "s1", "s3",
+                   "vonmises", "vonmises_FoS", "tresca", "tresca_FoS", "mass")
+
+
+class DesignSweep():
+    """
+    Evaluates a beam example over the Cartesian product of its input grids.
+    """
+
+    def __init__(self, section="rectangular", chunk_size=1000000, density=7.85e-6, backend=None, **grids):
+        """
+        :param section: "rectangular" or "round"
+        :param chunk_size: number of combinations per chunk
+        :param density: material density for the mass, in kg/mm^3 (steel)
+        :param backend: compute backend of the failure theories, None for the global one (see ComputeBackends)
+        :param grids: scalar or 1D array for each input of the section, see g_sweep_inputs.
+                      Units as in the examples: N/mm^2, N, Nm, deg, mm.
+        """
+        if section not in g_sweep_inputs:
+            raise ValueError("Unknown section " + str(section))
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        inputs = g_sweep_inputs[section]
+        for name in grids:
+            if name not in inputs:
+                raise ValueError("Unknown input " + str(name) + " for the " + section + " beam")
+        for name in inputs:
+            if name not in grids:
+                raise ValueError("Missing input " + str(name))
+
+        self.section = section
+        self.chunk_size = chunk_size
+        self.density = density
+        self.backend = backend
+        self.grids = {name: np.atleast_1d(np.asarray(grids[name], dtype=np.float64)).ravel() for name in inputs}
+        self.shape = tuple(self.grids[name].shape[0] for name in inputs)
+
+    @property
+    def size(self):
+        """
+        :return: the number of combinations
+        """
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    def columns(self):
+        """
+        :return: the names of all columns, the inputs first
+        """
+        return list(g_sweep_inputs[self.section]) + list(g_sweep_columns)
+
+    def evaluate(self, start, stop):
+        """
+        Evaluate the combinations with the flat indices start to stop.
+        :return: dict with all columns for these combinations
+        """
+        index = np.arange(start, stop, dtype=np.int64)
+        grid_index = np.unravel_index(index, self.shape)
+
+        table = {name: self.grids[name][i] for name, i in zip(g_sweep_inputs[self.section], grid_index)}
+        table["index"] = index
+
+        if self.section == "rectangular":
+            core = RectangularBeamCore()
+            core.calcI(table["b"], table["h"])
+            area = table["b"] * table["h"]
+        else:
+            core = RoundBeamCore()
+            core.calcI(table["d"])
+            area = np.pi * table["d"] ** 2 / 4
+
+        result = core.calcStresses(table["F"], table["T"], table["l"], table["angle"])
+        for name in ("I_xx", "I_yy", "J", "s_xx", "s_yy", "sigma_max", "t_xy", "s1", "s3"):
+            table[name] = np.broadcast_to(getattr(result, name), index.shape)
+
+        table["vonmises"], table["vonmises_FoS"] = CalcVonMiesesFoSBatch(result.s1, result.s3, table["Sy"], self.backend)
+        table["tresca"], table["tresca_FoS"] = CalcTrescaFoSBatch(result.s1, result.s3, table["Sy"], self.backend)
+        table["mass"] = self.density * area * table["l"]
+
+        return table
+
+    def chunks(self, columns=None):
+        """
+        Generator over the chunks of the sweep.
+        :param columns: list with the column names to keep, None for all
+        :return: yields a dict with the columns of each chunk
+        """
+        columns = self.__check_columns(columns)
+        for start in range(0, self.size, self.chunk_size):
+            table = self.evaluate(start, min(start + self.chunk_size, self.size))
+            yield {name: table[name] for name in columns}
+
+    def run(self, columns=None, where=None):
+        """
+        Evaluate all combinations.
+        :param columns: list with the column names to return, None for all. Fewer columns need less memory.
+        :param where: function where(table) -> boolean array that selects the rows of a chunk to keep,
+                      e.g. the designs with a sufficient FoS; the table has all columns. None keeps all rows.
+        :return: dict with one array per column
+        """
+        columns = self.__check_columns(columns)
+        size = self.size
+
+        if where is None:
+            results = None
+            for start in range(0, size, self.chunk_size):
+                stop = min(start + self.chunk_size, size)
+                table = self.evaluate(start, stop)
+                if results is None:
+                    results = {name: np.empty(size, dtype=table[name].dtype) for name in columns}
+                for name in columns:
+                    results[name][start:stop] = table[name]
+            return results if results is not None else {name: np.empty(0) for name in columns}
+
+        parts = {name: [] for name in columns}
+        for start in range(0, size, self.chunk_size):
+            table = self.evaluate(start, min(start + self.chunk_size, size))
+            keep = np.asarray(where(table), dtype=bool)
+            for name in columns:
+                parts[name].append(table[name][keep])
+        return {name: np.concatenate(parts[name]) if len(parts[name]) else np.empty(0) for name in columns}
+
+    def __check_columns(self, columns):
+        all_columns = self.columns()
+        if columns is None:
+            return all_columns
+        for name in columns:
+            if name not in all_columns:
+                raise ValueError("Unknown column " + str(name))
+        return list(columns)
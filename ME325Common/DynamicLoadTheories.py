@@ -9,6 +9,7 @@ if platform.system() == 'Darwin':
 from typing import NamedTuple
 
 from ME325Common.PlotHelpers import *
+from ME325Common.ComputeBackends import GetKernel
 
 class SNData():
     Sut = 1     # ultimate tensile strength
@@ -24,6 +25,8 @@ class SNData():
         self.Se = se_
         self.Nlow = nlow_
         self.Nend = nend_
+        self.__coefficients = None
+        self.__coefficients_key = None
 
 
     def set(self,sut_, sy_, se_, nlow_, nend_):
@@ -32,6 +35,25 @@ class SNData():
         self.Se = se_
         self.Nlow = nlow_
         self.Nend = nend_
+        self.__coefficients = None
+
+
+    def coefficients(self):
+        """
+        Slope a and intercept b of the two log-linear segments, S = a * ln(N) + b.
+        They are calculated once and cached until set() is called or a value changes.
+        :return: [a_low, b_low, a_high, b_high], low cycle segment from 1 to Nlow,
+                 high cycle segment from Nlow to Nend
+        """
+        key = (self.Sut, self.Sy, self.Se, self.Nlow, self.Nend)
+        if self.__coefficients is None or self.__coefficients_key != key:
+            a_low = (self.Sut - self.Sy) / (np.log(1) - np.log(self.Nlow))
+            b_low = self.Sy - a_low * np.log(self.Nlow)
+            a_high = (self.Sy - self.Se) / (np.log(self.Nlow) - np.log(self.Nend))
+            b_high = self.Se - a_high * np.log(self.Nend)
+            self.__coefficients = [a_low, b_low, a_high, b_high]
+            self.__coefficients_key = key
+        return self.__coefficients
 
 class SNDiagram():
     """
@@ -51,17 +73,14 @@ class SNDiagram():
         :param sndata: SN diagram data as defined in class SNData
         :return: the maximum fatigue strength Sf
         """
+        a_low, b_low, a_high, b_high = sndata.coefficients()
 
         if target_itrerations >= 0.0 and target_itrerations < sndata.Nlow:
-            a = (sndata.Sut - sndata.Sy) / (np.log(1) - np.log(sndata.Nlow))
-            b = sndata.Sy - a * np.log(sndata.Nlow)
-            f = a * np.log(target_itrerations) + b
+            f = a_low * np.log(target_itrerations) + b_low
             return f
 
         elif target_itrerations >= sndata.Nlow and target_itrerations < sndata.Nend:
-            a = (sndata.Sy - sndata.Se) / (np.log(sndata.Nlow) - np.log(sndata.Nend))
-            b = sndata.Se - a * np.log(sndata.Nend)
-            f = a * np.log(target_itrerations) + b
+            f = a_high * np.log(target_itrerations) + b_high
             return f
 
         else:
@@ -77,22 +96,86 @@ class SNDiagram():
         :param sndata:  SN diagram data as defined in class SNData
         :return: the maximum number of iterations for the given fatigue strength.
         """
+        a_low, b_low, a_high, b_high = sndata.coefficients()
+
         if target_Sf <= sndata.Se:
             return sndata.Nend
         elif target_Sf < sndata.Sy and target_Sf > sndata.Se:
-            a = (sndata.Sy - sndata.Se) / (np.log(sndata.Nlow) - np.log(sndata.Nend))
-            b = sndata.Se - a * np.log(sndata.Nend)
-            e = (target_Sf - b) / a
+            e = (target_Sf - b_high) / a_high
             itr = np.exp(e)
             return itr
         else:
-            a = (sndata.Sut - sndata.Sy) / (np.log(1) - np.log(sndata.Nlow))
-            b = sndata.Sy - a * np.log(sndata.Nlow)
-            e = (target_Sf - b) / a
+            e = (target_Sf - b_low) / a_low
             itr = np.exp(e)
             return itr
 
 
+    @staticmethod
+    def ComputeFatigueStrengthBatch(target_iterations, sndata):
+        """
+        Array version of ComputeFatigueStrength. The segment of each element is found
+        with np.searchsorted on the segment limits [Nlow, Nend].
+        :param target_iterations: array with the target iterations
+        :param sndata: SN diagram data as defined in class SNData
+        :return: array with the maximum fatigue strengths Sf
+        """
+        a_low, b_low, a_high, b_high = sndata.coefficients()
+        N = np.asarray(target_iterations, dtype=np.float64)
+
+        # 0: low cycle, 1: high cycle, 2: endurance (and negative iterations, as in the scalar version)
+        segment = np.searchsorted(np.array([sndata.Nlow, sndata.Nend], dtype=np.float64), N, side='right')
+        segment = np.where(N < 0.0, 2, segment)
+
+        a = np.array([a_low, a_high, 0.0])[segment]
+        b = np.array([b_low, b_high, sndata.Se])[segment]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = a * np.log(N) + b
+
+        return np.where(segment == 2, sndata.Se, f)
+
+
+    @staticmethod
+    def ComputeMaxIterationsBatch(target_Sf, sndata):
+        """
+        Array version of ComputeMaxIterations.
+        :param target_Sf: array with the target fatigue strengths
+        :param sndata: SN diagram data as defined in class SNData
+        :return: array with the maximum number of iterations
+        """
+        a_low, b_low, a_high, b_high = sndata.coefficients()
+        Sf = np.asarray(target_Sf, dtype=np.float64)
+
+        # 0: endurance, 1: high cycle, 2: low cycle
+        segment = np.where(Sf <= sndata.Se, 0, np.where(Sf < sndata.Sy, 1, 2))
+
+        a = np.array([1.0, a_high, a_low])[segment]
+        b = np.array([0.0, b_high, b_low])[segment]
+
+        with np.errstate(over='ignore'):
+            itr = np.exp((Sf - b) / a)
+
+        return np.where(segment == 0, sndata.Nend, itr)
+
+
+# criteria of FatigueDiagram.calc_all_FoS, in the order of the governing index
+g_fatigue_criteria = ("Goodman", "Soderberg", "Gerber", "ASME", "Langer")
+
+
+class FatigueFoS(NamedTuple):
+    """
+    Result of FatigueDiagram.calc_all_FoS. All fields are arrays of the broadcast input shape.
+    governing is the index of the smallest FoS in g_fatigue_criteria.
+    """
+    goodman: np.ndarray
+    soderberg: np.ndarray
+    gerber: np.ndarray
+    asme: np.ndarray
+    langer: np.ndarray
+    governing: np.ndarray
+    minimum: np.ndarray
+
+
 class FatigueDiagram():
 
     def __init__(self):
@@ -100,19 +183,82 @@ class FatigueDiagram():
 
 
     @staticmethod
-    def calc_mod_Goodman_FoS(Sa, Sm, Se, Sut ):
+    def calc_all_FoS(Sa, Sm, Se, Sut, Sy, backend=None):
+        """
+        Calculate the FoS of all fatigue criteria and the Langer first-cycle yield line in one pass.
+        The ratios Sa/Se, Sm/Sut and Sm/Sy are calculated once and shared:
+            mod. Goodman:  1 / n = Sa/Se + Sm/Sut
+            Soderberg:     1 / n = Sa/Se + Sm/Sy
+            Gerber:        n Sa/Se + (n Sm/Sut)^2 = 1  ->  n = 2 / (Sa/Se + sqrt((Sa/Se)^2 + 4 (Sm/Sut)^2))
+            ASME-elliptic: (n Sa/Se)^2 + (n Sm/Sy)^2 = 1
+            Langer:        n = Sy / (Sa + |Sm|)
+        The Gerber root is taken in the form without cancellation, it also holds for Sm = 0.
+        For compressive means (Sm < 0) the fatigue criteria use Sm = 0, i.e. n = Se / Sa.
+        Unlike the single criterion methods, no offset is added against division by zero;
+        a zero load gives n = inf. The load line (Sm, Sa) * n intersects each curve.
+        :param Sa: array with the stress amplitudes
+        :param Sm: array with the mean stresses
+        :param Se: endurance limit, scalar or array
+        :param Sut: ultimate tensile strength, scalar or array
+        :param Sy: yield strength, scalar or array
+        :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+        :return: FatigueFoS with the FoS per criterion, the governing criterion and the minimum FoS
+        """
+        kernel = GetKernel("fatigue_all_fos", backend)
+        if kernel is not None:
+            return FatigueFoS(*kernel(Sa, Sm, Se, Sut, Sy))
+
+        Sa, Sm, Se, Sut, Sy = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in (Sa, Sm, Se, Sut, Sy)])
+        Sa = np.abs(Sa)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = Sa / Se
+            tension = np.maximum(Sm, 0.0)
+            m = tension / Sut
+            y = tension / Sy
+
+            goodman = 1.0 / (a + m)
+            soderberg = 1.0 / (a + y)
+            gerber = 2.0 / (a + np.sqrt(a * a + 4.0 * (m * m)))
+            asme = 1.0 / np.sqrt(a * a + y * y)
+            langer = Sy / (Sa + np.abs(Sm))
+
+        all_FoS = np.stack((goodman, soderberg, gerber, asme, langer))
+        governing = np.argmin(all_FoS, axis=0).astype(np.int8)
+        minimum = np.min(all_FoS, axis=0)
+
+        return FatigueFoS(goodman, soderberg, gerber, asme, langer, governing, minimum)
+
+
+    @staticmethod
+    def calc_mod_Goodman_FoS(Sa, Sm, Se, Sut, backend=None):
+        # scalars, e.g. from the GUI, stay on the plain code and return floats
+        kernel = None if _all_scalar(Sa, Sm, Se, Sut) else GetKernel("mod_goodman_fos", backend)
+        if kernel is not None:
+            return kernel(Sa, Sm, Se, Sut)
+
         f = 0.00000001 # prevent division by 0
         return 1 / ( Sa/(Se+f) + Sm/(Sut+f) + f)
 
 
     @staticmethod
-    def calc_Sonderberg_FoS(Sa, Sm, Se, Sy):
+    def calc_Sonderberg_FoS(Sa, Sm, Se, Sy, backend=None):
+        # scalars, e.g. from the GUI, stay on the plain code and return floats
+        kernel = None if _all_scalar(Sa, Sm, Se, Sy) else GetKernel("soderberg_fos", backend)
+        if kernel is not None:
+            return kernel(Sa, Sm, Se, Sy)
+
         f = 0.00000001  # prevent division by 0
         return 1 / (Sa / (Se + f) + Sm / (Sy + f) + f)
 
 
     @staticmethod
-    def calc_Gerber_FoS(Sa, Sm, Se, Sut):
+    def calc_Gerber_FoS(Sa, Sm, Se, Sut, backend=None):
+        # scalars, e.g. from the GUI, stay on the plain code and return floats
+        kernel = None if _all_scalar(Sa, Sm, Se, Sut) else GetKernel("gerber_fos", backend)
+        if kernel is not None:
+            return kernel(Sa, Sm, Se, Sut)
+
         f = 0.000000001
         a = (Sm / (Sut+f)) ** 2
         b = (Sa / (Se+f))
@@ -124,4 +270,121 @@ class FatigueDiagram():
         n = - (p / 2.0) + np.sqrt((p / 2.0) ** 2 - q)
         n2 = - (p / 2.0) - np.sqrt((p / 2.0) ** 2 - q)
 
-        return n
\ No newline at end of file
+        return n
+
+def _all_scalar(*values):
+    """
+    :return: True if all values are scalars (0-dimensional)
+    """
+    return all(np.ndim(v) == 0 for v in values)
+
+
+class FatigueDamage():
+    """
+    Palmgren-Miner damage of a load spectrum, e.g. the bins of a rainflow matrix.
+    Every bin (amplitude Sa, mean Sm, count n) is converted to an equivalent fully reversed
+    amplitude Sar with a mean stress correction. The life N of each bin comes from the SN
+    diagram, and the damage is the sum of n / N. All functions work on arrays of any shape,
+    e.g. (channels, bins).
+
+    Mean stress corrections:
+    - "none":      Sar = Sa
+    - "Goodman":   Sar = Sa / (1 - Sm/Sut)
+    - "Soderberg": Sar = Sa / (1 - Sm/Sy)
+    - "Gerber":    Sar = Sa / (1 - (Sm/Sut)^2)
+    - "ASME":      Sar = Sa / sqrt(1 - (Sm/Sy)^2)       (ASME elliptic)
+    - "SWT":       Sar = sqrt(Smax * Sa), Smax = Sm + Sa (Smith-Watson-Topper), no damage for Smax <= 0
+    Goodman, Soderberg, Gerber and ASME do not correct compressive means (Sm < 0 -> Sar = Sa).
+    A mean at or above the strength of the correction gives Sar = inf, i.e. failure in the first cycle.
+    """
+
+    corrections = ("none", "Goodman", "Soderberg", "Gerber", "ASME", "SWT")
+
+    def __init__(self):
+        pass
+
+
+    @staticmethod
+    def ComputeEquivalentAmplitude(Sa, Sm, sndata, correction="Goodman"):
+        """
+        Calculate the equivalent fully reversed stress amplitudes.
+        :param Sa: array with the stress amplitudes
+        :param Sm: array with the mean stresses
+        :param sndata: SN diagram data as defined in class SNData (Sut and Sy are used)
+        :param correction: the mean stress correction, see class documentation
+        :return: array with the equivalent amplitudes Sar
+        """
+        Sa, Sm = np.broadcast_arrays(np.abs(np.asarray(Sa, dtype=np.float64)), np.asarray(Sm, dtype=np.float64))
+
+        if correction == "none":
+            return Sa.copy()
+
+        if correction == "SWT":
+            Smax = Sm + Sa
+            return np.sqrt(np.maximum(Smax, 0.0) * Sa)
+
+        tension = np.maximum(Sm, 0.0)
+        if correction == "Goodman":
+            factor = 1.0 - tension / sndata.Sut
+        elif correction == "Soderberg":
+            factor = 1.0 - tension / sndata.Sy
+        elif correction == "Gerber":
+            factor = 1.0 - (tension / sndata.Sut) ** 2
+        elif correction == "ASME":
+            factor = np.sqrt(np.maximum(1.0 - (tension / sndata.Sy) ** 2, 0.0))
+        else:
+            raise ValueError("Unknown mean stress correction " + str(correction))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(factor > 0.0, Sa / np.where(factor > 0.0, factor, 1.0), np.inf)
+
+
+    @staticmethod
+    def ComputeLife(Sar, sndata, endurance_limit=True):
+        """
+        Calculate the life of equivalent fully reversed amplitudes from the SN diagram.
+        :param Sar: array with the equivalent amplitudes
+        :param sndata: SN diagram data as defined in class SNData
+        :param endurance_limit: True - amplitudes at or below Se have infinite life,
+                                False - they have the life Nend, as in SNDiagram.ComputeMaxIterations
+        :return: array with the number of cycles to failure
+        """
+        Sar = np.asarray(Sar, dtype=np.float64)
+        N = SNDiagram.ComputeMaxIterationsBatch(Sar, sndata)
+        if endurance_limit:
+            N = np.where(Sar <= sndata.Se, np.inf, N)
+        return N
+
+
+    @staticmethod
+    def ComputeDamage(Sa, Sm, counts, sndata, correction="Goodman", endurance_limit=True):
+        """
+        Calculate the Palmgren-Miner damage of each bin, n / N.
+        :param Sa: array with the stress amplitudes of the bins
+        :param Sm: array with the mean stresses of the bins
+        :param counts: array with the cycle counts of the bins
+        :param sndata: SN diagram data as defined in class SNData
+        :param correction: the mean stress correction, see class documentation
+        :param endurance_limit: True for no damage at or below Se, see ComputeLife
+        :return: array with the damage of each bin
+        """
+        Sar = FatigueDamage.ComputeEquivalentAmplitude(Sa, Sm, sndata, correction)
+        N = FatigueDamage.ComputeLife(Sar, sndata, endurance_limit)
+        counts = np.asarray(counts, dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            damage = counts / N
+        # bins without cycles do not contribute, even if their life is 0
+        return np.where(counts == 0.0, 0.0, damage)
+
+
+    @staticmethod
+    def ComputeTotalDamage(Sa, Sm, counts, sndata, correction="Goodman", endurance_limit=True, axis=-1):
+        """
+        Calculate the Palmgren-Miner damage sum D. Failure is predicted for D >= 1;
+        1 / D is the number of times the spectrum can be repeated.
+        :param axis: the axis of the bins, e.g. -1 for arrays of shape (channels, bins)
+        :return: the damage sum, one value per channel
+        """
+        damage = FatigueDamage.ComputeDamage(Sa, Sm, counts, sndata, correction, endurance_limit)
+        return np.sum(damage, axis=axis)
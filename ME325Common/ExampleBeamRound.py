@@ -24,6 +24,7 @@ from ME325Common.FailureTheories import *
 
 from ME325Common.ContinuumMechanics import *
 from ME325Common.SecondMoment import *
+from ME325Common.BeamCore import RoundBeamCore
 
 # for images
 from PIL import Image, ImageTk
@@ -123,6 +124,10 @@ class ExampleBeamRound():
         self.detail_s_max = StringVar()
         self.detail_J_p = StringVar()
 
+        # the calculations, the GUI subscribes to their results
+        self.core = RoundBeamCore()
+        self.core.subscribe(self.__show_result)
+
 
     def setLimits(self, Sy_, L_, T_,  alpha_, d_, l_):
         self.limit_yieldstress = Sy_
@@ -135,8 +140,8 @@ class ExampleBeamRound():
     def calcI(self, d ):
 
         self.diameter = d
-        self.I_xx, self.I_yy = SecondMoment.CircularArea(d/2)
-        self.Jxy = SecondMoment.PolarCircularArea(d/2)
+        self.I_xx, self.I_yy = self.core.calcI(d)
+        self.Jxy = self.core.J
 
         #print(self.I_xx, " ", self.I_yy)
         return [self.I_xx, self.I_yy]
@@ -148,28 +153,20 @@ class ExampleBeamRound():
         self.alpha = angle
         self.Force = F
         self.length = l
-        Fx = F * np.cos(np.deg2rad(angle))
-        Fy = F * np.sin(np.deg2rad(angle))
-
-
-        # the two stress components in z-direction
-        s_yy = (Fx * l * self.diameter)/(2 * self.I_yy)
-        s_xx = (Fy * l * self.diameter)/(2 * self.I_xx)
-        self.sigma_max = s_xx + s_yy
-
-        # shear stress
-        t_xy = (T * 1000 * self.diameter/2)/ self.Jxy # T * 1000-> Nm to Nmm
 
+        return self.core.calcPrincipalStress(F, T, l, angle)
 
-        # principal stresses
-        s1, s3 = calcPrincipalStress(self.sigma_max, 0.0, t_xy)
 
-        #print(Fx, " ", Fy, "  ", s_xx, " " ,  s_yy, "  ", s1, " " ,  s3)
-
-        self.setDetails( s1, s3, s_xx, s_yy, self.sigma_max, t_xy, self.I_xx, self.I_yy, self.Jxy)
-        self.updateLoadPlot()
-
-        return [s1, s3, s_xx, s_yy]
+    def __show_result(self, result):
+        """
+        Subscriber of the compute core: show the result in the details window and the load plot.
+        :param result: BeamStressResult
+        """
+        self.sigma_max = result.sigma_max
+        self.setDetails(result.s1, result.s3, result.s_xx, result.s_yy, result.sigma_max, result.t_xy,
+                        result.I_xx, result.I_yy, result.J)
+        if self.window_details is not None:
+            self.updateLoadPlot()
 
 
     ##-----------------------------------------------------------------------------
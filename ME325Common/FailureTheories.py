@@ -1,5 +1,7 @@
 import numpy as np
 
+from ME325Common.ComputeBackends import GetKernel
+
 
 
 
@@ -11,7 +13,8 @@ def CalcVonMiesesEquivalentStress(sigma_A, sigma_B ):
     :param sigma_B:  the second principal stress:
     :return: the von Mises equivalent stress
     """
-    sigma_eq = sigma_A**2 - sigma_A * sigma_B + sigma_B**2
+    # explicit products instead of **2, so scalars and arrays round the same way
+    sigma_eq = sigma_A * sigma_A - sigma_A * sigma_B + sigma_B * sigma_B
     sigma_eq = np.sqrt(sigma_eq)
     return sigma_eq
 
@@ -166,7 +169,7 @@ def CalcMMStressFoS(s1, s3, Sut, Suc):
     elif  s1 >= 0 and s3 < 0 and abs(s3/s1) > 1.0:
         n = ((Suc - Sut) * s1)/(Suc* Sut) - s3/Suc
         FoS = 1/n
-        s = np.sqrt(s1**2 + s3**2)
+        s = np.sqrt(s1 * s1 + s3 * s3)
         case = 3
     elif s1 <=0 and s3 < s1:
         FoS = -Suc/s3
@@ -201,9 +204,219 @@ def CalcBCMStressFoS(s1, s3, Sut, Suc):
     elif  s1 >= 0 and s3 <= 0:
         n = s1/Sut - s3/Suc
         FoS = 1/n
-        s = np.sqrt(s1**2 + s3**2)
+        s = np.sqrt(s1 * s1 + s3 * s3)
     elif s1 <= 0 and s3 <= 0:
         FoS = -Suc /s3
         s = s3
 
-    return [s, abs(round(FoS, 2))]
\ No newline at end of file
+    return [s, abs(round(FoS, 2))]
+
+
+#-----------------------------------------------------------------------------------------
+# Batch versions
+# The functions below take NumPy arrays (or anything that broadcasts to one) and evaluate
+# all stress states in one pass. They return the same values as the scalar functions above.
+
+# Stand-in for a zero stress. The scalar functions replace zero stresses with this value,
+# the batch functions use it to fill the masked zero-stress entries so both agree.
+g_zero_stress = 0.00000001
+
+
+def CalcEquivalentStressFoSBatch(stress, S):
+    """
+    Calculate the factor of safety S / stress for an array of equivalent stresses.
+    Zero stresses are masked out of the division; their FoS is set to S / g_zero_stress,
+    which is the value the scalar functions produce.
+    :param stress: array with equivalent stresses
+    :param S: the material strength, scalar or array that broadcasts with stress
+    :return: the stress array with zero stresses replaced by g_zero_stress, and the FoS array
+    """
+    stress, S = np.broadcast_arrays(np.asarray(stress, dtype=np.float64), np.asarray(S, dtype=np.float64))
+
+    zero = stress == 0.0
+    FoS = np.divide(S, g_zero_stress)
+    np.divide(S, stress, out=FoS, where=~zero)
+
+    stress = np.where(zero, g_zero_stress, stress)
+
+    return [stress, FoS]
+
+
+def CalcVonMiesesFoSBatch(sigma_A, sigma_B, Sy, backend=None):
+    """
+    Batch version of CalcVonMiesesFoS.
+    :param sigma_A: array with the first principal stresses
+    :param sigma_B: array with the second principal stresses
+    :param Sy: the yield strength, scalar or array that broadcasts with the stresses
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: arrays with the von Mises equivalent stress and the FoS
+    """
+    kernel = GetKernel("von_mises_fos", backend)
+    if kernel is not None:
+        return kernel(sigma_A, sigma_B, Sy, g_zero_stress)
+
+    sigma_A = np.asarray(sigma_A, dtype=np.float64)
+    sigma_B = np.asarray(sigma_B, dtype=np.float64)
+
+    vonMisesEq = CalcVonMiesesEquivalentStress(sigma_A, sigma_B)
+
+    return CalcEquivalentStressFoSBatch(vonMisesEq, Sy)
+
+
+def CalcTrescaFoSBatch(sigma_A, sigma_B, Sy, backend=None):
+    """
+    Batch version of CalcTrescaFoS. The principal stresses do not need to be sorted.
+    Note that the scalar function has no result for s1 == s2 < 0. The batch version
+    uses the compression case -Sy / s2 for it.
+    :param sigma_A: array with the first principal stresses
+    :param sigma_B: array with the second principal stresses
+    :param Sy: the yield strength, scalar or array that broadcasts with the stresses
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: arrays with the Tresca equivalent stress and the FoS
+    """
+    kernel = GetKernel("tresca_fos", backend)
+    if kernel is not None:
+        return kernel(sigma_A, sigma_B, Sy, g_zero_stress)
+
+    sigma_A, sigma_B, Sy = np.broadcast_arrays(np.asarray(sigma_A, dtype=np.float64),
+                                               np.asarray(sigma_B, dtype=np.float64),
+                                               np.asarray(Sy, dtype=np.float64))
+
+    s1 = np.maximum(sigma_A, sigma_B)
+    s2 = np.minimum(sigma_A, sigma_B)
+
+    stress = (s1 - s2) / 2
+
+    # s1 >= 0, s2 >= 0  -> Sy / s1
+    # s1 >= 0, s2 < 0   -> Sy / 2 / stress
+    # s1 < 0,  s2 <= s1 -> -Sy / s2
+    case_1 = s2 >= 0
+    case_2 = (s1 >= 0) & ~case_1
+    case_3 = s1 < 0
+
+    FoS = np.divide(Sy, g_zero_stress)
+    np.divide(Sy, s1, out=FoS, where=case_1 & (s1 != 0.0))
+    np.divide(Sy / 2, stress, out=FoS, where=case_2)
+    np.divide(-Sy, s2, out=FoS, where=case_3)
+
+    stress[stress == 0.0] = g_zero_stress
+
+    return [stress, FoS]
+
+
+def CalcPrincipalStressFoSBatch(sigma_A, sigma_B, Sy):
+    """
+    Batch version of CalcPrincipalStressFos, the smaller of Sy / sigma_A and Sy / sigma_B.
+    Zero stresses are replaced by g_zero_stress as in the scalar function.
+    :param sigma_A: array with the first principal stresses
+    :param sigma_B: array with the second principal stresses
+    :param Sy: the yield strength, scalar or array that broadcasts with the stresses
+    :return: array with the FoS
+    """
+    sigma_A = np.asarray(sigma_A, dtype=np.float64)
+    sigma_B = np.asarray(sigma_B, dtype=np.float64)
+
+    sigma_A = np.where(sigma_A == 0.0, g_zero_stress, sigma_A)
+    sigma_B = np.where(sigma_B == 0.0, g_zero_stress, sigma_B)
+
+    return np.minimum(Sy / sigma_A, Sy / sigma_B)
+
+
+def CalcBrittleFoSBatch(s1, s3, Sut, Suc, theory, backend=None):
+    """
+    Batch engine for the brittle failure theories. The stress pairs are snapped and sorted
+    the same way the scalar functions do it, and each element gets its case via boolean masks.
+    The case ids number the branches of the scalar functions in their order (MNST and MM use
+    the same ids as the scalar code); 0 marks a stress state no branch covers (FoS 0).
+    Unlike the scalar functions, the FoS is not rounded. np.round(FoS, 2) gives the scalar values.
+    :param s1: array with the first principal stresses
+    :param s3: array with the second principal stresses
+    :param Sut: ultimate tensile strength, scalar or array that broadcasts with the stresses
+    :param Suc: ultimate compression strength, scalar or array that broadcasts with the stresses
+    :param theory: "MNST" - maximum normal stress, "MM" - modified Mohr, "BCM" - brittle Coulomb-Mohr
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: arrays with the stress, the FoS, and the case id per element
+    """
+    kernel = GetKernel("brittle_fos", backend)
+    if kernel is not None:
+        return kernel(s1, s3, Sut, Suc, theory)
+
+    s1, s3, Sut, Suc = np.broadcast_arrays(np.asarray(s1, dtype=np.float64),
+                                           np.asarray(s3, dtype=np.float64),
+                                           np.asarray(Sut, dtype=np.float64),
+                                           np.asarray(Suc, dtype=np.float64))
+
+    # MNST works on the pair as given, MM and BCM swap s1 and s3 so that s1 > s3
+    if theory != "MNST":
+        s1, s3 = np.maximum(s1, s3), np.minimum(s1, s3)
+
+    s1 = np.where((s1 < 0.000001) & (s1 > -0.000001), 0.0001, s1)
+    s3 = np.where((s3 < 0.000001) & (s3 > -0.000001), 0.0001, s3)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = s3 / s1
+
+        if theory == "MNST":
+            t1 = (s1 >= 0) & (s3 >= 0)
+            c1 = (s1 < 0) & (s3 >= 0)
+            c3 = (s1 >= 0) & (s3 < 0)
+            b2 = (s1 < 0) & (s3 < 0)
+            conditions = [t1 & (s1 >= s3),
+                          t1 & (s3 > s1),
+                          c1 & (-Sut / Suc > ratio),
+                          c1 & (-Sut / Suc <= ratio),
+                          b2 & (-Suc / -Suc >= ratio),
+                          b2 & (-Suc / -Suc < ratio),
+                          c3 & (-Suc / Sut > ratio),
+                          c3 & (-Suc / Sut < ratio)]
+            stresses = [s1, s3, s3, s1, s1, s3, s3, s1]
+            FoS = [Sut / s1, Sut / s3, Sut / s3, Suc / s1, Suc / s1, Suc / s3, Suc / s3, Sut / s1]
+
+        elif theory == "MM":
+            mixed = (s1 >= 0) & (s3 < 0)
+            conditions = [(s1 >= s3) & (s3 >= 0),
+                          mixed & (np.abs(ratio) <= 1.0),
+                          mixed & (np.abs(ratio) > 1.0),
+                          (s1 <= 0) & (s3 < s1)]
+            stresses = [s1, s1, np.sqrt(s1 * s1 + s3 * s3), s3]
+            FoS = [Sut / s1, Sut / s1, 1 / (((Suc - Sut) * s1) / (Suc * Sut) - s3 / Suc), -Suc / s3]
+
+        elif theory == "BCM":
+            conditions = [(s1 >= s3) & (s3 >= 0),
+                          (s1 >= 0) & (s3 <= 0),
+                          (s1 <= 0) & (s3 <= 0)]
+            stresses = [s1, np.sqrt(s1 * s1 + s3 * s3), s3]
+            FoS = [Sut / s1, 1 / (s1 / Sut - s3 / Suc), -Suc / s3]
+
+        else:
+            raise ValueError("Unknown brittle failure theory " + str(theory))
+
+        case = np.select(conditions, np.arange(1, len(conditions) + 1, dtype=np.int8), 0)
+        stress = np.select(conditions, stresses, 0.0)
+        FoS = np.select(conditions, FoS, 0.0)
+
+    return [stress, np.abs(FoS), case]
+
+
+def CalcMNSTStressFoSBatch(s1, s3, Sut, Suc, backend=None):
+    """
+    Batch version of CalcMNSTStressFoS, see CalcBrittleFoSBatch.
+    :return: arrays with the stress, the FoS, and the case id per element
+    """
+    return CalcBrittleFoSBatch(s1, s3, Sut, Suc, "MNST", backend)
+
+
+def CalcMMStressFoSBatch(s1, s3, Sut, Suc, backend=None):
+    """
+    Batch version of CalcMMStressFoS, see CalcBrittleFoSBatch.
+    :return: arrays with the stress, the FoS, and the case id per element
+    """
+    return CalcBrittleFoSBatch(s1, s3, Sut, Suc, "MM", backend)
+
+
+def CalcBCMStressFoSBatch(s1, s3, Sut, Suc, backend=None):
+    """
+    Batch version of CalcBCMStressFoS, see CalcBrittleFoSBatch.
+    :return: arrays with the stress, the FoS, and the case id per element
+    """
+    return CalcBrittleFoSBatch(s1, s3, Sut, Suc, "BCM", backend)
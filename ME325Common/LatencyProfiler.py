@@ -0,0 +1,234 @@
+"""
+Input-to-pixel latency of the interactive apps.
+
+The app reports each input event (slider move, manual entry) with event(), and each
+update with begin_frame(), mark() after each phase, and end_frame(). The phases are:
+- "compute": the results from the inputs
+- "artists": the matplotlib artists and the Tk output widgets
+- "draw": the canvas draw or blit
+
+The latency of a frame is the time from the oldest input event it handles to the end of the
+draw. With RenderScheduler, several events are merged into one frame. A frame whose latency
+is longer than the frame budget missed frames: it counts ceil(latency / budget) - 1 dropped
+frames. The frames per second are measured over the last g_profiler_window frames.
+
+report() returns the statistics (latency percentiles, phase times, dropped frames, fps) of
+all frames, or of the last g_profiler_window frames. show_overlay() shows a summary of the
+last frames on top of the app, so that its cost does not grow with the session, and dump()
+writes the report and all frames into a JSON file. The apps enable the profiler with a command line flag:
+
+    $ python MohrsCircle2D.py --profile --profile-output mohr.json
+
+A disabled profiler (the default) returns from all methods right away.
+"""
+import argparse
+import json
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from ME325Common.RenderScheduler import g_frame_budget
+
+
+# number of frames for the frames per second and the overlay
+g_profiler_window = 120
+
+# minimum time between two overlay updates in ms
+g_overlay_interval = 250
+
+# phases of a frame
+g_profiler_phases = ("compute", "artists", "draw")
+
+
+class LatencyProfiler():
+    """
+    Collects the input events and the frame timing of an app.
+    """
+
+    def __init__(self, enabled=True, frame_budget=None):
+        """
+        :param enabled: False turns all methods into no-ops
+        :param frame_budget: frame time in ms for the dropped frames, None for g_frame_budget
+        """
+        self.enabled = enabled
+        self.frame_budget = g_frame_budget if frame_budget is None else frame_budget
+
+        self.events = 0             # number of input events
+        self.frames = []            # one dict per frame, see end_frame()
+        self.__pending_event = None # time of the oldest event not handled by a frame
+        self.__pending_count = 0
+        self.__frame_start = None
+        self.__last_mark = None
+        self.__phases = None
+        self.__recent = deque(maxlen=g_profiler_window)  # the last frames
+
+        self.__overlay = None
+        self.__overlay_update = -float("inf")
+
+    def event(self, *args):
+        """
+        Timestamp an input event. Takes and ignores the arguments of widget commands.
+        """
+        if not self.enabled:
+            return
+        self.events += 1
+        self.__pending_count += 1
+        if self.__pending_event is None:
+            self.__pending_event = time.perf_counter()
+
+    def begin_frame(self):
+        """
+        Start the timing of an update.
+        """
+        if not self.enabled:
+            return
+        self.__frame_start = time.perf_counter()
+        self.__last_mark = self.__frame_start
+        self.__phases = dict.fromkeys(g_profiler_phases, 0.0)
+
+    def mark(self, phase):
+        """
+        End a phase: the time since the last mark, or since begin_frame(), is added to the phase.
+        :param phase: "compute", "artists" or "draw"
+        """
+        if not self.enabled or self.__frame_start is None:
+            return
+        if phase not in g_profiler_phases:
+            raise ValueError("Unknown phase " + str(phase))
+
+        now = time.perf_counter()
+        self.__phases[phase] += now - self.__last_mark
+        self.__last_mark = now
+
+    def end_frame(self):
+        """
+        End the timing of an update and record the frame.
+        A frame without input events, e.g. the first one, has no latency.
+        """
+        if not self.enabled or self.__frame_start is None:
+            return
+
+        end = time.perf_counter()
+        frame = {"start": self.__frame_start, "end": end, "events": self.__pending_count,
+                 "frame_time": (end - self.__frame_start) * 1000.0}
+        for phase, duration in self.__phases.items():
+            frame[phase] = duration * 1000.0
+
+        if self.__pending_event is not None:
+            frame["latency"] = (end - self.__pending_event) * 1000.0
+            frame["dropped"] = max(0, math.ceil(frame["latency"] / self.frame_budget) - 1)
+        else:
+            frame["latency"] = None
+            frame["dropped"] = 0
+
+        self.frames.append(frame)
+        self.__recent.append(frame)
+        self.__pending_event = None
+        self.__pending_count = 0
+        self.__frame_start = None
+
+        if self.__overlay is not None and (end - self.__overlay_update) * 1000.0 >= g_overlay_interval:
+            self.__overlay_update = end
+            self.__overlay.configure(text=self.summary())
+
+    def fps(self):
+        """
+        :return: frames per second over the last g_profiler_window frames, 0 with less than two frames
+        """
+        if len(self.__recent) < 2 or self.__recent[-1]["end"] <= self.__recent[0]["end"]:
+            return 0.0
+        return (len(self.__recent) - 1) / (self.__recent[-1]["end"] - self.__recent[0]["end"])
+
+    def report(self, recent=False):
+        """
+        :param recent: True for the statistics of the last g_profiler_window frames only
+        :return: dict with the statistics of all frames; times in ms
+        """
+        frames = list(self.__recent) if recent else self.frames
+        events = sum(f["events"] for f in frames) if recent else self.events
+
+        latency = np.array([f["latency"] for f in frames if f["latency"] is not None])
+        result = {"frames": len(frames), "events": events, "frame_budget": self.frame_budget,
+                  "dropped_frames": int(sum(f["dropped"] for f in frames)), "fps": self.fps(),
+                  "latency": _percentiles(latency), "phases": {}}
+
+        for phase in g_profiler_phases + ("frame_time",):
+            result["phases"][phase] = _percentiles(np.array([f[phase] for f in frames]))
+        return result
+
+    def summary(self):
+        """
+        :return: short text with the latency percentiles, the dropped frames and fps of the last
+                 g_profiler_window frames
+        """
+        r = self.report(recent=True)
+        lat = r["latency"]
+        ph = r["phases"]
+        return ("latency p50 {:.1f} p90 {:.1f} p99 {:.1f} ms\n"
+                "compute {:.1f} artists {:.1f} draw {:.1f} ms\n"
+                "{:.0f} fps, {} dropped, {} events / {} frames").format(
+            lat["p50"], lat["p90"], lat["p99"], ph["compute"]["mean"], ph["artists"]["mean"], ph["draw"]["mean"],
+            r["fps"], r["dropped_frames"], r["events"], r["frames"])
+
+    def show_overlay(self, widget):
+        """
+        Show the summary in a label in the top right corner of the widget.
+        :param widget: a Tk container, e.g. the app Frame
+        """
+        if not self.enabled:
+            return
+        from tkinter import Label, NE
+        self.__overlay = Label(widget, text=self.summary(), justify="left", font=("Courier", 9),
+                               background="#ffffe0")
+        self.__overlay.place(relx=1.0, rely=0.0, anchor=NE)
+
+    def dump(self, path):
+        """
+        Write the report and all frames into a JSON file.
+        :param path: path and file name
+        """
+        if not self.enabled:
+            return
+        with open(path, "w") as f:
+            json.dump({"report": self.report(), "frames": self.frames}, f, indent=2)
+
+    def reset(self):
+        """
+        Drop all recorded events and frames.
+        """
+        self.events = 0
+        self.frames = []
+        self.__pending_event = None
+        self.__pending_count = 0
+        self.__recent.clear()
+
+
+def ParseProfilerArguments(description=None, argv=None):
+    """
+    Command line of the apps.
+    :param description: help text of the app
+    :param argv: list with the arguments, None for sys.argv
+    :return: argparse namespace with profile (bool) and profile_output (path or None)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--profile", action="store_true",
+                        help="measure the input-to-pixel latency and show it in an overlay")
+    parser.add_argument("--profile-output", default=None, metavar="FILE",
+                        help="write the latency report to this JSON file on exit (implies --profile)")
+    args = parser.parse_args(argv)
+    if args.profile_output is not None:
+        args.profile = True
+    return args
+
+
+def _percentiles(values):
+    """
+    :return: dict with the mean, the 50th, 90th and 99th percentile and the maximum, zeros for no values
+    """
+    if len(values) == 0:
+        return {"mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"mean": float(np.mean(values)), "p50": float(p50), "p90": float(p90), "p99": float(p99),
+            "max": float(np.max(values))}
@@ -0,0 +1,206 @@
+"""
+Parallel evaluation of batch functions over large arrays.
+
+ParallelEvaluator splits the input arrays into chunks of rows and evaluates them on a
+process or thread pool. With processes, inputs and outputs are placed in
+multiprocessing.shared_memory blocks once; the workers only receive the block names
+and the row range of their chunk, so no array data is pickled. Every chunk writes its
+results to its own rows of the output, so the results are in input order.
+
+Example:
+    evaluator = ParallelEvaluator(workers=32, chunk_size=1000000)
+    results = EvaluateAllCriteria(s1, s3, Sy=250, Sut=300, Suc=900, evaluator=evaluator)
+    vonMisesEq, FoS = results["vonmises"]
+"""
+import os
+import concurrent.futures
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ME325Common.FailureTheories import CalcVonMiesesFoSBatch, CalcTrescaFoSBatch, \
+    CalcPrincipalStressFoSBatch, CalcBrittleFoSBatch
+
+
+class ParallelEvaluator():
+    """
+    Runs a function chunk by chunk on a pool of workers.
+    """
+
+    workers = 1
+    chunk_size = 1000000
+    executor = "process"
+
+    def __init__(self, workers=None, chunk_size=1000000, executor="process"):
+        """
+        :param workers: number of workers, None for the number of CPUs
+        :param chunk_size: number of rows per chunk
+        :param executor: "process" or "thread". Threads only run in parallel where the
+                    function releases the GIL (most NumPy ufuncs, the numba kernels).
+        """
+        if executor not in ("process", "thread"):
+            raise ValueError("Unknown executor " + str(executor))
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.executor = executor
+
+    def map(self, func, inputs, **kwargs):
+        """
+        Evaluate func(*chunks, **kwargs) for all chunks and assemble the results.
+        :param func: function that takes one chunk of each input and returns a list of arrays with
+                    the same number of rows. For processes it has to be a module level function.
+        :param inputs: list of arrays with the same number of rows
+        :param kwargs: further (picklable) arguments for func, e.g. material strengths. Arrays with
+                    one value per row are split into chunks with the inputs; all other arguments
+                    are passed whole to every chunk.
+        :return: list of arrays with the results for all rows
+        """
+        inputs = [np.ascontiguousarray(a) for a in inputs]
+        rows = inputs[0].shape[0]
+        for a in inputs:
+            if a.shape[0] != rows:
+                raise ValueError("All inputs need the same number of rows")
+
+        # per-row arguments are chunked like the inputs and passed to func by name
+        row_names = [name for name, value in kwargs.items()
+                     if isinstance(value, np.ndarray) and value.ndim > 0 and value.shape[0] == rows]
+        inputs += [np.ascontiguousarray(kwargs.pop(name)) for name in row_names]
+
+        chunks = [(start, min(start + self.chunk_size, rows)) for start in range(0, rows, self.chunk_size)]
+        if len(chunks) == 0:
+            chunks = [(0, 0)]
+
+        # the first chunk tells the number, shapes and types of the outputs
+        first = _call_chunk(func, [a[chunks[0][0]:chunks[0][1]] for a in inputs], row_names, kwargs)
+        first = [np.asarray(r) for r in first]
+
+        if len(chunks) == 1:
+            return first
+
+        if self.executor == "thread" or self.workers == 1:
+            outputs = [np.empty((rows,) + r.shape[1:], dtype=r.dtype) for r in first]
+            for o, r in zip(outputs, first):
+                o[chunks[0][0]:chunks[0][1]] = r
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_evaluate_chunk_in_memory, func, inputs, outputs, start, stop,
+                                       row_names, kwargs)
+                           for start, stop in chunks[1:]]
+                for f in futures:
+                    f.result()
+            return outputs
+
+        return self.__map_processes(func, inputs, first, chunks, rows, row_names, kwargs)
+
+    def __map_processes(self, func, inputs, first, chunks, rows, row_names, kwargs):
+        blocks = []
+        input_specs = []
+        output_specs = []
+        try:
+            for a in inputs:
+                block = _create_shared(a.shape, a.dtype)
+                blocks.append(block)
+                _view(block, a.shape, a.dtype)[...] = a
+                input_specs.append((block.name, a.shape, a.dtype.str))
+
+            for r in first:
+                shape = (rows,) + r.shape[1:]
+                block = _create_shared(shape, r.dtype)
+                blocks.append(block)
+                _view(block, shape, r.dtype)[chunks[0][0]:chunks[0][1]] = r
+                output_specs.append((block.name, shape, r.dtype.str))
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_evaluate_chunk_shared, func, input_specs, output_specs, start, stop,
+                                       row_names, kwargs)
+                           for start, stop in chunks[1:]]
+                for f in futures:
+                    f.result()
+
+            outputs = blocks[len(inputs):]
+            return [np.array(_view(block, shape, dtype)) for block, (name, shape, dtype) in zip(outputs, output_specs)]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+
+def EvaluateAllCriteria(sigma_A, sigma_B, Sy, Sut, Suc, evaluator=None, backend=None):
+    """
+    Evaluate all failure theories of FailureTheories for arrays of principal stresses in parallel.
+    :param sigma_A: array with the first principal stresses
+    :param sigma_B: array with the second principal stresses
+    :param Sy: yield strength (von Mises, Tresca, principal stress), scalar or array with one value per row
+    :param Sut: ultimate tensile strength (MNST, MM, BCM), scalar or array with one value per row
+    :param Suc: ultimate compression strength (MNST, MM, BCM), scalar or array with one value per row
+    :param evaluator: the ParallelEvaluator, None for one with default settings
+    :param backend: compute backend for the batch functions, None for the global one
+    :return: dict with "vonmises" and "tresca": [stress, FoS], "principal": FoS,
+             "MNST", "MM" and "BCM": [stress, FoS, case]
+    """
+    if evaluator is None:
+        evaluator = ParallelEvaluator()
+
+    results = evaluator.map(_evaluate_all_criteria, [np.asarray(sigma_A, dtype=np.float64),
+                                                     np.asarray(sigma_B, dtype=np.float64)],
+                            Sy=_as_float(Sy), Sut=_as_float(Sut), Suc=_as_float(Suc), backend=backend)
+
+    return {"vonmises": results[0:2],
+            "tresca": results[2:4],
+            "principal": results[4],
+            "MNST": results[5:8],
+            "MM": results[8:11],
+            "BCM": results[11:14]}
+
+
+def _as_float(value):
+    return value if np.ndim(value) == 0 else np.asarray(value, dtype=np.float64)
+
+
+def _evaluate_all_criteria(sigma_A, sigma_B, Sy, Sut, Suc, backend):
+    results = []
+    results += CalcVonMiesesFoSBatch(sigma_A, sigma_B, Sy, backend)
+    results += CalcTrescaFoSBatch(sigma_A, sigma_B, Sy, backend)
+    results.append(CalcPrincipalStressFoSBatch(sigma_A, sigma_B, Sy))
+    for theory in ("MNST", "MM", "BCM"):
+        results += CalcBrittleFoSBatch(sigma_A, sigma_B, Sut, Suc, theory, backend)
+    return results
+
+
+def _create_shared(shape, dtype):
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    return shared_memory.SharedMemory(create=True, size=size)
+
+
+def _view(block, shape, dtype):
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _call_chunk(func, chunks, row_names, kwargs):
+    """
+    Call func with the chunks of the inputs; the last len(row_names) chunks are per-row keyword arguments.
+    """
+    count = len(chunks) - len(row_names)
+    return func(*chunks[:count], **kwargs, **dict(zip(row_names, chunks[count:])))
+
+
+def _evaluate_chunk_in_memory(func, inputs, outputs, start, stop, row_names, kwargs):
+    results = _call_chunk(func, [a[start:stop] for a in inputs], row_names, kwargs)
+    for o, r in zip(outputs, results):
+        o[start:stop] = r
+
+
+def _evaluate_chunk_shared(func, input_specs, output_specs, start, stop, row_names, kwargs):
+    blocks = [shared_memory.SharedMemory(name=name) for name, shape, dtype in input_specs + output_specs]
+    try:
+        _evaluate_chunk_in_memory(func,
+                                  [_view(b, shape, dtype) for b, (name, shape, dtype) in zip(blocks, input_specs)],
+                                  [_view(b, shape, dtype) for b, (name, shape, dtype)
+                                   in zip(blocks[len(input_specs):], output_specs)],
+                                  start, stop, row_names, kwargs)
+    finally:
+        for block in blocks:
+            block.close()
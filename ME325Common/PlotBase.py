@@ -9,6 +9,15 @@ rafael@iastate.edu
 Dec 27, 2018
 
 All copyright reserved
+
+Blit mode
+Most updates change only a few artists (load points, load lines, labels), but draw_idle()
+redraws the whole figure with grid, ticks, legend and mathtext. With enable_blit(), the
+artists a plot registers with set_dynamic_artists() are animated: a full draw renders
+everything else, and the result is cached as the background. draw() then restores the
+background and draws only the dynamic artists. The background is captured again after
+every full draw, e.g. after a resize, and draw() does a full draw when the axis limits or
+the figure size changed. Plots call invalidate_background() when static content changes.
 """
 
 
@@ -17,6 +26,12 @@ g_plot_number = 0
 
 class PlotBase():
 
+    # blit mode, see enable_blit()
+    __blit_canvas = None
+    __blit_connection = None
+    __blit_background = None
+    __blit_state = None
+    __dynamic_artists = ()
 
     @staticmethod
     def GetPlotNumber():
@@ -38,4 +53,117 @@ class PlotBase():
                     Note that the ending needs to be .png or .jpg, the file type to save.
         :return:
         """
-        fig.savefig(path_and_file)
\ No newline at end of file
+        fig.savefig(path_and_file)
+
+
+    def set_dynamic_artists(self, artists):
+        """
+        Register the artists that change on updates.
+        :param artists: list of artists; nested lists are flattened
+        :return:
+        """
+        flat = []
+        for a in artists:
+            if isinstance(a, (list, tuple)):
+                flat.extend(a)
+            else:
+                flat.append(a)
+        self.__dynamic_artists = tuple(flat)
+
+        if self.__blit_canvas is not None:
+            for a in self.__dynamic_artists:
+                a.set_animated(True)
+            self.invalidate_background()
+
+
+    def enable_blit(self, canvas):
+        """
+        Draw the dynamic artists with blitting on this canvas, see draw().
+        :param canvas: the canvas of the plot's figure, e.g. a FigureCanvasTkAgg
+        :return: True if the canvas supports blitting, else the plot keeps drawing with draw_idle()
+        """
+        if not getattr(canvas, "supports_blit", False):
+            return False
+
+        self.disable_blit()
+        self.__blit_canvas = canvas
+        self.__blit_connection = canvas.mpl_connect("draw_event", self.__on_draw)
+        for a in self.__dynamic_artists:
+            a.set_animated(True)
+        self.invalidate_background()
+        return True
+
+
+    def disable_blit(self):
+        """
+        Switch back to full redraws.
+        :return:
+        """
+        if self.__blit_canvas is None:
+            return
+
+        self.__blit_canvas.mpl_disconnect(self.__blit_connection)
+        for a in self.__dynamic_artists:
+            a.set_animated(False)
+        self.__blit_canvas = None
+        self.__blit_connection = None
+        self.__blit_background = None
+
+
+    def invalidate_background(self):
+        """
+        The static content changed; the next draw() is a full draw.
+        :return:
+        """
+        self.__blit_background = None
+
+
+    def draw(self, canvas):
+        """
+        Show the updated plot. Blits the dynamic artists if blitting is enabled for this canvas,
+        otherwise calls canvas.draw_idle().
+        :param canvas: the canvas of the plot's figure
+        :return:
+        """
+        if canvas is not self.__blit_canvas:
+            canvas.draw_idle()
+            return
+
+        if self.__blit_background is None or self.__blit_state != self.__get_state():
+            # the full draw captures the new background in __on_draw
+            canvas.draw()
+            return
+
+        canvas.restore_region(self.__blit_background)
+        self.__draw_dynamic_artists()
+        canvas.blit(canvas.figure.bbox)
+
+
+    def __on_draw(self, event):
+        """
+        Callback of the canvas after every full draw: cache the background, add the dynamic artists.
+        """
+        canvas = self.__blit_canvas
+        if canvas is None or (event is not None and event.canvas is not canvas):
+            return
+
+        self.__blit_background = canvas.copy_from_bbox(canvas.figure.bbox)
+        self.__blit_state = self.__get_state()
+        self.__draw_dynamic_artists()
+
+
+    def __draw_dynamic_artists(self):
+        figure = self.__blit_canvas.figure
+        for a in self.__dynamic_artists:
+            figure.draw_artist(a)
+
+
+    def __get_state(self):
+        """
+        :return: the figure size and the limits of all axes; the background is only valid for this state
+        """
+        figure = self.__blit_canvas.figure
+        state = [tuple(figure.bbox.bounds)]
+        for axis in figure.axes:
+            state.append(tuple(axis.get_xlim()) + tuple(axis.get_ylim()))
+        return tuple(state)
@@ -21,6 +21,11 @@ from ME325Common.PlotBase import *
 
 g_plot_path = "./plots"
 
+# Mohr's circle view: the axis limits only change when the circle leaves the view or gets smaller
+# than g_mohr_shrink times the view; the new view is g_mohr_margin times the circle
+g_mohr_margin = 1.5
+g_mohr_shrink = 0.4
+
 
 class DuctileFailureTheoriesPlot(PlotBase):
     """
@@ -98,6 +103,9 @@ class DuctileFailureTheoriesPlot(PlotBase):
         plt.ylim(-Sy - 40, Sy + 40)
         plt.legend(loc=2)
 
+        # the artists update_plot() changes, drawn with blitting if enabled
+        self.set_dynamic_artists([self.mises_plt, self.tresca_plt, self.load_line_plt, self.principal_stress_plt])
+
         return self.fig
 
 
@@ -249,6 +257,9 @@ class SNDiagramPlot(PlotBase):
         self.axis.set_xlim([1, max_n])
         self.axis.set_ylim([0, Sut + 10])
 
+        # the artists update_plot() changes, drawn with blitting if enabled
+        self.set_dynamic_artists([self.sn_plt, self.load_line_plt, self.life_line_plt, self.text_plt])
+
         return self.fig
 
     def update_plot(self, Sut, Sy, Se, N_lcc, N_inv, curr_N, curr_Sf):
@@ -379,6 +390,11 @@ class FatigueDiagramPlot(PlotBase):
         self.axis.set_xlim([0, Sut + 10])
         self.axis.set_ylim([0, Sy ])
 
+        # the artists update_plot() changes, drawn with blitting if enabled
+        self.set_dynamic_artists([self.__goodman_line_plt, self.__gerber_line_plt, self.__sonderberg_line_plt,
+                                  self.__yieldstress_line_plt, self.__helper_lines[0], self.__load_line,
+                                  self.__load_point, self.__helper_text])
+
         return self.fig
 
 
@@ -426,6 +442,7 @@ class FatigueDiagramPlot(PlotBase):
         :return:
         """
         plt.figure(self.__plot_number)
+        self.invalidate_background()
 
         if unit_ == 0:
             plt.xlabel(str(r"Midrange stress $\sigma_m$ " + self.__unit_si), fontsize=11)
@@ -633,6 +650,9 @@ class MohrsCirclePlot(PlotBase):
         self.axis.set_xlim([s_mean - length, s_mean + length])
         self.axis.set_ylim([-length, length])
 
+        # the artists update_plot() changes, drawn with blitting if enabled
+        self.set_dynamic_artists([self.__plot[0:5], self.__text_plt, self.__helper_plt, self.__acr_plt, self.__center_plt])
+
         return self.fig
 
 
@@ -653,6 +673,22 @@ class MohrsCirclePlot(PlotBase):
 
         plt.figure(self.__plot_number)
         length = R +  R * 0.2 #np.max([np.max([np.abs(sx) / 2 + 30, np.abs(txy) + 30]), np.abs(sy) / 2 + 30])
+        self.__update_view(s_mean, length)
+
+
+    def __update_view(self, s_mean, length):
+        """
+        Keep the axis limits while the circle fits into the view, so that the updates can be blitted.
+        :param s_mean: center of the circle
+        :param length: half the width of the area the circle needs
+        """
+        x_min, x_max = self.axis.get_xlim()
+        y_min, y_max = self.axis.get_ylim()
+        inside = x_min <= s_mean - length and s_mean + length <= x_max and y_min <= -length and length <= y_max
+        if inside and length >= g_mohr_shrink * (x_max - x_min) / 2:
+            return
+
+        length = length * g_mohr_margin
         self.axis.set_xlim([s_mean - length, s_mean + length])
         self.axis.set_ylim([-length, length])
 
@@ -792,6 +828,7 @@ class MohrsCirclePlot(PlotBase):
         """
 
         plt.figure(self.__plot_number)
+        self.invalidate_background()
         if unit == 0:
             plt.xlabel(str(r"Normal stress $\sigma$ " + self.__unit_si), fontsize=11)
             plt.ylabel(str(r"Shear stress $\tau$ " + self.__unit_si), fontsize=11)
@@ -915,6 +952,10 @@ class CauchyStressPlanePlot(PlotBase):
         self.axis.set_ylim([-self.__axis_length, self.__axis_length])
 
 
+        # the artists update_plot() changes, drawn with blitting if enabled
+        self.set_dynamic_artists([self.__box[1], self.__text_plt, self.__arc_plt,
+                                  [a.arrow for a in self.__new_arrow], [a.head for a in self.__new_arrow]])
+
         return self.fig
 
 
@@ -0,0 +1,213 @@
+"""
+Streaming rainflow cycle counting (ASTM E1049, four-point method).
+
+A load history is passed to RainflowCounter.process() in chunks as it arrives. Each
+chunk is reduced to its turning points with NumPy, and the turning points go through
+the four-point stack: for four consecutive points s1..s4, the inner range |s3 - s2| is a
+full cycle if it is not larger than |s2 - s1| and |s4 - s3|. Between chunks only the
+current extreme and the residual stack are kept, so memory does not grow with the
+length of the history. finish() counts the residue as half cycles.
+
+The stack loop is sequential; with the numba backend (see ComputeBackends) it runs
+as a compiled loop, otherwise in Python.
+
+Cycles are returned as arrays (range, mean, count) with count 1.0 for full cycles and
+0.5 for half cycles. The range is the full range, the amplitude is range / 2.
+
+Example:
+    counter = RainflowCounter()
+    for chunk in history_chunks:
+        ranges, means, counts = counter.process(chunk)
+    ranges, means, counts = counter.finish()
+"""
+import concurrent.futures
+
+import numpy as np
+
+from ME325Common.ComputeBackends import GetKernel
+
+
+class RainflowCounter():
+    """
+    Rainflow counter for one channel.
+    """
+
+    def __init__(self, backend=None):
+        """
+        :param backend: compute backend for the stack loop, None for the global one (see ComputeBackends)
+        """
+        self.backend = backend
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the history and start a new one.
+        """
+        self.__stack = np.empty(0)
+        self.__candidate = None     # current extreme, not yet a turning point
+        self.__direction = 0        # sign of the last change, 0 while the history is constant
+        self.__samples = 0
+
+    @property
+    def samples(self):
+        """
+        :return: the number of samples processed since the last reset
+        """
+        return self.__samples
+
+    @property
+    def residue(self):
+        """
+        :return: the turning points on the stack that are not closed as cycles yet
+        """
+        return self.__stack.copy()
+
+    def process(self, chunk):
+        """
+        Count the cycles that close within the next chunk of the history.
+        :param chunk: 1D array with the next samples
+        :return: arrays (ranges, means, counts) of the full cycles counted
+        """
+        chunk = np.asarray(chunk, dtype=np.float64).ravel()
+        self.__samples += chunk.shape[0]
+
+        points = self.__turning_points(chunk)
+        self.__stack, ranges, means = _four_point(points, self.__stack, self.backend)
+
+        return ranges, means, np.ones(ranges.shape[0])
+
+    def finish(self):
+        """
+        End the history: the last sample is a turning point, and the residual stack
+        is counted as half cycles. The counter is reset afterwards.
+        :return: arrays (ranges, means, counts) of the last full cycles and the half cycles
+        """
+        points = np.empty(0)
+        if self.__direction != 0:
+            points = np.array([self.__candidate])
+
+        stack, ranges, means = _four_point(points, self.__stack, self.backend)
+
+        half_ranges = np.abs(np.diff(stack))
+        half_means = (stack[:-1] + stack[1:]) / 2
+
+        self.reset()
+
+        return np.concatenate((ranges, half_ranges)), \
+               np.concatenate((means, half_means)), \
+               np.concatenate((np.ones(ranges.shape[0]), np.full(half_ranges.shape[0], 0.5)))
+
+    def __turning_points(self, x):
+        """
+        Peaks and valleys of the chunk that are confirmed by a change of direction.
+        Plateaus count as one point. The last extreme stays a candidate until the next chunk.
+        """
+        start = np.empty(0)
+        if x.shape[0] == 0:
+            return start
+
+        if self.__candidate is None:
+            # the first sample of a history is a turning point
+            start = x[:1]
+            self.__candidate = x[0]
+
+        values = np.concatenate(([self.__candidate], x))
+        moving = np.flatnonzero(np.diff(values))
+        if moving.shape[0] == 0:
+            return start
+
+        sign = np.sign(values[moving + 1] - values[moving])
+        reversal = np.flatnonzero(sign[1:] != sign[:-1]) + 1
+        points = values[moving[reversal]]
+
+        if self.__direction != 0 and sign[0] != self.__direction:
+            # the candidate of the last chunk was an extreme
+            points = np.concatenate(([self.__candidate], points))
+
+        self.__candidate = values[-1]
+        self.__direction = sign[-1]
+
+        return np.concatenate((start, points))
+
+
+class RainflowCounterBank():
+    """
+    Rainflow counters for several channels of the same history. The channels are counted
+    on a thread pool. They run in parallel with the numba backend, whose loops release the GIL.
+    """
+
+    def __init__(self, channels, workers=None, backend=None):
+        """
+        :param channels: number of channels
+        :param workers: number of threads, None for one per channel
+        :param backend: compute backend for the stack loop, None for the global one (see ComputeBackends)
+        """
+        self.counters = [RainflowCounter(backend) for i in range(channels)]
+        self.workers = workers if workers is not None else channels
+
+    def process(self, chunk):
+        """
+        :param chunk: array of shape (n, channels) with the next samples
+        :return: list with the cycle arrays (ranges, means, counts) of each channel
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.ndim != 2 or chunk.shape[1] != len(self.counters):
+            raise ValueError("Expected a chunk of shape (n, " + str(len(self.counters)) + ")")
+
+        return self.__map(lambda i: self.counters[i].process(chunk[:, i]))
+
+    def finish(self):
+        """
+        :return: list with the last cycle arrays (ranges, means, counts) of each channel
+        """
+        return self.__map(lambda i: self.counters[i].finish())
+
+    def __map(self, func):
+        if self.workers <= 1 or len(self.counters) == 1:
+            return [func(i) for i in range(len(self.counters))]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(func, range(len(self.counters))))
+
+
+def CountRainflow(history, chunk_size=1000000, backend=None):
+    """
+    Count all cycles of a history that is in memory.
+    :param history: 1D array with the load history
+    :param chunk_size: number of samples passed to the counter at a time
+    :param backend: compute backend for the stack loop, None for the global one (see ComputeBackends)
+    :return: arrays (ranges, means, counts)
+    """
+    history = np.asarray(history, dtype=np.float64).ravel()
+    counter = RainflowCounter(backend)
+
+    results = [counter.process(history[i:i + chunk_size]) for i in range(0, history.shape[0], chunk_size)]
+    results.append(counter.finish())
+
+    return [np.concatenate([r[k] for r in results]) for k in range(3)]
+
+
+def _four_point(points, stack, backend):
+    """
+    Push the turning points on the stack and remove the closed cycles.
+    :return: the new stack, the ranges and the means of the closed cycles
+    """
+    kernel = GetKernel("rainflow_four_point", backend)
+    if kernel is not None:
+        return kernel(points, stack)
+
+    s = stack.tolist()
+    ranges = []
+    means = []
+    for p in points.tolist():
+        s.append(p)
+        while len(s) >= 4:
+            inner = abs(s[-2] - s[-3])
+            if inner <= abs(s[-3] - s[-4]) and inner <= abs(s[-1] - s[-2]):
+                ranges.append(inner)
+                means.append((s[-2] + s[-3]) / 2)
+                del s[-3:-1]
+            else:
+                break
+
+    return [np.array(s, dtype=np.float64), np.array(ranges, dtype=np.float64), np.array(means, dtype=np.float64)]
@@ -0,0 +1,83 @@
+"""
+Coalesced updates for the Tk apps.
+
+A ttk Scale calls its command for every intermediate position while it is dragged. If every
+call computes the results and redraws the matplotlib canvas, the app falls behind the cursor.
+RenderScheduler merges these calls: request() only marks the app as changed, and the
+update runs once, through after_idle() when the last update is longer than one frame ago,
+otherwise through after() at the start of the next frame. Requests that arrive while an
+update is pending are merged into it. The update reads the current slider values itself,
+so the merged requests lose nothing.
+
+The frame budget is the minimum time between two updates, in ms; g_frame_budget is the default.
+
+Example (in a Frame):
+    self.render_scheduler = RenderScheduler(self, self.apply_values)
+    Scale(self, ..., command=lambda val: self.render_scheduler.request())
+"""
+import time
+
+
+# default minimum time between two updates, in ms (60 frames per second)
+g_frame_budget = 16
+
+
+class RenderScheduler():
+    """
+    Runs a callback at most once per frame, after the requests of that frame.
+    """
+
+    def __init__(self, widget, callback, frame_budget=None):
+        """
+        :param widget: any Tk widget, for after() and after_idle()
+        :param callback: function without arguments that computes the results and redraws
+        :param frame_budget: minimum time between two updates in ms, None for g_frame_budget
+        """
+        self.widget = widget
+        self.callback = callback
+        self.frame_budget = g_frame_budget if frame_budget is None else frame_budget
+
+        self.requests = 0           # number of requests
+        self.updates = 0            # number of callback runs
+        self.__pending = None       # id of the scheduled after() call
+        self.__last_update = -float("inf")
+
+    def request(self, *args):
+        """
+        Request an update. Takes and ignores the arguments of widget commands.
+        """
+        self.requests += 1
+        if self.__pending is not None:
+            return
+
+        wait = self.__last_update + self.frame_budget / 1000.0 - time.perf_counter()
+        if wait <= 0.0:
+            self.__pending = self.widget.after_idle(self.__run)
+        else:
+            self.__pending = self.widget.after(max(1, int(wait * 1000.0 + 0.5)), self.__run)
+
+    def flush(self):
+        """
+        Run a pending update now.
+        """
+        if self.__pending is not None:
+            self.widget.after_cancel(self.__pending)
+            self.__run()
+
+    def cancel(self):
+        """
+        Drop a pending update, e.g. before the widget is destroyed.
+        """
+        if self.__pending is not None:
+            self.widget.after_cancel(self.__pending)
+            self.__pending = None
+
+    @property
+    def pending(self):
+        return self.__pending is not None
+
+    def __run(self):
+        self.__pending = None
+        self.__last_update = time.perf_counter()
+        self.updates += 1
+        self.callback()
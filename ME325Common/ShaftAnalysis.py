@@ -0,0 +1,410 @@
+"""
+Station-by-station fatigue check of shafts.
+
+A Shaft holds the diameter steps and the stress concentration features (shoulders, keyways,
+retaining ring grooves) with their fatigue stress concentration factors Kf (bending) and
+Kfs (torsion). ShaftFatiguePipeline evaluates a BeamLoadModel at thousands of stations
+along the shaft and calculates, for solid round sections,
+
+    sigma_a = Kf 32 Ma / (pi d^3),   tau_a = Kfs 16 Ta / (pi d^3)      (same for the mean stresses)
+    sigma_a' = sqrt(sigma_a^2 + 3 tau_a^2),   sigma_m' = sqrt(sigma_m^2 + 3 tau_m^2)
+
+and the FoS of all criteria of FatigueDiagram.calc_all_FoS from the von Mises stresses.
+Everything is evaluated as arrays over all stations and all load cases of the load model.
+
+For a rotating shaft with steady loads, the bending moment is fully reversed and the torque
+is steady; evaluate_rotating() uses this split. evaluate() takes separate load models
+for the alternating and the mean loads.
+
+At a diameter step, the station uses the smaller diameter. The feature positions are
+always added to the stations, so that the stress concentrations are not missed.
+
+Units have to be consistent, e.g. lengths in in, moments in lbf-in and strengths in psi.
+
+Example:
+    shaft = Shaft([5.0, 12.0, 17.0], [1.2, 1.5, 1.2])
+    shaft.add_feature(5.0, Kf=1.5, Kfs=1.7)         # shoulder
+    pipeline = ShaftFatiguePipeline(shaft, Se=30000, Sut=110000, Sy=90000)
+    result = pipeline.evaluate_rotating(loads)       # loads: BeamLoadModel
+    print(result.critical_x, result.minimum)
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from ME325Common.DynamicLoadTheories import FatigueDiagram, g_fatigue_criteria
+
+
+class ShaftFatigueResult(NamedTuple):
+    """
+    Result of ShaftFatiguePipeline.evaluate(). Station arrays have the shape (stations,),
+    stress and FoS arrays (stations,) or (cases, stations) for several load cases.
+    """
+    x: np.ndarray               # stations
+    diameter: np.ndarray        # diameter at the stations
+    Kf: np.ndarray              # bending stress concentration factor at the stations
+    Kfs: np.ndarray             # torsional stress concentration factor at the stations
+    sigma_a: np.ndarray         # von Mises alternating stress
+    sigma_m: np.ndarray         # von Mises mean stress
+    fos: object                 # FatigueFoS of all criteria
+    criterion_fos: np.ndarray   # FoS of the selected criterion
+    critical_index: np.ndarray  # station index of the smallest FoS (per load case)
+    critical_x: np.ndarray      # position of the smallest FoS (per load case)
+    minimum: np.ndarray         # smallest FoS (per load case)
+
+
+class Shaft():
+    """
+    Stepped solid round shaft with stress concentration features.
+    """
+
+    def __init__(self, step_ends, diameters):
+        """
+        :param step_ends: array with the end positions of the shaft sections, the last one is the shaft length
+        :param diameters: array with the diameter of each section
+        """
+        self.step_ends = np.asarray(step_ends, dtype=np.float64).ravel()
+        self.diameters = np.asarray(diameters, dtype=np.float64).ravel()
+
+        if self.step_ends.shape != self.diameters.shape or self.step_ends.shape[0] == 0:
+            raise ValueError("Expected one diameter per shaft section")
+        if np.any(np.diff(self.step_ends) <= 0.0) or self.step_ends[0] <= 0.0:
+            raise ValueError("The section ends need to increase")
+
+        self.__features = []    # (x, Kf, Kfs, width)
+
+    @property
+    def length(self):
+        return self.step_ends[-1]
+
+    def add_feature(self, x, Kf=1.0, Kfs=1.0, width=0.0):
+        """
+        Add a stress concentration feature.
+        :param x: position (center) of the feature
+        :param Kf: fatigue stress concentration factor for bending
+        :param Kfs: fatigue stress concentration factor for torsion
+        :param width: length of the shaft the feature covers, 0 for a shoulder or groove
+        """
+        if x < 0.0 or x > self.length:
+            raise ValueError("Position " + str(x) + " is not on the shaft")
+        self.__features.append((x, Kf, Kfs, width))
+
+    def features(self):
+        """
+        :return: list with the features (x, Kf, Kfs, width)
+        """
+        return list(self.__features)
+
+    def stations(self, count=2000):
+        """
+        :param count: number of equally spaced stations
+        :return: sorted array with the stations, including the feature positions and the diameter steps
+        """
+        x = np.linspace(0.0, self.length, count)
+        return np.unique(np.concatenate((x, [f[0] for f in self.__features], self.step_ends[:-1])))
+
+    def diameter(self, x):
+        """
+        :param x: array with stations
+        :return: the diameters; at a step, the smaller one
+        """
+        x = np.asarray(x, dtype=np.float64)
+        last = self.diameters.shape[0] - 1
+        left = self.diameters[np.minimum(np.searchsorted(self.step_ends, x, side='left'), last)]
+        right = self.diameters[np.minimum(np.searchsorted(self.step_ends, x, side='right'), last)]
+        return np.minimum(left, right)
+
+    def stress_concentration(self, x):
+        """
+        :param x: array with stations
+        :return: arrays Kf, Kfs; where features overlap, the largest factors
+        """
+        x = np.asarray(x, dtype=np.float64)
+        Kf = np.ones(x.shape)
+        Kfs = np.ones(x.shape)
+        for position, kf, kfs, width in self.__features:
+            covered = np.abs(x - position) <= width / 2
+            Kf = np.where(covered, np.maximum(Kf, kf), Kf)
+            Kfs = np.where(covered, np.maximum(Kfs, kfs), Kfs)
+        return Kf, Kfs
+
+
+class ShaftFatiguePipeline():
+    """
+    Fatigue FoS of a shaft at all stations.
+    """
+
+    def __init__(self, shaft, Se, Sut, Sy, criterion="Goodman", backend=None):
+        """
+        :param shaft: Shaft
+        :param Se: endurance limit (Marin factors applied), scalar or array over the stations
+        :param Sut: ultimate tensile strength
+        :param Sy: yield strength
+        :param criterion: criterion for the critical station, one of g_fatigue_criteria or "minimum"
+                          for the smallest FoS of all criteria
+        :param backend: compute backend for the FoS, None for the global one (see ComputeBackends)
+        """
+        if criterion != "minimum" and criterion not in g_fatigue_criteria:
+            raise ValueError("Unknown criterion " + str(criterion))
+
+        self.shaft = shaft
+        self.Se = Se
+        self.Sut = Sut
+        self.Sy = Sy
+        self.criterion = criterion
+        self.backend = backend
+
+    def evaluate_rotating(self, loads, x=None, stations=2000):
+        """
+        Rotating shaft with steady loads: fully reversed bending and steady torque.
+        :param loads: BeamLoadModel
+        :param x: array with the stations, None for Shaft.stations(stations)
+        :param stations: number of stations if x is None
+        :return: ShaftFatigueResult
+        """
+        x = self.shaft.stations(stations) if x is None else np.asarray(x, dtype=np.float64)
+        values = loads.evaluate(x)
+        return self.evaluate_moments(x, values["M"], 0.0, 0.0, values["T"])
+
+    def evaluate(self, alternating=None, mean=None, x=None, stations=2000):
+        """
+        :param alternating: BeamLoadModel with the alternating loads, None for none
+        :param mean: BeamLoadModel with the mean loads, None for none
+        :param x: array with the stations, None for Shaft.stations(stations)
+        :param stations: number of stations if x is None
+        :return: ShaftFatigueResult
+        """
+        x = self.shaft.stations(stations) if x is None else np.asarray(x, dtype=np.float64)
+
+        Ma, Ta, Mm, Tm = 0.0, 0.0, 0.0, 0.0
+        if alternating is not None:
+            values = alternating.evaluate(x)
+            Ma, Ta = values["M"], values["T"]
+        if mean is not None:
+            values = mean.evaluate(x)
+            Mm, Tm = values["M"], values["T"]
+
+        return self.evaluate_moments(x, Ma, Ta, Mm, Tm)
+
+    def evaluate_moments(self, x, Ma, Ta, Mm, Tm):
+        """
+        :param x: array with the stations (stations,)
+        :param Ma: alternating bending moments, broadcast to (stations,) or (cases, stations)
+        :param Ta: alternating torques
+        :param Mm: mean bending moments
+        :param Tm: mean torques
+        :return: ShaftFatigueResult
+        """
+        x = np.asarray(x, dtype=np.float64)
+        d = self.shaft.diameter(x)
+        Kf, Kfs = self.shaft.stress_concentration(x)
+
+        # section moduli of the solid round section, 1 / (pi d^3 / 32)
+        bending = 32.0 / (np.pi * d ** 3)
+        torsion = bending / 2
+
+        sigma_a = Kf * bending * np.abs(Ma)
+        sigma_m = Kf * bending * np.abs(Mm)
+        tau_a = Kfs * torsion * np.abs(Ta)
+        tau_m = Kfs * torsion * np.abs(Tm)
+
+        sigma_a = np.sqrt(sigma_a * sigma_a + 3.0 * tau_a * tau_a)
+        sigma_m = np.sqrt(sigma_m * sigma_m + 3.0 * tau_m * tau_m)
+        sigma_a, sigma_m = np.broadcast_arrays(sigma_a, sigma_m)
+
+        fos = FatigueDiagram.calc_all_FoS(sigma_a, sigma_m, self.Se, self.Sut, self.Sy, self.backend)
+        if self.criterion == "minimum":
+            criterion_fos = fos.minimum
+        else:
+            criterion_fos = fos[g_fatigue_criteria.index(self.criterion)]
+
+        critical = np.argmin(criterion_fos, axis=-1)
+        minimum = np.take_along_axis(criterion_fos, np.expand_dims(critical, -1), axis=-1)[..., 0]
+
+        return ShaftFatigueResult(x, d, Kf, Kfs, sigma_a, sigma_m, fos, criterion_fos,
+                                  critical, x[critical], minimum)
+
+
+# criteria of ShaftDiameterSolver
+g_diameter_criteria = ("Goodman", "Gerber", "ASME", "Soderberg")
+
+
+def CalcSizeFactor(d, loading="bending", units="in"):
+    """
+    Marin size factor kb of round bars in bending and torsion (Shigley):
+        in: 0.879 d^-0.107 for 0.11 <= d <= 2,  0.91 d^-0.157 for 2 < d <= 10
+        mm: 1.24 d^-0.107 for 2.79 <= d <= 51,  1.51 d^-0.157 for 51 < d <= 254
+    Diameters outside the range use the factor at the range limit.
+    :param d: array with the diameters
+    :param loading: "bending", "torsion" or "axial" (kb = 1)
+    :param units: "in" or "mm"
+    :return: array with kb
+    """
+    d = np.asarray(d, dtype=np.float64)
+    if loading == "axial":
+        return np.ones(d.shape)
+    if loading not in ("bending", "torsion"):
+        raise ValueError("Unknown loading " + str(loading))
+
+    if units == "in":
+        lower, step, upper, c1, c2 = 0.11, 2.0, 10.0, 0.879, 0.91
+    elif units == "mm":
+        lower, step, upper, c1, c2 = 2.79, 51.0, 254.0, 1.24, 1.51
+    else:
+        raise ValueError("Unknown units " + str(units))
+
+    d = np.clip(d, lower, upper)
+    return np.where(d <= step, c1 * d ** -0.107, c2 * d ** -0.157)
+
+
+class ShaftDiameterResult(NamedTuple):
+    """
+    Result of ShaftDiameterSolver.solve(). Arrays have the broadcast shape of the loads.
+    """
+    diameter: np.ndarray        # minimum diameter
+    Se: np.ndarray              # endurance limit at this diameter
+    kb: np.ndarray              # size factor at this diameter
+    iterations: np.ndarray      # fixed-point iterations until convergence
+    converged: np.ndarray       # True where the iteration converged
+    statistics: dict            # convergence statistics, see ShaftDiameterSolver.solve()
+
+
+class ShaftDiameterSolver():
+    """
+    Minimum shaft diameters by the distortion energy (DE) criteria, Shigley eq. 7-8 to 7-16, with
+        A = sqrt(4 (Kf Ma)^2 + 3 (Kfs Ta)^2),   B = sqrt(4 (Kf Mm)^2 + 3 (Kfs Tm)^2):
+        DE-Goodman:    d^3 = 16 n / pi * (A / Se + B / Sut)
+        DE-Gerber:     d^3 = 8 n / pi * (A / Se + sqrt((A / Se)^2 + (2 B / Sut)^2))
+        DE-ASME:       d^3 = 16 n / pi * sqrt((A / Se)^2 + (B / Sy)^2)
+        DE-Soderberg:  d^3 = 16 n / pi * (A / Se + B / Sy)
+    The endurance limit Se = ka kb kc kd ke kf Se' depends on the diameter through the size
+    factor kb(d). The equations are solved by the fixed-point iteration d_k+1 = d(Se(d_k)),
+    starting from kb = 1, for all stations and load cases at once. Since d^3 ~ 1 / kb ~ d^0.107,
+    the iteration contracts by about 0.04 per step and converges in a few iterations.
+    Where the fixed point falls into the small jump of kb(d) at the range limit (2 in, 51 mm),
+    the iteration alternates between two diameters; these elements are reported as not
+    converged and get the larger diameter.
+    """
+
+    def __init__(self, Se_prime, Sut, Sy, criterion="Goodman", ka=1.0, kc=1.0, kd=1.0, ke=1.0, kf=1.0,
+                 loading="bending", units="in", rtol=1e-10, max_iterations=50):
+        """
+        :param Se_prime: rotating-beam endurance limit
+        :param Sut: ultimate tensile strength
+        :param Sy: yield strength
+        :param criterion: one of g_diameter_criteria
+        :param ka: surface factor
+        :param kc: load factor
+        :param kd: temperature factor
+        :param ke: reliability factor
+        :param kf: miscellaneous-effects factor
+        :param loading: loading for the size factor, see CalcSizeFactor
+        :param units: length units of the diameters, "in" or "mm"; the moments have to be consistent
+        :param rtol: relative tolerance of the diameters
+        :param max_iterations: maximum number of fixed-point iterations
+        """
+        if criterion not in g_diameter_criteria:
+            raise ValueError("Unknown criterion " + str(criterion))
+
+        self.Se_prime = Se_prime
+        self.Sut = Sut
+        self.Sy = Sy
+        self.criterion = criterion
+        self.k = ka * kc * kd * ke * kf
+        self.loading = loading
+        self.units = units
+        self.rtol = rtol
+        self.max_iterations = max_iterations
+
+    def solve(self, Ma, Ta=0.0, Mm=0.0, Tm=0.0, Kf=1.0, Kfs=1.0, n=1.0):
+        """
+        All arguments broadcast against each other.
+        :param Ma: alternating bending moments
+        :param Ta: alternating torques
+        :param Mm: mean bending moments
+        :param Tm: mean torques
+        :param Kf: fatigue stress concentration factors for bending
+        :param Kfs: fatigue stress concentration factors for torsion
+        :param n: design factors
+        :return: ShaftDiameterResult; statistics holds the mean and maximum number of iterations,
+                 the number of unconverged elements and the largest relative change in the last iteration
+        """
+        Ma, Ta, Mm, Tm, Kf, Kfs, n = np.broadcast_arrays(
+            *[np.asarray(x, dtype=np.float64) for x in (Ma, Ta, Mm, Tm, Kf, Kfs, n)])
+        shape = Ma.shape
+
+        # flat arrays, also for scalar inputs, so that the active elements can be updated in place
+        A = np.sqrt(4.0 * (Kf * Ma) ** 2 + 3.0 * (Kfs * Ta) ** 2).ravel()
+        B = np.sqrt(4.0 * (Kf * Mm) ** 2 + 3.0 * (Kfs * Tm) ** 2).ravel()
+        n = n.ravel()
+
+        Se = self.k * self.Se_prime
+        d = np.array(self.__diameter(A, B, n, Se), dtype=np.float64, ndmin=1)
+        iterations = np.zeros(d.shape, dtype=np.int64)
+        change = np.full(d.shape, np.inf)
+        active = d > 0.0
+        change[~active] = 0.0
+        previous = d
+
+        for i in range(self.max_iterations):
+            if not np.any(active):
+                break
+
+            Se_active = self.k * self.Se_prime * CalcSizeFactor(d[active], self.loading, self.units)
+            d_new = self.__diameter(A[active], B[active], n[active], Se_active)
+
+            change[active] = np.abs(d_new - d[active]) / d_new
+            previous = d.copy()
+            d[active] = d_new
+            iterations[active] += 1
+            active &= change > self.rtol
+
+        # unconverged elements alternate around the jump of kb(d); keep the larger, safe diameter
+        d = np.where(active, np.maximum(d, previous), d)
+
+        kb = CalcSizeFactor(d, self.loading, self.units)
+        converged = ~active
+        statistics = {"mean_iterations": float(np.mean(iterations)) if iterations.size else 0.0,
+                      "max_iterations": int(np.max(iterations)) if iterations.size else 0,
+                      "unconverged": int(np.count_nonzero(active)),
+                      "max_change": float(np.max(change)) if change.size else 0.0}
+
+        return ShaftDiameterResult(d.reshape(shape), (self.k * self.Se_prime * kb).reshape(shape), kb.reshape(shape),
+                                   iterations.reshape(shape), converged.reshape(shape), statistics)
+
+    def solve_shaft(self, shaft, loads, n=1.0, x=None, stations=2000, mean=None):
+        """
+        Minimum diameters along a shaft, with the stress concentrations of its features.
+        :param shaft: Shaft; only the features and the length are used
+        :param loads: BeamLoadModel; rotating shaft: the bending moment is alternating, the torque steady.
+                      If mean is given, loads holds the alternating loads only.
+        :param n: design factor
+        :param x: array with the stations, None for Shaft.stations(stations)
+        :param stations: number of stations if x is None
+        :param mean: BeamLoadModel with the mean loads, None for a rotating shaft
+        :return: stations, ShaftDiameterResult
+        """
+        x = shaft.stations(stations) if x is None else np.asarray(x, dtype=np.float64)
+        Kf, Kfs = shaft.stress_concentration(x)
+
+        values = loads.evaluate(x)
+        if mean is None:
+            result = self.solve(values["M"], 0.0, 0.0, values["T"], Kf, Kfs, n)
+        else:
+            values_m = mean.evaluate(x)
+            result = self.solve(values["M"], values["T"], values_m["M"], values_m["T"], Kf, Kfs, n)
+
+        return x, result
+
+    def __diameter(self, A, B, n, Se):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.criterion == "Goodman":
+                d3 = 16.0 * n / np.pi * (A / Se + B / self.Sut)
+            elif self.criterion == "Gerber":
+                a = A / Se
+                d3 = 8.0 * n / np.pi * (a + np.sqrt(a * a + (2.0 * B / self.Sut) ** 2))
+            elif self.criterion == "ASME":
+                d3 = 16.0 * n / np.pi * np.sqrt((A / Se) ** 2 + (B / self.Sy) ** 2)
+            else:
+                d3 = 16.0 * n / np.pi * (A / Se + B / self.Sy)
+        return np.cbrt(d3)
@@ -0,0 +1,260 @@
+"""
+Streaming evaluation of nodal stresses exported from FE solvers.
+
+StressFieldReader reads a CSV or raw binary file chunk by chunk. StressFieldPipeline
+passes each chunk through the principal stress calculation and the failure theories
+and writes the per-node results before it reads the next chunk. Peak memory depends
+on the chunk size only, not on the size of the file.
+
+Stress columns:
+- 3 columns: plane stress [s_xx, s_yy, t_xy]
+- 6 columns: 3D stress in Voigt order [s_xx, s_yy, s_zz, t_yz, t_xz, t_xy]
+
+Example:
+    reader = StressFieldReader("nodal_stress.csv", columns=6, usecols=(1, 2, 3, 4, 5, 6), skip_header=1)
+    pipeline = StressFieldPipeline(["vonmises", "tresca", "MM"], Sy=250, Sut=300, Suc=900)
+    pipeline.run(reader, "results.csv")
+    pipeline.print_report()
+"""
+import itertools
+import time
+
+import numpy as np
+
+from ME325Common.FailureTheories import CalcVonMiesesFoSBatch, CalcTrescaFoSBatch, \
+    CalcEquivalentStressFoSBatch, CalcBrittleFoSBatch
+from ME325Common.ContinuumMechanics import calcPrincipalStressBatch, calcPrincipalStress3D
+from ME325Common.StressInvariants import calcVonMisesFoS3D
+
+
+class StressFieldReader():
+    """
+    Reads stress components in chunks of a fixed number of nodes.
+    """
+
+    path = ""
+    columns = 6
+    chunk_size = 100000
+    file_format = "csv"
+
+    def __init__(self, path, columns=6, chunk_size=100000, file_format=None, dtype=np.float64,
+                 delimiter=",", skip_header=0, usecols=None):
+        """
+        :param path: the file to read
+        :param columns: number of stress columns, 3 (plane stress) or 6 (3D, Voigt order)
+        :param chunk_size: number of nodes per chunk
+        :param file_format: "csv" or "binary"; None selects by file ending (.csv and .txt are csv)
+        :param dtype: data type of raw binary files, row-major with columns values per node
+        :param delimiter: csv delimiter
+        :param skip_header: number of header lines in csv files
+        :param usecols: csv columns that hold the stresses, e.g. (1, 2, 3) to skip a node id.
+                    None reads the first columns columns.
+        """
+        if columns not in (3, 6):
+            raise ValueError("Expected 3 or 6 stress columns, got " + str(columns))
+
+        self.path = path
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype)
+        self.delimiter = delimiter
+        self.skip_header = skip_header
+        self.usecols = usecols if usecols is not None else tuple(range(columns))
+
+        if file_format is None:
+            file_format = "csv" if str(path).lower().endswith((".csv", ".txt")) else "binary"
+        if file_format not in ("csv", "binary"):
+            raise ValueError("Unknown file format " + str(file_format))
+        self.file_format = file_format
+
+    def __iter__(self):
+        """
+        :return: generator of float64 arrays of shape (n, columns), n <= chunk_size
+        """
+        if self.file_format == "csv":
+            return self.__read_csv()
+        return self.__read_binary()
+
+    def __read_csv(self):
+        with open(self.path, "r") as f:
+            for i in range(self.skip_header):
+                f.readline()
+
+            while True:
+                lines = list(itertools.islice(f, self.chunk_size))
+                if len(lines) == 0:
+                    return
+                chunk = np.loadtxt(lines, delimiter=self.delimiter, usecols=self.usecols,
+                                   dtype=np.float64, ndmin=2)
+                yield chunk
+
+    def __read_binary(self):
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = np.fromfile(f, dtype=self.dtype, count=self.chunk_size * self.columns)
+                if chunk.size == 0:
+                    return
+                if chunk.size % self.columns != 0:
+                    raise ValueError("File " + str(self.path) + " does not hold a multiple of " +
+                                     str(self.columns) + " values")
+                yield chunk.reshape(-1, self.columns).astype(np.float64, copy=False)
+
+
+class StressFieldPipeline():
+    """
+    Evaluates failure theories chunk by chunk and keeps the time spent per stage.
+
+    Criteria:
+    - "vonmises" - von Mises (3D: computed from J2, see StressInvariants), needs Sy
+    - "tresca"   - Tresca, needs Sy
+    - "MNST", "MM", "BCM" - brittle failure theories on s1 and s3, need Sut and Suc
+    """
+
+    criteria = []
+    Sy = 1
+    Sut = 1
+    Suc = 1
+
+    def __init__(self, criteria, Sy=None, Sut=None, Suc=None, backend=None):
+        """
+        :param criteria: list with the criteria to evaluate, see class documentation
+        :param Sy: yield strength for von Mises and Tresca
+        :param Sut: ultimate tensile strength for the brittle theories
+        :param Suc: ultimate compression strength for the brittle theories
+        :param backend: compute backend, None for the global one (see ComputeBackends)
+        """
+        for c in criteria:
+            if c in ("vonmises", "tresca") and Sy is None:
+                raise ValueError("Criterion " + c + " needs Sy")
+            elif c in ("MNST", "MM", "BCM") and (Sut is None or Suc is None):
+                raise ValueError("Criterion " + c + " needs Sut and Suc")
+            elif c not in ("vonmises", "tresca", "MNST", "MM", "BCM"):
+                raise ValueError("Unknown criterion " + str(c))
+
+        self.criteria = list(criteria)
+        self.Sy = Sy
+        self.Sut = Sut
+        self.Suc = Suc
+        self.backend = backend
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        self.__seconds = dict()
+        self.__nodes = 0
+
+    def output_columns(self, columns):
+        """
+        :param columns: number of stress columns of the input, 3 or 6
+        :return: the names of the result columns in the order process() returns them
+        """
+        names = ["s1", "s3"] if columns == 3 else ["s1", "s2", "s3"]
+        for c in self.criteria:
+            names += [c + "_stress", c + "_FoS"]
+            if c in ("MNST", "MM", "BCM"):
+                names.append(c + "_case")
+        return names
+
+    def process(self, chunk, principal=None):
+        """
+        Evaluate one chunk.
+        :param chunk: array of shape (n, 3) or (n, 6)
+        :param principal: optional principal stresses of the chunk ([s1, s3] or [s1, s2, s3]),
+                    e.g. from a StressFieldStore. None calculates them.
+        :return: list of arrays of shape (n,), see output_columns()
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+
+        if principal is None:
+            start = time.perf_counter()
+            if chunk.shape[1] == 3:
+                principal = calcPrincipalStressBatch(chunk[:, 0], chunk[:, 1], chunk[:, 2], self.backend)
+            else:
+                principal = calcPrincipalStress3D(chunk)
+            self.__add_time("principal", start)
+
+        s1 = principal[0]
+        s3 = principal[-1]
+        results = list(principal)
+
+        for c in self.criteria:
+            start = time.perf_counter()
+            if c == "vonmises":
+                if chunk.shape[1] == 3:
+                    results += CalcVonMiesesFoSBatch(s1, s3, self.Sy, self.backend)
+                else:
+                    results += calcVonMisesFoS3D(chunk, self.Sy, backend=self.backend)
+            elif c == "tresca":
+                if chunk.shape[1] == 3:
+                    results += CalcTrescaFoSBatch(s1, s3, self.Sy, self.backend)
+                else:
+                    # s3 is the smallest of the three principal stresses: tau_max = (s1 - s3) / 2
+                    stress, FoS = CalcEquivalentStressFoSBatch(s1 - s3, self.Sy)
+                    results += [stress / 2, FoS]
+            else:
+                results += CalcBrittleFoSBatch(s1, s3, self.Sut, self.Suc, c, self.backend)
+            self.__add_time(c, start)
+
+        self.__nodes += chunk.shape[0]
+        return results
+
+    def run(self, reader, output_path=None, output_format=None):
+        """
+        Read all chunks, evaluate them and write the results chunk by chunk.
+        :param reader: a StressFieldReader, or any iterable of (n, 3) or (n, 6) arrays
+        :param output_path: result file; None does not write results (statistics only)
+        :param output_format: "csv" or "binary" (float64, row-major); None selects by file ending
+        :return: the number of nodes processed
+        """
+        if output_format is None and output_path is not None:
+            output_format = "csv" if str(output_path).lower().endswith((".csv", ".txt")) else "binary"
+
+        f = None
+        if output_path is not None:
+            f = open(output_path, "w" if output_format == "csv" else "wb")
+
+        nodes = 0
+        try:
+            iterator = iter(reader)
+            while True:
+                start = time.perf_counter()
+                chunk = next(iterator, None)
+                if chunk is None:
+                    break
+                self.__add_time("read", start)
+
+                results = self.process(chunk)
+                nodes += chunk.shape[0]
+
+                if f is not None:
+                    start = time.perf_counter()
+                    block = np.column_stack(results)
+                    if output_format == "csv":
+                        if nodes == chunk.shape[0]:
+                            f.write(",".join(self.output_columns(chunk.shape[1])) + "\n")
+                        np.savetxt(f, block, delimiter=",", fmt="%.10g")
+                    else:
+                        block.tofile(f)
+                    self.__add_time("write", start)
+        finally:
+            if f is not None:
+                f.close()
+
+        return nodes
+
+    def report(self):
+        """
+        :return: dict stage -> (seconds, nodes per second)
+        """
+        stats = dict()
+        for stage, seconds in self.__seconds.items():
+            rate = self.__nodes / seconds if seconds > 0 else float("inf")
+            stats[stage] = (seconds, rate)
+        return stats
+
+    def print_report(self):
+        print("Processed %d nodes" % self.__nodes)
+        for stage, (seconds, rate) in self.report().items():
+            print("%-12s %10.3f s %14.0f nodes/s" % (stage, seconds, rate))
+
+    def __add_time(self, stage, start):
+        self.__seconds[stage] = self.__seconds.get(stage, 0.0) + time.perf_counter() - start
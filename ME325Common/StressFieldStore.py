@@ -0,0 +1,310 @@
+"""
+On-disk store for stress fields that do not fit into memory.
+
+A store holds the stress components of N nodes and any number of derived arrays
+(principal stresses, equivalent stresses, factors of safety) with N rows each.
+Two storage formats are supported:
+
+- "npy":  a directory with one .npy file per array and a manifest.json. The arrays are
+          opened as memmaps, so reopening a store is zero-copy and slices are read
+          from disk only when they are used.
+- "hdf5": a single HDF5 file with chunked, compressed datasets (needs h5py).
+          Slices are decompressed on access, i.e. they are copies.
+
+All calculations run chunk by chunk (see apply()), so only chunk_size rows of each
+array are in memory at a time.
+
+Example:
+    store = StressFieldStore.create("assembly_store", nodes, columns=6)
+    store.import_stress(StressFieldReader("nodal_stress.bin", columns=6))
+    s1, s2, s3 = store.principal_stresses()
+    store.evaluate(StressFieldPipeline(["vonmises", "MM"], Sy=250, Sut=300, Suc=900))
+    store.close()
+
+    store = StressFieldStore("assembly_store")     # principals are reused, not recomputed
+"""
+import json
+import os
+
+import numpy as np
+
+from ME325Common.ContinuumMechanics import calcPrincipalStressBatch, calcPrincipalStress3D
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+g_manifest_name = "manifest.json"
+
+
+class StressFieldStore():
+    """
+    Stress tensors and derived per-node arrays on disk.
+    """
+
+    path = ""
+    storage = "npy"
+    chunk_size = 65536
+
+    def __init__(self, path, mode="r+", chunk_size=65536):
+        """
+        Open an existing store.
+        :param path: directory (npy) or file (hdf5) of the store
+        :param mode: "r" for read only, "r+" to add derived arrays
+        :param chunk_size: number of rows per chunk for the calculations
+        """
+        if mode not in ("r", "r+"):
+            raise ValueError("Unknown mode " + str(mode))
+
+        self.path = path
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.__arrays = dict()
+        self.__file = None
+
+        if os.path.isdir(path):
+            self.storage = "npy"
+            with open(os.path.join(path, g_manifest_name), "r") as f:
+                self.__manifest = json.load(f)
+        else:
+            self.storage = "hdf5"
+            self.__file = StressFieldStore.__open_hdf5(path, mode)
+            self.__manifest = json.loads(self.__file.attrs["manifest"])
+
+    @staticmethod
+    def create(path, nodes, columns=6, storage="npy", chunk_size=65536, compression="gzip"):
+        """
+        Create an empty store.
+        :param path: directory (npy) or file (hdf5) of the store, must not exist
+        :param nodes: number of nodes N
+        :param columns: 3 for plane stress [s_xx, s_yy, t_xy] or 6 for 3D stress in Voigt order
+        :param storage: "npy" or "hdf5"
+        :param chunk_size: number of rows per chunk, also the HDF5 chunk size
+        :param compression: HDF5 compression filter, None for none
+        :return: the open store
+        """
+        if columns not in (3, 6):
+            raise ValueError("Expected 3 or 6 stress columns, got " + str(columns))
+        if os.path.exists(path):
+            raise ValueError("Store " + str(path) + " exists already")
+
+        manifest = {"nodes": int(nodes), "columns": int(columns), "storage": storage,
+                    "compression": compression, "version": 0, "arrays": {}}
+
+        if storage == "npy":
+            os.makedirs(path)
+            with open(os.path.join(path, g_manifest_name), "w") as f:
+                json.dump(manifest, f, indent=2)
+        elif storage == "hdf5":
+            h5 = StressFieldStore.__open_hdf5(path, "w")
+            h5.attrs["manifest"] = json.dumps(manifest)
+            h5.close()
+        else:
+            raise ValueError("Unknown storage " + str(storage))
+
+        store = StressFieldStore(path, "r+", chunk_size)
+        store.create_array("stress", (columns,))
+        return store
+
+    @property
+    def nodes(self):
+        return self.__manifest["nodes"]
+
+    @property
+    def columns(self):
+        return self.__manifest["columns"]
+
+    @property
+    def stress(self):
+        """
+        :return: the stress components, array of shape (N, columns)
+        """
+        return self.get_array("stress")
+
+    def has_array(self, name):
+        return name in self.__manifest["arrays"]
+
+    def is_current(self, name):
+        """
+        :return: True if the derived array exists and was calculated from the current stresses
+        """
+        return self.has_array(name) and self.__manifest["arrays"][name]["version"] == self.__manifest["version"]
+
+    def get_array(self, name):
+        """
+        :return: memmap (npy) or dataset (hdf5) of the array with the given name
+        """
+        if name in self.__arrays:
+            return self.__arrays[name]
+        if not self.has_array(name):
+            raise KeyError("Store has no array " + str(name))
+
+        if self.storage == "npy":
+            array = np.load(self.__npy_path(name), mmap_mode=self.mode)
+        else:
+            array = self.__file[name]
+        self.__arrays[name] = array
+        return array
+
+    def create_array(self, name, shape=(), dtype=np.float64):
+        """
+        Create a new array with N rows, or return the existing one of the same name.
+        New arrays are outdated until they are marked as calculated (see is_current()).
+        :param name: name of the array
+        :param shape: shape of one row, () for one value per node
+        :param dtype: data type
+        :return: memmap (npy) or dataset (hdf5)
+        """
+        if self.mode == "r":
+            raise ValueError("Store " + str(self.path) + " is opened read only")
+
+        shape = (self.nodes,) + tuple(shape)
+        dtype = np.dtype(dtype)
+
+        if self.has_array(name):
+            array = self.get_array(name)
+            if array.shape != shape or array.dtype != dtype:
+                raise ValueError("Array " + name + " exists with shape " + str(array.shape) +
+                                 " and type " + str(array.dtype))
+            return array
+
+        if self.storage == "npy":
+            array = np.lib.format.open_memmap(self.__npy_path(name), mode="w+", dtype=dtype, shape=shape)
+        else:
+            chunks = (min(self.chunk_size, max(self.nodes, 1)),) + shape[1:]
+            array = self.__file.create_dataset(name, shape=shape, dtype=dtype, chunks=chunks,
+                                               compression=self.__manifest["compression"])
+
+        self.__arrays[name] = array
+        self.__manifest["arrays"][name] = {"shape": list(shape), "dtype": dtype.str, "version": -1}
+        self.__save_manifest()
+        return array
+
+    def import_stress(self, chunks):
+        """
+        Write the stress components chunk by chunk. Derived arrays become outdated.
+        :param chunks: iterable of arrays of shape (n, columns), e.g. a StressFieldReader
+        :return: the number of rows written
+        """
+        stress = self.stress
+        start = 0
+        for chunk in chunks:
+            stop = start + chunk.shape[0]
+            if stop > self.nodes:
+                raise ValueError("More than " + str(self.nodes) + " rows in the input")
+            stress[start:stop] = chunk
+            start = stop
+
+        self.__manifest["version"] += 1
+        self.__manifest["arrays"]["stress"]["version"] = self.__manifest["version"]
+        self.__save_manifest()
+        return start
+
+    def apply(self, func, inputs, outputs):
+        """
+        Call func chunk by chunk and write its results to the output arrays.
+        :param func: function that takes one chunk of each input array and returns a list
+                    with one chunk for each output array
+        :param inputs: list of names of the input arrays
+        :param outputs: list of names of the output arrays, see create_array()
+        """
+        input_arrays = [self.get_array(name) for name in inputs]
+        output_arrays = [self.get_array(name) for name in outputs]
+
+        for start in range(0, self.nodes, self.chunk_size):
+            stop = min(start + self.chunk_size, self.nodes)
+            results = func(*[a[start:stop] for a in input_arrays])
+            for a, r in zip(output_arrays, results):
+                a[start:stop] = r
+
+    def principal_stresses(self, recompute=False, backend=None):
+        """
+        Principal stresses of all nodes. They are stored in the arrays "s1", "s3" (plane stress)
+        or "s1", "s2", "s3" (3D) and only calculated if they are missing or outdated.
+        :param recompute: True to calculate them in any case
+        :param backend: compute backend for plane stress, None for the global one (see ComputeBackends)
+        :return: list of arrays, [s1, s3] or [s1, s2, s3]
+        """
+        names = self.__principal_names()
+        if not recompute and all(self.is_current(name) for name in names):
+            return [self.get_array(name) for name in names]
+
+        for name in names:
+            self.create_array(name)
+
+        if self.columns == 3:
+            self.apply(lambda stress: calcPrincipalStressBatch(stress[:, 0], stress[:, 1], stress[:, 2], backend),
+                       ["stress"], names)
+        else:
+            self.apply(lambda stress: calcPrincipalStress3D(np.asarray(stress)), ["stress"], names)
+
+        self.__mark_current(names)
+        return [self.get_array(name) for name in names]
+
+    def evaluate(self, pipeline):
+        """
+        Evaluate the criteria of a StressFieldPipeline with the stored principal stresses
+        and store the results under the names of pipeline.output_columns().
+        :param pipeline: the StressFieldPipeline
+        :return: list with the names of the result arrays
+        """
+        principal_names = self.__principal_names()
+        self.principal_stresses()
+
+        names = pipeline.output_columns(self.columns)[len(principal_names):]
+        for name in names:
+            self.create_array(name, dtype=np.int8 if name.endswith("_case") else np.float64)
+
+        self.apply(lambda stress, *principal: pipeline.process(stress, list(principal))[len(principal_names):],
+                   ["stress"] + principal_names, names)
+
+        self.__mark_current(names)
+        return names
+
+    def flush(self):
+        for array in self.__arrays.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close(self):
+        self.flush()
+        self.__arrays = dict()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __principal_names(self):
+        return ["s1", "s3"] if self.columns == 3 else ["s1", "s2", "s3"]
+
+    def __mark_current(self, names):
+        for name in names:
+            self.__manifest["arrays"][name]["version"] = self.__manifest["version"]
+        self.__save_manifest()
+
+    def __npy_path(self, name):
+        return os.path.join(self.path, name + ".npy")
+
+    def __save_manifest(self):
+        if self.mode == "r":
+            return
+        if self.storage == "npy":
+            with open(os.path.join(self.path, g_manifest_name), "w") as f:
+                json.dump(self.__manifest, f, indent=2)
+        else:
+            self.__file.attrs["manifest"] = json.dumps(self.__manifest)
+
+    @staticmethod
+    def __open_hdf5(path, mode):
+        if h5py is None:
+            raise ImportError("The hdf5 storage needs h5py")
+        return h5py.File(path, mode)
@@ -0,0 +1,170 @@
+"""
+Equivalent stresses for 3D stress states computed from the stress invariants.
+
+von Mises stress, octahedral shear stress and hydrostatic pressure only need the
+second invariant J2 of the deviator and the first invariant I1. No principal stresses
+are calculated, which saves the eigenvalue solve and the memory for s1, s2, s3.
+
+All functions take arrays of shape (N, 6) in Voigt order [s_xx, s_yy, s_zz, t_yz, t_xz, t_xy]
+(or (N, 3, 3) tensors) and accept output buffers, so that large fields can be processed
+without allocating new arrays.
+
+    sigma_vm  = sqrt(3 J2)
+    tau_oct   = sqrt(2/3 J2) = sqrt(2)/3 sigma_vm
+    p         = -I1/3  (positive in compression)
+"""
+import numpy as np
+
+from ME325Common.ContinuumMechanics import getStressComponents
+from ME325Common.FailureTheories import CalcEquivalentStressFoSBatch
+from ME325Common.ComputeBackends import GetKernel
+
+
+# rows per block; the temporaries of one block stay in the CPU cache
+g_chunk_size = 16384
+
+
+def calcEquivalentStresses3D(stress, out=None, backend=None):
+    """
+    Calculate von Mises stress, octahedral shear stress and hydrostatic pressure in one pass.
+    :param stress: array of shape (N, 6) in Voigt order or (N, 3, 3)
+    :param out: optional list of three arrays of shape (N,) that receive the results
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: arrays [sigma_vm, tau_oct, p]
+    """
+    components = getStressComponents(stress)
+    vm, tau_oct, p = __get_output(components[0].shape, out, 3)
+
+    kernel = GetKernel("equivalent_stresses_3d", backend)
+    if kernel is not None:
+        kernel(*__flat(components), vm.reshape(-1), tau_oct.reshape(-1), p.reshape(-1))
+        return [vm, tau_oct, p]
+
+    __von_mises_blocks(components, vm)
+    np.multiply(vm, np.sqrt(2.0) / 3.0, out=tau_oct)
+    __pressure(components, p)
+
+    return [vm, tau_oct, p]
+
+
+def calcVonMisesStress3D(stress, out=None, backend=None):
+    """
+    Calculate the von Mises equivalent stress sqrt(3 J2).
+    :param stress: array of shape (N, 6) in Voigt order or (N, 3, 3)
+    :param out: optional array of shape (N,) that receives the result
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: array with the von Mises stresses
+    """
+    components = getStressComponents(stress)
+    vm, = __get_output(components[0].shape, None if out is None else [out], 1)
+
+    kernel = GetKernel("von_mises_3d", backend)
+    if kernel is not None:
+        kernel(*__flat(components), vm.reshape(-1))
+        return vm
+
+    __von_mises_blocks(components, vm)
+    return vm
+
+
+def calcOctahedralShearStress(stress, out=None, backend=None):
+    """
+    Calculate the octahedral shear stress sqrt(2/3 J2).
+    :param stress: array of shape (N, 6) in Voigt order or (N, 3, 3)
+    :param out: optional array of shape (N,) that receives the result
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: array with the octahedral shear stresses
+    """
+    tau_oct = calcVonMisesStress3D(stress, out, backend)
+    np.multiply(tau_oct, np.sqrt(2.0) / 3.0, out=tau_oct)
+    return tau_oct
+
+
+def calcHydrostaticPressure(stress, out=None):
+    """
+    Calculate the hydrostatic pressure -I1/3, positive in compression.
+    :param stress: array of shape (N, 6) in Voigt order or (N, 3, 3)
+    :param out: optional array of shape (N,) that receives the result
+    :return: array with the pressures
+    """
+    components = getStressComponents(stress)
+    p, = __get_output(components[0].shape, None if out is None else [out], 1)
+    __pressure(components, p)
+    return p
+
+
+def calcVonMisesFoS3D(stress, Sy, out=None, backend=None):
+    """
+    Calculate the von Mises stress and the factor of safety against yielding
+    for 3D stress states. Zero stresses are handled as in CalcVonMiesesFoSBatch.
+    :param stress: array of shape (N, 6) in Voigt order or (N, 3, 3)
+    :param Sy: the yield strength, scalar or array of shape (N,)
+    :param out: optional array of shape (N,) for the von Mises stress
+    :param backend: compute backend for this call, None for the global one (see ComputeBackends)
+    :return: arrays with the von Mises equivalent stress and the FoS
+    """
+    vm = calcVonMisesStress3D(stress, out, backend)
+    return CalcEquivalentStressFoSBatch(vm, Sy)
+
+
+def __get_output(shape, out, count):
+    if out is None:
+        return [np.empty(shape) for i in range(count)]
+
+    for o in out:
+        if o.shape != shape:
+            raise ValueError("Output buffer has shape " + str(o.shape) + ", expected " + str(shape))
+        if not o.flags.c_contiguous:
+            raise ValueError("Output buffers must be C-contiguous")
+    return out
+
+
+def __flat(components):
+    return [c.reshape(-1) for c in components]
+
+
+def __pressure(components, p):
+    s_xx, s_yy, s_zz = components[0:3]
+    np.add(s_xx, s_yy, out=p)
+    np.add(p, s_zz, out=p)
+    np.divide(p, -3.0, out=p)
+
+
+def __von_mises_blocks(components, vm):
+    """
+    sigma_vm = sqrt(0.5 * ((s_xx - s_yy)^2 + (s_yy - s_zz)^2 + (s_zz - s_xx)^2) + 3 * (t_yz^2 + t_xz^2 + t_xy^2)),
+    evaluated block by block with three scratch buffers.
+    """
+    s_xx, s_yy, s_zz, t_yz, t_xz, t_xy = __flat(components)
+    vm_flat = vm.reshape(-1)
+    n = s_xx.shape[0]
+
+    buffer_a = np.empty(min(n, g_chunk_size))
+    buffer_b = np.empty(min(n, g_chunk_size))
+    buffer_c = np.empty(min(n, g_chunk_size))
+
+    for start in range(0, n, g_chunk_size):
+        stop = min(start + g_chunk_size, n)
+        a = buffer_a[:stop - start]
+        b = buffer_b[:stop - start]
+        c = buffer_c[:stop - start]
+
+        np.subtract(s_xx[start:stop], s_yy[start:stop], out=a)
+        np.multiply(a, a, out=a)
+        np.subtract(s_yy[start:stop], s_zz[start:stop], out=b)
+        np.multiply(b, b, out=b)
+        np.add(a, b, out=a)
+        np.subtract(s_zz[start:stop], s_xx[start:stop], out=b)
+        np.multiply(b, b, out=b)
+        np.add(a, b, out=a)
+        np.multiply(a, 0.5, out=a)
+
+        np.multiply(t_yz[start:stop], t_yz[start:stop], out=b)
+        np.multiply(t_xz[start:stop], t_xz[start:stop], out=c)
+        np.add(b, c, out=b)
+        np.multiply(t_xy[start:stop], t_xy[start:stop], out=c)
+        np.add(b, c, out=b)
+        np.multiply(b, 3.0, out=b)
+        np.add(a, b, out=a)
+
+        np.sqrt(a, out=vm_flat[start:stop])
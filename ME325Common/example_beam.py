@@ -24,6 +24,7 @@ from ME325Common.FailureTheories import *
 
 from ME325Common.ContinuumMechanics import *
 from ME325Common.SecondMoment import *
+from ME325Common.BeamCore import RectangularBeamCore
 
 # for images
 from PIL import Image, ImageTk
@@ -133,6 +134,10 @@ class ExampleBeam():
         self.detail_J_p = StringVar()
         self.plot_number = PlotBase.GetPlotNumber()
 
+        # the calculations, the GUI subscribes to their results
+        self.core = RectangularBeamCore()
+        self.core.subscribe(self.__show_result)
+
 
     def setLimits(self, Sy_, L_, T_,  alpha_, wh_, l_):
         self.limit_yieldstress = Sy_
@@ -146,9 +151,8 @@ class ExampleBeam():
 
         self.height = h
         self.width = b
-        self.I_xx, self.I_yy = SecondMoment.RectArea(b,h)
-
-        self.Jxy = SecondMoment.PolarRectArea(b,h)
+        self.I_xx, self.I_yy = self.core.calcI(b, h)
+        self.Jxy = self.core.J
 
         #print(self.I_xx, " ", self.I_yy)
         return [self.I_xx, self.I_yy]
@@ -160,31 +164,20 @@ class ExampleBeam():
         self.alpha = angle
         self.Force = F
         self.length = l
-        Fx = F * np.cos(np.deg2rad(angle))
-        Fy = F * np.sin(np.deg2rad(angle))
-
-        #print(Fx, " ", Fy)
-
-        r = self.calc_radius(self.width, self.height)
-
-        # the two stress components in z-direction
-        s_yy = (Fx * l * self.width)/(2 * self.I_yy)
-        s_xx = (Fy * l * self.height) / (2 * self.I_xx)
-        self.sigma_max = s_xx + s_yy
 
-        # shear stress
-        t_xy = (T * 1000 * r)/ self.Jxy # T * 1000-> Nm to Nmm
+        return self.core.calcPrincipalStress(F, T, l, angle)
 
 
-        # principal stresses
-        s1, s3 = calcPrincipalStress(self.sigma_max, 0.0, t_xy)
-
-        #print(Fx, " ", Fy, "  ", s_xx, " " ,  s_yy, "  ", s1, " " ,  s3)
-
-        self.setDetails( s1, s3, s_xx, s_yy, self.sigma_max, t_xy, self.I_xx, self.I_yy, self.Jxy)
-        self.updateLoadPlot()
-
-        return [s1, s3, s_xx, s_yy]
+    def __show_result(self, result):
+        """
+        Subscriber of the compute core: show the result in the details window and the load plot.
+        :param result: BeamStressResult
+        """
+        self.sigma_max = result.sigma_max
+        self.setDetails(result.s1, result.s3, result.s_xx, result.s_yy, result.sigma_max, result.t_xy,
+                        result.I_xx, result.I_yy, result.J)
+        if self.window_details is not None:
+            self.updateLoadPlot()
 
 
     def calc_radius(self, b, h):
@@ -66,6 +66,8 @@ from ME325Common.FailureTheories import *
 from ME325Common.PlotHelpers import *
 from ME325Common.ContinuumMechanics import *
 from ME325Common.UnitConversion import *
+from ME325Common.RenderScheduler import RenderScheduler
+from ME325Common.LatencyProfiler import LatencyProfiler, ParseProfilerArguments
 
 class MohrsCircle2D(Frame):
     """
@@ -112,9 +114,16 @@ class MohrsCircle2D(Frame):
     entry_items = ["\u03C3_x", "\u03C3_y", "\u03C4_xy"]
 
 
-    def __init__(self):
+    def __init__(self, profiler=None):
+        """
+        :param profiler: LatencyProfiler to measure the updates, None for no profiling
+        """
         super().__init__()
 
+        # slider changes are merged into one update per frame
+        self.render_scheduler = RenderScheduler(self, self.apply_values)
+        self.profiler = profiler if profiler is not None else LatencyProfiler(enabled=False)
+
 
         # the plot
         self.__the_plot = MohrsCirclePlot()
@@ -124,9 +133,10 @@ class MohrsCircle2D(Frame):
 
         # menu
         self.menu = MohrsCircle2DDetails(self.master, self.manual_entry_callback)
+        self.profiler.show_overlay(self)
 
         # update ui
-        self.update_values(0.0)
+        self.apply_values(0.0)
 
 
 
@@ -153,10 +163,12 @@ class MohrsCircle2D(Frame):
         # Update the plot
         self.__the_plot.update_plot(sx, sy, txy)
         self.__the_plot.update_helpers(s1, s2, a1, a2, t1, t2, self.__show_helpers)
-        self.__canvas.draw_idle()
+        self.profiler.mark("artists")
+        self.__the_plot.draw(self.__canvas)
 
 
         self.menu.update_plot(s1, s2, a1)
+        self.profiler.mark("draw")
 
 
     def update_output_display(self):
@@ -179,11 +191,22 @@ class MohrsCircle2D(Frame):
 
     def update_values(self, val):
         """
-        Update function for all widgets. The function updates the
-        input values. Note that all slider widgets call this functions
+        Update function for all widgets. Note that all slider widgets call this functions.
+        The update is scheduled; all changes within one frame are applied together by apply_values().
         :param val: The value the widget passes
         :return: -
         """
+        self.profiler.event()
+        self.render_scheduler.request()
+
+    def apply_values(self, val=0):
+        """
+        Updates the input values, the results and the plot.
+        Called by the render scheduler at most once per frame.
+        :param val: not used
+        :return: -
+        """
+        self.profiler.begin_frame()
 
         self.__var["sx"].set( round(self.__sliders["sx"].get(),2))
         self.__var["sx_str"].set(str(self.__var["sx"].get()))
@@ -214,10 +237,12 @@ class MohrsCircle2D(Frame):
             self.__results["a2"] = a1
         self.__results["t1"] = t1
         self.__results["t2"] = t2
-
+        self.profiler.mark("compute")
 
         self.update_plot()
         self.update_output_display()
+        self.profiler.mark("artists")
+        self.profiler.end_frame()
 
     def cb_update(self):
         """
@@ -380,6 +405,7 @@ class MohrsCircle2D(Frame):
         """
         fig = self.__the_plot.create_plot(8) # 9 -> figure size
         self.__canvas = FigureCanvasTkAgg(fig, master=self)
+        self.__the_plot.enable_blit(self.__canvas)
         self.__canvas.draw()
 
 
@@ -626,6 +652,7 @@ class MohrsCircle2DDetails():
         self.__canvas = FigureCanvasTkAgg(fig, master=self.__window )
         self.__canvas.get_tk_widget().grid(row=plot_start_row, column=0, columnspan=cols_for_plot, rowspan=rows_for_plot,
                                            padx=5, sticky=E + W + S + N)
+        self.__plot.enable_blit(self.__canvas)
         self.__canvas.draw()
 
         self.__window.columnconfigure(cols_for_plot-1, weight=1)  # first and last column can expand
@@ -673,15 +700,18 @@ class MohrsCircle2DDetails():
     def update_plot(self, s1, s2, a1):
         try:
             self.__plot.update_plot(s1, s2, a1)
-            self.__canvas.draw_idle()
+            self.__plot.draw(self.__canvas)
         except AttributeError:
             return
 
 
 def main():
+    args = ParseProfilerArguments("Mohr's circle for plane stress")
+    profiler = LatencyProfiler(enabled=args.profile)
+
     root = Tk()
     root.geometry("900x720+300+300")
-    app = MohrsCircle2D()
+    app = MohrsCircle2D(profiler)
 
     # To jump the window to the front
     root.attributes("-topmost", True)
@@ -690,6 +720,11 @@ def main():
     # run
     root.mainloop()
 
+    if args.profile:
+        print(profiler.summary())
+    if args.profile_output is not None:
+        profiler.dump(args.profile_output)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
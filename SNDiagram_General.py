@@ -71,6 +71,7 @@ from ME325Common.ExampleBeamRound import *
 from ME325Common.PlotHelpers import *
 from ME325Common.DynamicLoadTheories import *
 from ME325Common.InputHelpers import DataEntryMenu
+from ME325Common.RenderScheduler import RenderScheduler
 
 
 class LogScale(Scale):
@@ -144,6 +145,9 @@ class SDDiagram_General(Frame):
     def __init__(self):
         super().__init__()
 
+        # slider changes are merged into one update per frame
+        self.render_scheduler = RenderScheduler(self, self.apply_values)
+
         self.yield_strength_var = DoubleVar()
         self.ut_strength_var = DoubleVar()
         self.endurance_strength_var = DoubleVar()
@@ -181,7 +185,7 @@ class SDDiagram_General(Frame):
         self.initUI()
 
         # update ui
-        self.update_values(0.0)
+        self.apply_values(0.0)
 
         # init the manual entry menu
         self.__menu = DataEntryMenu(self.master, self.__manual_entry_callback)
@@ -226,7 +230,7 @@ class SDDiagram_General(Frame):
             self.sf_out = round(Sf_current,2)
 
         # Update the plot
-        self.canvas.draw_idle()
+        self.plot.draw(self.canvas)
 
     def update_output_display(self):
         """
@@ -250,11 +254,20 @@ class SDDiagram_General(Frame):
 
     def update_values(self, val):
         """
-        Update function for all widgets. The function updates the
-        input values. Note that all slider widgets call this functions
+        Update function for all widgets. Note that all slider widgets call this functions.
+        The update is scheduled; all changes within one frame are applied together by apply_values().
         :param val: The value the widget passes
         :return: -
         """
+        self.render_scheduler.request()
+
+    def apply_values(self, val=0):
+        """
+        Updates the input values, the results and the plot.
+        Called by the render scheduler at most once per frame.
+        :param val: not used
+        :return: -
+        """
         sy = float(self.yield_strength_var.get())
         sut = float(self.ut_strength_var.get())
         se = float(self.endurance_strength_var.get())
@@ -408,6 +421,7 @@ class SDDiagram_General(Frame):
         self.plot = SNDiagramPlot()
         fig = self.plot.create_plot(9, 6)
         self.canvas = FigureCanvasTkAgg(fig, master=self)
+        self.plot.enable_blit(self.canvas)
         self.canvas.draw()
 
 